@@ -0,0 +1,117 @@
+"""
+Бенчмарк соединений воркера Celery с БД: сколько раз открывается соединение с Postgres
+на 10 000 задач.
+
+Запускает в процессе воркер Celery (пул solo, брокер из CELERY_BROKER_URL, например memory://),
+ставит в очередь --tasks задач, каждая из которых выполняет запрос к БД, и считает
+новые соединения по сигналу connection_created.
+
+Режимы:
+  --mode per-task  поведение без пула: CONN_MAX_AGE=0, CELERY_DB_REUSE_MAX не задан,
+                   Celery закрывает соединение после каждой задачи;
+  --mode reuse     настройки проекта: соединение процесса переиспользуется между задачами
+                   (DB_CONN_MAX_AGE, CELERY_DB_REUSE_MAX);
+  --mode both      оба режима в отдельных процессах и сравнение (по умолчанию).
+
+Запуск: python -m benchmarks.db_connections --tasks 10000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from typing import Dict
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from celery import shared_task  # noqa: E402
+from celery.contrib.testing.worker import start_worker  # noqa: E402
+from celery.signals import task_postrun  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+
+from config.celery import app  # noqa: E402
+from notifications.models import Notification  # noqa: E402
+
+PER_TASKS = 10000
+
+
+@shared_task
+def touch_database() -> bool:
+    return Notification.objects.filter(id=0).exists()
+
+
+def run(mode: str, tasks: int) -> Dict[str, float]:
+    """Выполняет задачи во встроенном воркере и возвращает число соединений и скорость."""
+    if mode == 'per-task':
+        for alias in connections:
+            connections[alias].settings_dict['CONN_MAX_AGE'] = 0
+        app.conf.CELERY_DB_REUSE_MAX = None
+    else:
+        app.conf.CELERY_DB_REUSE_MAX = settings.CELERY_DB_REUSE_MAX
+    app.conf.task_always_eager = False
+
+    connects = 0
+    done = 0
+    finished = threading.Event()
+    lock = threading.Lock()
+
+    def on_connect(**kwargs: object) -> None:
+        nonlocal connects
+        with lock:
+            connects += 1
+
+    def on_done(**kwargs: object) -> None:
+        nonlocal done
+        with lock:
+            done += 1
+            if done >= tasks:
+                finished.set()
+
+    connection_created.connect(on_connect, weak=False)
+    task_postrun.connect(on_done, weak=False)
+
+    with start_worker(app, pool='solo', perform_ping_check=False, shutdown_timeout=30):
+        started = time.perf_counter()
+        for _ in range(tasks):
+            touch_database.delay()
+        finished.wait()
+        elapsed = time.perf_counter() - started
+
+    return {
+        'tasks': tasks,
+        'connects': connects,
+        'connects_per_10k_tasks': round(connects * PER_TASKS / tasks, 1),
+        'tasks_per_second': round(tasks / elapsed, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('per-task', 'reuse', 'both'), default='both')
+    parser.add_argument('--tasks', type=int, default=PER_TASKS)
+    args = parser.parse_args()
+
+    if args.mode != 'both':
+        print(json.dumps(run(args.mode, args.tasks)))
+        return
+
+    # Обработчики Celery подключаются при старте воркера, поэтому каждый режим — в своем процессе.
+    report = {}
+    for mode in ('per-task', 'reuse'):
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.db_connections', '--mode', mode, '--tasks', str(args.tasks)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        report[mode] = json.loads(output.strip().splitlines()[-1])
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,306 @@
+"""
+Нагрузочный бенчмарк всего конвейера: POST /api/notify/ → outbox → Celery → отправка по каналам.
+
+Письма принимает локальный SMTP-приемник (aiosmtpd), сообщения Telegram — заглушка
+Bot API; обе добавляют задержку, ошибки и ответы 429. Печатает и сохраняет в JSON
+запросы API в секунду, p50/p99 времени ответа, сообщения в секунду по каналам и
+число запросов к БД на уведомление.
+
+Режимы:
+  --mode eager    все в одном процессе: API вызывается через тестовый клиент Django,
+                  задачи Celery выполняются синхронно (task_always_eager), Redis
+                  отключается, повторы выполняются сразу, без countdown;
+  --mode workers  запросы отправляются на запущенный сервер (--api-url), а рассылку
+                  выполняют relay_outbox и воркеры Celery, настроенные на заглушки:
+                  EMAIL_HOST, EMAIL_PORT, EMAIL_USE_TLS=False, TELEGRAM_API_URL
+                  (адреса печатаются при старте). Запросы к БД выполняют другие процессы,
+                  поэтому в этом режиме они не считаются.
+
+Созданные уведомления удаляются в конце, если не указан --keep.
+
+Запуск:
+  python -m benchmarks.pipeline --notifications 500 --save-baseline benchmarks/baseline.json
+  python -m benchmarks.pipeline --notifications 500 --baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+import httpx  # noqa: E402
+from celery import current_app  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.db import connection, connections  # noqa: E402
+from django.db.backends.signals import connection_created  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from benchmarks.stubs import FaultInjector, SMTPSink, TelegramStub  # noqa: E402
+from notifications.logbuffer import send_log_buffer  # noqa: E402
+from notifications.models import Notification  # noqa: E402
+from notifications.tasks import relay_outbox  # noqa: E402
+
+# Метрики, которые сравниваются с базовой линией: для первых ухудшение — падение, для вторых — рост.
+HIGHER_IS_BETTER = ('per_second',)
+LOWER_IS_BETTER = ('latency_ms', 'db_queries')
+
+
+class QueryCounter:
+    """Считает запросы к БД во всех потоках процесса, в том числе в новых соединениях."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict[str, Any]) -> Any:
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def install(self) -> None:
+        for conn in connections.all():
+            conn.execute_wrappers.append(self)
+        connection_created.connect(self._on_connection_created, weak=False)
+
+    def _on_connection_created(self, sender: Any, connection: Any, **kwargs: Any) -> None:
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def take(self) -> int:
+        with self._lock:
+            count, self.count = self.count, 0
+        return count
+
+
+def make_payload(index: int, emails: int, telegrams: int) -> Dict[str, Any]:
+    # Адреса уникальны, чтобы не срабатывали дедупликация и интервал между сообщениями в один чат.
+    recipients = [f"bench{index}-{i}@example.com" for i in range(emails)]
+    recipients += [str(100000000 + index * telegrams + i) for i in range(telegrams)]
+    return {"message": f"Benchmark message {index}", "recepient": recipients, "delay": 0}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def run_api_load(post: Callable[[Dict[str, Any]], Tuple[int, Optional[int]]], payloads: List[Dict[str, Any]],
+                 concurrency: int) -> Dict[str, Any]:
+    """Отправляет запросы в concurrency потоков и возвращает статистику и id созданных уведомлений."""
+    latencies: List[float] = []
+    ids: List[int] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def worker(chunk: List[Dict[str, Any]]) -> None:
+        nonlocal errors
+        try:
+            for payload in chunk:
+                started_at = time.perf_counter()
+                status, notification_id = post(payload)
+                elapsed = time.perf_counter() - started_at
+                with lock:
+                    latencies.append(elapsed)
+                    if status == 201 and notification_id is not None:
+                        ids.append(notification_id)
+                    else:
+                        errors += 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, args=(payloads[i::concurrency],)) for i in range(concurrency)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    return {
+        'ids': ids,
+        'requests': len(payloads),
+        'errors': errors,
+        'requests_per_second': len(payloads) / elapsed,
+        'latency_ms': {'p50': percentile(latencies, 0.5) * 1000, 'p99': percentile(latencies, 0.99) * 1000},
+    }
+
+
+def in_process_post() -> Callable[[Dict[str, Any]], Tuple[int, Optional[int]]]:
+    local = threading.local()
+
+    def post(payload: Dict[str, Any]) -> Tuple[int, Optional[int]]:
+        if not hasattr(local, 'client'):
+            local.client = Client()
+        response = local.client.post('/api/notify/', payload, content_type='application/json')
+        return response.status_code, response.json().get('id') if response.status_code == 201 else None
+
+    return post
+
+
+def http_post(api_url: str) -> Callable[[Dict[str, Any]], Tuple[int, Optional[int]]]:
+    local = threading.local()
+
+    def post(payload: Dict[str, Any]) -> Tuple[int, Optional[int]]:
+        if not hasattr(local, 'client'):
+            local.client = httpx.Client(base_url=api_url, timeout=30)
+        response = local.client.post('/api/notify/', json=payload)
+        return response.status_code, response.json().get('id') if response.status_code == 201 else None
+
+    return post
+
+
+def drain_outbox() -> None:
+    """Передает outbox в Celery, пока он не опустеет (в режиме eager рассылка выполняется сразу)."""
+    while relay_outbox(settings.OUTBOX_RELAY_BATCH_SIZE):
+        pass
+    send_log_buffer.flush()
+
+
+def wait_until_completed(ids: List[int], timeout: float) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if not Notification.objects.filter(id__in=ids).exclude(status=Notification.COMPLETED).exists():
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, path: str = '') -> List[str]:
+    """Возвращает описания метрик, которые ухудшились относительно базовой линии больше чем на tolerance."""
+    regressions = []
+    for key, value in baseline.items():
+        current = report.get(key)
+        name = f"{path}.{key}" if path else key
+        if isinstance(value, dict) and isinstance(current, dict):
+            regressions += compare(current, value, tolerance, name)
+        elif isinstance(value, (int, float)) and isinstance(current, (int, float)) and value:
+            change = (current - value) / value
+            if any(part in name for part in LOWER_IS_BETTER):
+                worse = change > tolerance
+            elif any(part in name for part in HIGHER_IS_BETTER):
+                worse = change < -tolerance
+            else:
+                continue
+            if worse:
+                regressions.append(f"{name}: {value:.2f} → {current:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mode', choices=('eager', 'workers'), default='eager')
+    parser.add_argument('--api-url', default='http://127.0.0.1:8000')
+    parser.add_argument('--notifications', type=int, default=200)
+    parser.add_argument('--emails', type=int, default=5, help="email-получателей в уведомлении")
+    parser.add_argument('--telegrams', type=int, default=5, help="telegram-получателей в уведомлении")
+    parser.add_argument('--concurrency', type=int, default=8, help="потоков, отправляющих запросы к API")
+    parser.add_argument('--stub-host', default='127.0.0.1')
+    parser.add_argument('--smtp-port', type=int, default=8025)
+    parser.add_argument('--smtp-latency', type=float, default=0.0)
+    parser.add_argument('--smtp-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-port', type=int, default=8081)
+    parser.add_argument('--telegram-latency', type=float, default=0.0)
+    parser.add_argument('--telegram-error-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-429-rate', type=float, default=0.0)
+    parser.add_argument('--telegram-retry-after', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=600, help="ожидание завершения рассылки воркерами, с")
+    parser.add_argument('--save-baseline', help="сохранить отчет в JSON")
+    parser.add_argument('--baseline', help="сравнить отчет с сохраненным JSON")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="допустимое ухудшение метрики, доля")
+    parser.add_argument('--keep', action='store_true', help="не удалять созданные уведомления")
+    args = parser.parse_args()
+
+    smtp = SMTPSink(
+        FaultInjector(args.smtp_latency, args.smtp_error_rate, seed=args.seed),
+        host=args.stub_host, port=args.smtp_port,
+    )
+    telegram = TelegramStub(
+        FaultInjector(args.telegram_latency, args.telegram_error_rate, args.telegram_429_rate, seed=args.seed),
+        host=args.stub_host, port=args.telegram_port, retry_after=args.telegram_retry_after,
+    )
+    smtp.start()
+    telegram.start()
+    print(f"EMAIL_HOST={args.stub_host} EMAIL_PORT={args.smtp_port} EMAIL_USE_TLS=False "
+          f"TELEGRAM_API_URL={telegram.url}\n")
+
+    counter = QueryCounter()
+    if args.mode == 'eager':
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        settings.EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+        settings.EMAIL_HOST, settings.EMAIL_PORT = args.stub_host, args.smtp_port
+        settings.EMAIL_USE_TLS = settings.EMAIL_USE_SSL = False
+        settings.EMAIL_HOST_USER = settings.EMAIL_HOST_PASSWORD = ''
+        settings.TELEGRAM_API_URL = telegram.url
+        # Без Redis предохранитель и лимит конкурентности не откладывают задачи:
+        # в режиме eager отложенная задача выполнялась бы повторно сразу.
+        settings.REDIS_URL = None
+        current_app.conf.task_always_eager = True
+        counter.install()
+        post = in_process_post()
+    else:
+        post = http_post(args.api_url)
+
+    payloads = [make_payload(index, args.emails, args.telegrams) for index in range(args.notifications)]
+    ids: List[int] = []
+    try:
+        api = run_api_load(post, payloads, args.concurrency)
+        ids = api.pop('ids')
+        api_queries = counter.take()
+
+        if args.mode == 'eager':
+            drain_outbox()
+        elif not wait_until_completed(ids, args.timeout):
+            print("Рассылка не завершилась за отведенное время, отчет неполный", file=sys.stderr)
+        delivery_queries = counter.take()
+    finally:
+        smtp.stop()
+        telegram.stop()
+        if ids and not args.keep:
+            Notification.objects.filter(id__in=ids).delete()
+
+    created = len(ids) or 1
+    report: Dict[str, Any] = {
+        'mode': args.mode,
+        'notifications': args.notifications,
+        'recipients_per_notification': {'email': args.emails, 'telegram': args.telegrams},
+        'api': api,
+        'channels': {
+            name: {
+                'messages': len(stub.recorder.accepted),
+                'rejected': stub.recorder.rejected,
+                'rate_limited': stub.recorder.rate_limited,
+                'messages_per_second': stub.recorder.messages_per_second(),
+            }
+            for name, stub in (('email', smtp), ('telegram', telegram))
+        },
+    }
+    if args.mode == 'eager':
+        report['db_queries_per_notification'] = {'api': api_queries / created, 'delivery': delivery_queries / created}
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(report, json.load(file), args.tolerance)
+        if regressions:
+            print("\nУхудшения относительно базовой линии:", *regressions, sep='\n  ')
+            sys.exit(1)
+        print("\nУхудшений относительно базовой линии нет")
+
+
+if __name__ == '__main__':
+    main()
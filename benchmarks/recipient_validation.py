@@ -0,0 +1,113 @@
+"""
+Микробенчмарк валидации списка получателей.
+
+Сравнивает прежний путь сериализатора (StrictListField с дочерним CharField,
+validate_unique_recipients и повторная проверка в validate_recepient и create)
+с однопроходным classify_recipients.
+
+Запуск: python -m benchmarks.recipient_validation --recipients 10000
+"""
+import argparse
+import os
+import re
+import timeit
+from typing import Any, Dict, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from rest_framework import serializers  # noqa: E402
+from rest_framework.exceptions import ValidationError  # noqa: E402
+
+from notifications.validators import classify_recipients  # noqa: E402
+
+
+class LegacyStrictListField(serializers.ListField):
+    def to_internal_value(self, data: List[str]) -> List[str]:
+        if not isinstance(data, list):
+            raise ValidationError("Поле должно быть списком.")
+        for item in data:
+            if not isinstance(item, str):
+                raise ValidationError(f"Элемент списка '{item}' должен быть строкой.")
+            if not item:
+                raise ValidationError("Элемент списка не может быть пустым или None.")
+        return super().to_internal_value(data)
+
+
+def legacy_validate_unique_recipients(value: List[str]) -> List[str]:
+    if len(value) != len(set(value)):
+        raise ValidationError("Получатели должны быть уникальными.")
+    return value
+
+
+def legacy_validate_email(value: str) -> str:
+    email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+    if not re.match(email_regex, value):
+        raise ValidationError
+    return value
+
+
+def legacy_validate_telegram(value: str) -> str:
+    if not value.isdigit():
+        raise ValidationError
+    return value
+
+
+def legacy_validate_recepient(recepients: List[Any]) -> List[Dict[str, str]]:
+    valid_recipients = []
+    for recipient in recepients:
+        recipient_value = recipient if isinstance(recipient, str) else recipient.get("recipient", "")
+        if '@' in recipient_value:
+            legacy_validate_email(recipient_value)
+            recipient_type = "email"
+        else:
+            legacy_validate_telegram(recipient_value)
+            recipient_type = "telegram"
+        valid_recipients.append({"recipient": recipient_value, "recipient_type": recipient_type})
+    return valid_recipients
+
+
+def legacy(recipients: List[str]) -> List[Dict[str, str]]:
+    """Прежний путь: поле списка, проверка уникальности и двойная классификация."""
+    field = LegacyStrictListField(
+        child=serializers.CharField(max_length=150),
+        allow_empty=False,
+        validators=[legacy_validate_unique_recipients]
+    )
+    value = field.run_validation(recipients)
+    validated = legacy_validate_recepient(value)
+    return legacy_validate_recepient(validated)
+
+
+def single_pass(recipients: List[str]) -> List[Dict[str, str]]:
+    """Новый путь: один проход classify_recipients."""
+    valid_recipients, _ = classify_recipients(recipients)
+    return valid_recipients
+
+
+def make_recipients(count: int) -> List[str]:
+    return [f"user{i}@example.com" if i % 2 else str(100000000 + i) for i in range(count)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--recipients', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    recipients = make_recipients(args.recipients)
+    assert legacy(recipients) == single_pass(recipients)
+
+    results = {}
+    for name, func in (('legacy', legacy), ('single_pass', single_pass)):
+        timer = timeit.Timer(lambda: func(recipients))
+        results[name] = min(timer.repeat(repeat=args.repeat, number=1))
+        print(f"{name:>12}: {results[name] * 1000:8.2f} ms на {args.recipients} получателей")
+
+    print(f"{'speedup':>12}: {results['legacy'] / results['single_pass']:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Бенчмарк запросов к логу отправки и получателям на большой таблице.
+
+Заполняет таблицы синтетическими данными (generate_series), выполняет ANALYZE
+и печатает планы EXPLAIN (ANALYZE, BUFFERS) и время типовых запросов:
+страницы админки лога, фильтра по статусу, счетчиков по уведомлению и выборки
+получателей канала при рассылке. Все изменения откатываются в конце.
+
+Запуск: python -m benchmarks.send_log_queries --rows 2000000
+"""
+import argparse
+import os
+import time
+from typing import Callable, List, Tuple
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection, transaction  # noqa: E402
+from django.db.models import Count, QuerySet  # noqa: E402
+
+from notifications.models import NotificationSendLog, Recipient  # noqa: E402
+
+SEED_SQL = """
+INSERT INTO notifications_notification
+    (message, delay, priority, status, pending_channels, created_at, scheduled_at)
+SELECT 'Benchmark ' || n, 0, 1, 'completed', 0, now(), now()
+FROM generate_series(1, %(notifications)s) AS n;
+
+INSERT INTO notifications_recipient (notification_id, recepient, recepient_type)
+SELECT first_id + n %% %(notifications)s,
+       CASE WHEN n %% 2 = 0 THEN 'user' || n || '@example.com' ELSE (100000000 + n)::text END,
+       CASE WHEN n %% 2 = 0 THEN 'email' ELSE 'telegram' END
+FROM generate_series(1, %(rows)s) AS n,
+     (SELECT max(id) - %(notifications)s + 1 AS first_id FROM notifications_notification) AS f;
+
+INSERT INTO notifications_notificationsendlog
+    (notification_id, recipient, recipient_type, status, error_message, timestamp)
+SELECT first_id + n %% %(notifications)s,
+       'user' || n || '@example.com',
+       1 + n %% 2,
+       CASE WHEN n %% 50 = 0 THEN 2 ELSE 1 END,
+       NULL,
+       now() - (n || ' seconds')::interval
+FROM generate_series(1, %(rows)s) AS n,
+     (SELECT max(id) - %(notifications)s + 1 AS first_id FROM notifications_notification) AS f;
+
+ANALYZE notifications_notification;
+ANALYZE notifications_recipient;
+ANALYZE notifications_notificationsendlog;
+"""
+
+
+def queries(notification_id: int) -> List[Tuple[str, Callable[[], QuerySet]]]:
+    return [
+        ("Страница админки лога", lambda: NotificationSendLog.objects.order_by('-timestamp')[:20]),
+        (
+            "Фильтр админки по статусу",
+            lambda: NotificationSendLog.objects.filter(status=NotificationSendLog.ERROR).order_by('-timestamp')[:20]
+        ),
+        (
+            "Счетчики статусов уведомления",
+            lambda: NotificationSendLog.objects.filter(notification_id=notification_id)
+            .values('status').annotate(count=Count('id')).order_by()
+        ),
+        (
+            "Получатели канала при рассылке",
+            lambda: Recipient.objects.filter(notification_id=notification_id, recepient_type=Recipient.EMAIL)
+            .values_list('recepient', flat=True)
+        ),
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2_000_000)
+    parser.add_argument('--notifications', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with transaction.atomic():
+        started_at = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(SEED_SQL, {'rows': args.rows, 'notifications': args.notifications})
+        print(f"Заполнение {args.rows} строк: {time.perf_counter() - started_at:.1f} с\n")
+
+        notification_id = NotificationSendLog.objects.order_by('-id').values_list('notification_id', flat=True)[0]
+
+        for title, make_queryset in queries(notification_id):
+            print(f"=== {title}")
+            print(make_queryset().explain(analyze=True, buffers=True))
+
+            timings = []
+            for _ in range(args.repeat):
+                started_at = time.perf_counter()
+                list(make_queryset())
+                timings.append(time.perf_counter() - started_at)
+            print(f"--- лучшее время: {min(timings) * 1000:.2f} мс\n")
+
+        transaction.set_rollback(True)
+
+
+if __name__ == '__main__':
+    main()
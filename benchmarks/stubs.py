@@ -0,0 +1,164 @@
+"""
+Локальные заменители провайдеров для бенчмарков: SMTP-приемник на aiosmtpd
+и HTTP-сервер, отвечающий как метод sendMessage Telegram Bot API.
+
+Оба добавляют задержку и с заданной вероятностью отвечают ошибкой
+(SMTP 451, Telegram 500) или превышением лимита (Telegram 429 с retry_after),
+а принятые сообщения записывают с отметкой времени.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, List, Optional
+
+from aiosmtpd.controller import Controller
+
+OK = 'ok'
+ERROR = 'error'
+RATE_LIMITED = 'rate_limited'
+
+
+class FaultInjector:
+    """Выбирает исход очередного запроса к провайдеру по заданным вероятностям."""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 seed: Optional[int] = None) -> None:
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def choose(self) -> str:
+        with self._lock:
+            value = self._random.random()
+        if value < self.error_rate:
+            return ERROR
+        if value < self.error_rate + self.rate_limit_rate:
+            return RATE_LIMITED
+        return OK
+
+
+class Recorder:
+    """Отметки времени принятых сообщений и счетчики отказов."""
+
+    def __init__(self) -> None:
+        self.accepted: List[float] = []
+        self.rejected = 0
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            if outcome == OK:
+                self.accepted.append(time.monotonic())
+            elif outcome == RATE_LIMITED:
+                self.rate_limited += 1
+            else:
+                self.rejected += 1
+
+    def messages_per_second(self) -> float:
+        """Пропускная способность между первым и последним принятым сообщением."""
+        with self._lock:
+            if len(self.accepted) < 2:
+                return 0.0
+            return (len(self.accepted) - 1) / (self.accepted[-1] - self.accepted[0])
+
+
+class _SMTPHandler:
+    def __init__(self, faults: FaultInjector, recorder: Recorder) -> None:
+        self.faults = faults
+        self.recorder = recorder
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        if self.faults.latency:
+            await asyncio.sleep(self.faults.latency)
+        outcome = self.faults.choose()
+        # SMTP не различает превышение лимита: оба отказа — временная ошибка 4xx.
+        if outcome != OK:
+            self.recorder.record(ERROR)
+            return '451 4.3.0 Temporary failure injected by benchmark'
+        for _ in envelope.rcpt_tos:
+            self.recorder.record(OK)
+        return '250 OK'
+
+
+class SMTPSink:
+    """SMTP-сервер, который принимает письма и никуда их не доставляет."""
+
+    def __init__(self, faults: FaultInjector, host: str = '127.0.0.1', port: int = 8025) -> None:
+        self.recorder = Recorder()
+        self.host = host
+        self.port = port
+        self._controller = Controller(_SMTPHandler(faults, self.recorder), hostname=host, port=port)
+
+    def start(self) -> None:
+        self._controller.start()
+
+    def stop(self) -> None:
+        self._controller.stop()
+
+
+class TelegramStub:
+    """HTTP-сервер с методом /bot<token>/sendMessage в формате Telegram Bot API."""
+
+    def __init__(self, faults: FaultInjector, host: str = '127.0.0.1', port: int = 8081,
+                 retry_after: float = 1.0) -> None:
+        self.recorder = Recorder()
+        self.host = host
+        self.port = port
+        self._server = ThreadingHTTPServer((host, port), self._make_handler(faults, self.recorder, retry_after))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @staticmethod
+    def _make_handler(faults: FaultInjector, recorder: Recorder, retry_after: float) -> type:
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                if not self.path.endswith('/sendMessage'):
+                    self._reply(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+                    return
+
+                if faults.latency:
+                    time.sleep(faults.latency)
+                outcome = faults.choose()
+                recorder.record(outcome)
+                if outcome == ERROR:
+                    self._reply(500, {"ok": False, "error_code": 500, "description": "Internal Server Error"})
+                elif outcome == RATE_LIMITED:
+                    self._reply(429, {
+                        "ok": False, "error_code": 429, "description": "Too Many Requests",
+                        "parameters": {"retry_after": retry_after},
+                    })
+                else:
+                    self._reply(200, {"ok": True, "result": {}})
+
+            def _reply(self, code: int, body: dict) -> None:
+                payload = json.dumps(body).encode()
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+        return Handler
@@ -13,4 +13,26 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from notifications.async_db import close_pool  # noqa: E402
+from notifications.redis_client import close_async_redis  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """
+    Приложение Django с обработкой lifespan: при остановке сервера (uvicorn)
+    закрываются пул соединений asyncpg и асинхронный клиент Redis.
+    """
+    if scope['type'] != 'lifespan':
+        return await django_application(scope, receive, send)
+
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await close_pool()
+            await close_async_redis()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'notifications',
     'rest_framework',
@@ -58,6 +59,11 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# Режим для PgBouncer с pool_mode=transaction: соединение с сервером меняется между транзакциями,
+# поэтому отключаются серверные курсоры вне транзакций (QuerySet.iterator) и кэш подготовленных
+# запросов asyncpg. Постоянные соединения в этом режиме держатся с PgBouncer, а не с Postgres.
+DB_TRANSACTION_POOLING = os.getenv('DB_TRANSACTION_POOLING', 'False') == 'True'
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -66,8 +72,15 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD'),
         'HOST': os.getenv('POSTGRES_HOST'),
         'PORT': os.getenv('POSTGRES_PORT'),
+        # Соединение переиспользуется DB_CONN_MAX_AGE секунд и проверяется перед повторным использованием.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_TRANSACTION_POOLING,
     }
 }
+# Пул соединений asyncpg асинхронного API создания уведомлений (отдельный на процесс ASGI-сервера).
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', 1))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', 20))
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -114,16 +127,169 @@ REST_FRAMEWORK = {
 
 CELERY_BROKER_URL = os.getenv('CELERY_BROKER_URL')
 CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND')
+
+# Redis для быстрых проверок (ключи идемпотентности, дедупликация); по умолчанию — брокер Celery.
+REDIS_URL = os.getenv('REDIS_URL') or (CELERY_BROKER_URL if (CELERY_BROKER_URL or '').startswith('redis') else None)
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 0.5))
+
+# Кэш Django (статус уведомлений, шаблоны, результаты проверки получателей) в том же Redis;
+# без Redis — в памяти процесса.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'KEY_PREFIX': 'notify:cache',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'socket_timeout': REDIS_SOCKET_TIMEOUT,
+            'socket_connect_timeout': REDIS_SOCKET_TIMEOUT,
+        },
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+    }
+}
+# Пока одно значение кэша пересчитывается, остальные запросы ждут его до CACHE_LOCK_TIMEOUT секунд.
+CACHE_LOCK_TIMEOUT = float(os.getenv('CACHE_LOCK_TIMEOUT', 2))
+# Сколько секунд помнить, что канал отклонил получателя (например, чат Telegram не найден).
+RECIPIENT_VERDICT_TTL = int(os.getenv('RECIPIENT_VERDICT_TTL', 86400))
+
 CELERY_TIMEZONE = 'Europe/Moscow'
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Процесс воркера переиспользует соединение с БД между задачами: Celery закрывает его
+# раз в CELERY_DB_REUSE_MAX задач, а раньше — обработчики task_prerun/task_postrun
+# по CONN_MAX_AGE или после ошибки соединения.
+CELERY_DB_REUSE_MAX = int(os.getenv('CELERY_DB_REUSE_MAX', 1000))
+
+# Порт HTTP-экспортера метрик Prometheus в главном процессе воркера Celery (0 — выключен).
+# Для сбора метрик всех процессов пула нужна переменная окружения PROMETHEUS_MULTIPROC_DIR.
+CELERY_METRICS_PORT = int(os.getenv('CELERY_METRICS_PORT', 0))
+
+# Очереди: default — запуск рассылок и служебные задачи, email/telegram — отправка по каналам,
+# email.bulk/telegram.bulk — массовые рассылки с низким приоритетом.
+# Воркеры для каждой очереди масштабируются независимо (celery worker -Q <очередь>).
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+BULK_QUEUE_SUFFIX = '.bulk'
+# Каналы доставки (notifications.channels.ChannelBackend). Получатель относится
+# к первому каналу, который принял его адрес.
+NOTIFICATION_CHANNEL_BACKENDS = [
+    'notifications.channels.EmailBackend',
+    'notifications.channels.TelegramBackend',
+]
+CELERY_TASK_ROUTES = {
+    'notifications.tasks.send_email_batch_task': {'queue': 'email'},
+    'notifications.tasks.send_email_to_recipient_task': {'queue': 'email'},
+    'notifications.tasks.send_telegram_batch_task': {'queue': 'telegram'},
+    'notifications.tasks.send_telegram_to_recipient_task': {'queue': 'telegram'},
+}
+
+# В Redis сообщения с меньшим значением приоритета забираются из очереди раньше.
+CELERY_BROKER_TRANSPORT_OPTIONS = {
+    'priority_steps': list(range(10)),
+    'queue_order_strategy': 'priority',
+}
+CELERY_TASK_DEFAULT_PRIORITY = 3
 
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
+# Отложенные уведомления хранятся в БД и запускаются периодической задачей планировщика.
+SCHEDULER_POLL_INTERVAL = float(os.getenv('SCHEDULER_POLL_INTERVAL', 5))
+SCHEDULER_BATCH_SIZE = int(os.getenv('SCHEDULER_BATCH_SIZE', 500))
+CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers:DatabaseScheduler'
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-due-notifications': {
+        'task': 'notifications.tasks.dispatch_due_notifications_task',
+        'schedule': SCHEDULER_POLL_INTERVAL,
+        'options': {'expires': SCHEDULER_POLL_INTERVAL},
+    },
+    'create-send-log-partitions': {
+        'task': 'notifications.tasks.create_send_log_partitions_task',
+        'schedule': 3600,
+    },
+}
+# Хранение данных: сколько дней хранить строки каждой таблицы (0 — бессрочно).
+# Команда archive_old_data выгружает старые строки в сжатый NDJSON в ARCHIVE_DIR и удаляет их,
+# для лога отправки — целыми месячными секциями. Секции лога создаются заранее на
+# SEND_LOG_PARTITIONS_AHEAD месяцев периодической задачей.
+DATA_RETENTION_DAYS = {
+    'send_log': int(os.getenv('SEND_LOG_RETENTION_DAYS', 90)),
+    'recipient': int(os.getenv('RECIPIENT_RETENTION_DAYS', 180)),
+    'notification': int(os.getenv('NOTIFICATION_RETENTION_DAYS', 365)),
+}
+ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', 5000))
+SEND_LOG_PARTITIONS_AHEAD = int(os.getenv('SEND_LOG_PARTITIONS_AHEAD', 3))
+# Списки админки считают строки по оценке статистики Postgres; если оценка меньше порога,
+# выполняется точный COUNT(*).
+ADMIN_EXACT_COUNT_THRESHOLD = int(os.getenv('ADMIN_EXACT_COUNT_THRESHOLD', 10000))
+# Уведомления передаются в Celery через transactional outbox процессом relay_outbox.
+OUTBOX_RELAY_BATCH_SIZE = int(os.getenv('OUTBOX_RELAY_BATCH_SIZE', 500))
+OUTBOX_RELAY_POLL_INTERVAL = float(os.getenv('OUTBOX_RELAY_POLL_INTERVAL', 0.2))
+# Повторы отправки по классам ошибок (notifications.delivery): задержка растет от base_delay
+# вдвое с каждой попыткой. max_delay должен быть меньше visibility_timeout брокера Redis (1 час).
+DELIVERY_RETRY_POLICIES = {
+    'transient': {'base_delay': 30, 'max_delay': 900, 'max_attempts': 5},
+    'rate_limited': {'base_delay': 60, 'max_delay': 900, 'max_attempts': 8},
+}
+# Предохранитель и адаптивный (AIMD) лимит одновременно отправляемых пачек по каналам,
+# общие для всех воркеров через Redis (notifications.circuit).
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_BREAKER_FAILURE_THRESHOLD', 5))
+CIRCUIT_BREAKER_FAILURE_WINDOW = int(os.getenv('CIRCUIT_BREAKER_FAILURE_WINDOW', 60))
+CIRCUIT_BREAKER_OPEN_SECONDS = int(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', 30))
+CHANNEL_CONCURRENCY_DEFAULT = {'initial': 4, 'min': 1, 'max': 16}
+CHANNEL_CONCURRENCY = {
+    'email': {'initial': 4, 'min': 1, 'max': int(os.getenv('EMAIL_MAX_CONCURRENCY', 16))},
+    'telegram': {'initial': 4, 'min': 1, 'max': int(os.getenv('TELEGRAM_MAX_CONCURRENCY', 16))},
+}
+CHANNEL_CONCURRENCY_DECREASE_FACTOR = 0.5
+CHANNEL_CONCURRENCY_LEASE = int(os.getenv('CHANNEL_CONCURRENCY_LEASE', 300))
+CHANNEL_CONCURRENCY_RETRY_DELAY = float(os.getenv('CHANNEL_CONCURRENCY_RETRY_DELAY', 1))
+CHANNEL_DEFER_JITTER = float(os.getenv('CHANNEL_DEFER_JITTER', 2))
+NOTIFICATION_BROKER_PRIORITIES = {
+    0: 6,  # Низкий
+    1: 3,  # Обычный
+    2: 0,  # Высокий
+}
+
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
-EMAIL_USE_TLS = True
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_USE_SSL = False
+EMAIL_TIMEOUT = float(os.getenv('EMAIL_TIMEOUT', 10))
+EMAIL_BATCH_SIZE = int(os.getenv('EMAIL_BATCH_SIZE', 100))
+
+TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
+TELEGRAM_API_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+TELEGRAM_BATCH_SIZE = int(os.getenv('TELEGRAM_BATCH_SIZE', 100))
+TELEGRAM_TIMEOUT = float(os.getenv('TELEGRAM_TIMEOUT', 10))
+TELEGRAM_MAX_CONNECTIONS = int(os.getenv('TELEGRAM_MAX_CONNECTIONS', 20))
+# Telegram ограничивает бота 30 сообщениями в секунду и одним сообщением в секунду в чат.
+# С Redis лимиты общие для всех процессов, без него — на процесс воркера.
+TELEGRAM_RATE_LIMIT = float(os.getenv('TELEGRAM_RATE_LIMIT', 30))
+TELEGRAM_CHAT_INTERVAL = float(os.getenv('TELEGRAM_CHAT_INTERVAL', 1))
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', 3))
+
+# Буфер лога отправки процесса воркера сбрасывается по размеру и не реже раза в SEND_LOG_FLUSH_INTERVAL секунд
+# фоновым потоком; при аварийном завершении процесса (SIGKILL) теряются записи только за этот интервал.
+SEND_LOG_BUFFER_SIZE = int(os.getenv('SEND_LOG_BUFFER_SIZE', 500))
+SEND_LOG_FLUSH_INTERVAL = float(os.getenv('SEND_LOG_FLUSH_INTERVAL', 5))
+
+# Количество скомпилированных шаблонов уведомлений в LRU процесса воркера.
+NOTIFICATION_TEMPLATE_CACHE_SIZE = int(os.getenv('NOTIFICATION_TEMPLATE_CACHE_SIZE', 256))
+
+NOTIFY_BULK_BATCH_SIZE = int(os.getenv('NOTIFY_BULK_BATCH_SIZE', 500))
+# Размер страницы списка уведомлений GET /api/notify/ (параметр page_size — до 500).
+NOTIFY_LIST_PAGE_SIZE = int(os.getenv('NOTIFY_LIST_PAGE_SIZE', 50))
+NOTIFY_BULK_RECIPIENTS_BATCH_SIZE = int(os.getenv('NOTIFY_BULK_RECIPIENTS_BATCH_SIZE', 5000))
+# Пачка строк, которая проверяется и копируется COPY при загрузке аудитории.
+AUDIENCE_IMPORT_BATCH_SIZE = int(os.getenv('AUDIENCE_IMPORT_BATCH_SIZE', 10000))
+
+# Ключ Idempotency-Key хранится в БД бессрочно, в Redis — IDEMPOTENCY_KEY_TTL секунд.
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', 86400))
+# Одинаковые сообщения одному получателю в течение окна (в секундах) отправляются один раз; 0 — отключено.
+NOTIFY_DEDUP_WINDOW = int(os.getenv('NOTIFY_DEDUP_WINDOW', 0))
 
 DELAY_MAPPING = {
     0: 0,
@@ -134,4 +300,3 @@ DELAY_MAPPING = {
 CORS_ALLOWED_ORIGINS = os.getenv('CORS_ALLOWED_ORIGINS', '').split(',')
 CSRF_TRUSTED_ORIGINS = os.getenv('CSRF_TRUSTED_ORIGINS', '').split(',')
 
-
@@ -3,6 +3,8 @@ from drf_yasg import openapi
 from drf_yasg.views import get_schema_view
 from rest_framework import permissions
 from django.contrib import admin
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
+from notifications.metrics import metrics_view
 
 schema_view = get_schema_view(
     openapi.Info(
@@ -20,7 +22,11 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('notifications.urls')),
+    path('metrics', metrics_view, name='metrics'),
 
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
     path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
 ]
+
+# Статика админки при DEBUG: ASGI-сервер, в отличие от runserver, сам ее не отдает.
+urlpatterns += staticfiles_urlpatterns()
@@ -1,19 +1,74 @@
 from django.contrib import admin
 from django.utils.timezone import localtime
 from typing import Any
-from .models import Notification, Recipient, NotificationSendLog
+from .admin_pagination import KeysetPaginationMixin, NumericSearchMixin
+from .audiences import refresh_member_counts
+from .models import Audience, AudienceMember, Notification, Recipient, NotificationSendLog, Template
+
+
+@admin.register(Template)
+class TemplateAdmin(admin.ModelAdmin):
+    """
+    Админ-класс для модели Template.
+    Версия шаблона увеличивается при изменении текста.
+    """
+    list_display = ['id', 'name', 'version', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['version', 'updated_at']
+    ordering = ['name']
+    list_per_page = 20
+
+
+@admin.register(Audience)
+class AudienceAdmin(admin.ModelAdmin):
+    """
+    Админ-класс для модели Audience.
+    Участники загружаются командой import_audience, количество по каналам пересчитывается при загрузке.
+    """
+    list_display = ['id', 'name', 'member_counts', 'updated_at']
+    search_fields = ['name']
+    readonly_fields = ['member_counts', 'created_at', 'updated_at']
+    ordering = ['name']
+    list_per_page = 20
+
+
+@admin.register(AudienceMember)
+class AudienceMemberAdmin(KeysetPaginationMixin, admin.ModelAdmin):
+    """
+    Админ-класс для модели AudienceMember.
+    После изменения участников пересчитывается количество участников аудитории по каналам.
+    """
+    list_display = ['id', 'recipient', 'channel', 'audience']
+    list_select_related = ['audience']
+    list_filter = ['channel', 'audience']
+    raw_id_fields = ['audience']
+    list_per_page = 20
+
+    def save_model(self, request: Any, obj: AudienceMember, form: Any, change: bool) -> None:
+        super().save_model(request, obj, form, change)
+        refresh_member_counts(obj.audience)
+
+    def delete_model(self, request: Any, obj: AudienceMember) -> None:
+        super().delete_model(request, obj)
+        refresh_member_counts(obj.audience)
+
+    def delete_queryset(self, request: Any, queryset: Any) -> None:
+        audiences = list(Audience.objects.filter(id__in=queryset.values('audience_id')))
+        super().delete_queryset(request, queryset)
+        for audience in audiences:
+            refresh_member_counts(audience)
 
 
 @admin.register(Notification)
-class NotificationAdmin(admin.ModelAdmin):
+class NotificationAdmin(NumericSearchMixin, KeysetPaginationMixin, admin.ModelAdmin):
     """
     Админ-класс для модели Notification.
-    Отображает список уведомлений, позволяет фильтровать и искать.
+    Отображает список уведомлений, позволяет фильтровать и искать:
+    число ищется по id, текст — по триграммному индексу сообщения.
     """
     list_display = ['id', 'message', 'delay', 'created_at_local']
-    search_fields = ['id', 'message']
+    search_fields = ['message']
     list_filter = ['delay', 'created_at']
-    ordering = ['-created_at']
     list_per_page = 20
 
     def created_at_local(self, obj: Notification) -> str:
@@ -24,41 +79,46 @@ setattr(NotificationAdmin.created_at_local, 'short_description', "Дата со
 
 
 @admin.register(Recipient)
-class RecipientAdmin(admin.ModelAdmin):
+class RecipientAdmin(NumericSearchMixin, KeysetPaginationMixin, admin.ModelAdmin):
     """
     Админ-класс для модели Recipient.
-    Отображает информацию о получателях уведомлений.
+    Отображает информацию о получателях уведомлений. Число в поиске — id уведомления,
+    иначе поиск по началу адреса.
     """
-    list_display = ['id', 'recepient', 'recepient_type', 'notification_display']
-    search_fields = ['recepient', 'recepient_type', 'notification__id']
-    list_filter = ['recepient_type']
-    ordering = ['notification']
+    list_display = ['id', 'recepient', 'recepient_type', 'delivery_status', 'attempts', 'notification_display']
+    list_select_related = ['notification']
+    search_fields = ['^recepient']
+    search_id_field = 'notification_id'
+    list_filter = ['recepient_type', 'delivery_status']
     list_per_page = 20
 
     def notification_display(self, obj: Recipient) -> str:
-        return f"Уведомление #{obj.notification.id} от {localtime(obj.notification.created_at).strftime('%d.%m.%Y %H:%M:%S')}"
+        return f"Уведомление #{obj.notification_id} от {localtime(obj.notification.created_at).strftime('%d.%m.%Y %H:%M:%S')}"
 
 
 setattr(RecipientAdmin.notification_display, 'short_description', "Уведомление")
 
 
 @admin.register(NotificationSendLog)
-class NotificationSendLogAdmin(admin.ModelAdmin):
+class NotificationSendLogAdmin(NumericSearchMixin, KeysetPaginationMixin, admin.ModelAdmin):
     """
     Админ-класс для модели NotificationSendLog.
-    Отображает информацию о логах отправки уведомлений.
+    Отображает информацию о логах отправки уведомлений. Число в поиске — id уведомления,
+    иначе поиск по началу адреса.
     """
     list_display = ['id', 'recipient', 'status', 'timestamp_local', 'notification_display', 'error_message']
-    search_fields = ['recipient', 'status', 'notification__id']
+    list_select_related = ['notification']
+    search_fields = ['^recipient']
+    search_id_field = 'notification_id'
     list_filter = ['status', 'timestamp']
-    ordering = ['-timestamp']
+    keyset_fields = ('timestamp', 'id')
     list_per_page = 20
 
     def timestamp_local(self, obj: NotificationSendLog) -> str:
         return localtime(obj.timestamp).strftime("%d.%m.%Y %H:%M:%S")
 
     def notification_display(self, obj: NotificationSendLog) -> str:
-        return f"Уведомление #{obj.notification.id} от {localtime(obj.notification.created_at).strftime('%d.%m.%Y %H:%M:%S')}"
+        return f"Уведомление #{obj.notification_id} от {localtime(obj.notification.created_at).strftime('%d.%m.%Y %H:%M:%S')}"
 
 
 setattr(NotificationSendLogAdmin.timestamp_local, 'short_description', "Дата отправки")
@@ -0,0 +1,150 @@
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+from django.conf import settings
+from django.contrib.admin.options import IncorrectLookupParameters, ModelAdmin
+from django.contrib.admin.views.main import PAGE_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Model, Q, QuerySet
+from django.http import HttpRequest
+from django.utils.functional import cached_property
+
+CURSOR_VAR = 'cursor'
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    Оценка числа строк запроса по статистике Postgres без COUNT(*):
+    pg_class.reltuples таблицы и ее секций для запроса без фильтров
+    или число строк плана EXPLAIN для отфильтрованного. None, если оценки нет.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    if not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            # reltuples равен -1, пока таблица ни разу не анализировалась.
+            cursor.execute(
+                "SELECT sum(reltuples) FILTER (WHERE reltuples > 0) FROM pg_class "
+                "WHERE oid = %s::regclass OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [table, table]
+            )
+            estimate = cursor.fetchone()[0]
+        return int(estimate) if estimate else None
+
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор для больших таблиц: вместо точного COUNT(*) использует оценку Postgres.
+    Результаты меньше ADMIN_EXACT_COUNT_THRESHOLD строк считаются точно.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < settings.ADMIN_EXACT_COUNT_THRESHOLD:
+            return super().count
+        return estimate
+
+
+def keyset_filter(fields: Sequence[str], values: Sequence[Any]) -> Q:
+    """Условие «строго после» values при сортировке по fields по убыванию."""
+    condition = Q()
+    for index, field in enumerate(fields):
+        equal = {name: value for name, value in zip(fields[:index], values[:index])}
+        condition |= Q(**equal, **{f"{field}__lt": values[index]})
+    return condition
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Список админки с навигацией по ключу: следующая страница начинается после
+    последней строки текущей (параметр cursor), а не через OFFSET.
+    """
+    result_list: Sequence[Model]
+
+    def __init__(self, request: HttpRequest, *args: Any, **kwargs: Any) -> None:
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.next_cursor: Optional[str] = None
+        super().__init__(request, *args, **kwargs)
+
+    @property
+    def keyset_fields(self) -> Tuple[str, ...]:
+        return self.model_admin.keyset_fields
+
+    def get_filters_params(self, params: Optional[dict] = None) -> dict:
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request: HttpRequest, *args: Any, **kwargs: Any) -> QuerySet:
+        queryset = super().get_queryset(request, *args, **kwargs)
+        if self.cursor:
+            queryset = queryset.filter(keyset_filter(self.keyset_fields, self._decode_cursor(self.cursor)))
+        return queryset
+
+    def get_results(self, request: HttpRequest) -> None:
+        super().get_results(request)
+        self.result_list = list(self.result_list)
+        if len(self.result_list) == self.list_per_page and not self.show_all:
+            self.next_cursor = self._encode_cursor(self.result_list[-1])
+
+    def next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor}, [PAGE_VAR])
+
+    def first_page_url(self) -> str:
+        return self.get_query_string(remove=[CURSOR_VAR, PAGE_VAR])
+
+    def _encode_cursor(self, obj: Model) -> str:
+        return json.dumps([getattr(obj, self.opts.get_field(field).attname) for field in self.keyset_fields],
+                          cls=DjangoJSONEncoder)
+
+    def _decode_cursor(self, cursor: str) -> List[Any]:
+        try:
+            values = json.loads(cursor)
+            if len(values) != len(self.keyset_fields):
+                raise ValueError
+            return [self.opts.get_field(field).to_python(value) for field, value in zip(self.keyset_fields, values)]
+        except (ValueError, TypeError, ValidationError):
+            raise IncorrectLookupParameters
+
+
+class KeysetPaginationMixin:
+    """
+    Настройки админки для больших таблиц: оценка количества строк вместо COUNT(*)
+    и навигация по ключу keyset_fields (по убыванию). Сортировка по колонкам отключена,
+    так как навигация опирается на фиксированный порядок.
+    """
+    keyset_fields: Tuple[str, ...] = ('id',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    change_list_template = 'admin/notifications/keyset_change_list.html'
+
+    def get_changelist(self, request: HttpRequest, **kwargs: Any) -> type:
+        return KeysetChangeList
+
+    def get_ordering(self, request: HttpRequest) -> List[str]:
+        return [f"-{field}" for field in self.keyset_fields]
+
+    def get_sortable_by(self, request: HttpRequest) -> Tuple[str, ...]:
+        return ()
+
+
+class NumericSearchMixin(ModelAdmin):
+    """
+    Поиск по индексам: числовой запрос ищется точным совпадением по search_id_field,
+    остальные — по search_fields (поля с префиксным или триграммным индексом).
+    """
+    search_id_field = 'id'
+
+    def get_search_results(self, request: HttpRequest, queryset: QuerySet, search_term: str) -> Tuple[QuerySet, bool]:
+        if search_term.strip().isdigit():
+            return queryset.filter(**{self.search_id_field: int(search_term)}), False
+        return super().get_search_results(request, queryset, search_term)
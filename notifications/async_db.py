@@ -0,0 +1,124 @@
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Sequence, Type
+from weakref import WeakKeyDictionary
+import asyncpg
+from django.conf import settings
+from django.db import connection, models
+
+# Асинхронный доступ к Postgres для API: пул соединений asyncpg на цикл событий процесса.
+# SQL вставки строится по полям моделей Django, поэтому значения по умолчанию
+# и auto_now_add совпадают с сохранением через ORM.
+
+_pools: 'WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Task]' = WeakKeyDictionary()
+
+
+def _connect_kwargs() -> Dict[str, Any]:
+    database = settings.DATABASES['default']
+    return {
+        'database': database['NAME'],
+        'user': database['USER'],
+        'password': database['PASSWORD'] or None,
+        'host': database['HOST'] or None,
+        'port': int(database['PORT']) if database['PORT'] else None,
+    }
+
+
+async def _create_pool() -> asyncpg.Pool:
+    return await asyncpg.create_pool(
+        min_size=settings.ASYNC_DB_POOL_MIN_SIZE,
+        max_size=settings.ASYNC_DB_POOL_MAX_SIZE,
+        # PgBouncer в режиме транзакций не сохраняет подготовленные запросы между транзакциями.
+        statement_cache_size=0 if settings.DB_TRANSACTION_POOLING else 100,
+        **_connect_kwargs()
+    )
+
+
+async def get_pool() -> asyncpg.Pool:
+    """
+    Возвращает общий пул соединений для текущего цикла событий, создавая его при первом вызове.
+    Параллельные первые запросы ждут создания одного и того же пула.
+    """
+    loop = asyncio.get_running_loop()
+    task = _pools.get(loop)
+    if task is None:
+        task = _pools[loop] = loop.create_task(_create_pool())
+    try:
+        return await asyncio.shield(task)
+    except Exception:
+        _pools.pop(loop, None)
+        raise
+
+
+async def close_pool() -> None:
+    """Закрывает пул соединений текущего цикла событий."""
+    task = _pools.pop(asyncio.get_running_loop(), None)
+    if task is not None:
+        await (await task).close()
+
+
+def _field_value(obj: models.Model, field: models.Field) -> Any:
+    value = field.pre_save(obj, add=True)
+    if isinstance(field, models.JSONField):
+        # asyncpg принимает jsonb строкой.
+        return None if value is None else json.dumps(value, cls=field.encoder)
+    return field.get_db_prep_save(value, connection)
+
+
+def _insert_fields(model: Type[models.Model]) -> List[models.Field]:
+    return [field for field in model._meta.concrete_fields if not field.primary_key]
+
+
+async def insert_object(conn: asyncpg.Connection, obj: models.Model) -> models.Model:
+    """Вставляет несохраненный объект модели и записывает в него первичный ключ."""
+    fields = _insert_fields(type(obj))
+    pk = obj._meta.pk
+    columns = ', '.join(f'"{field.column}"' for field in fields)
+    placeholders = ', '.join(f'${index}' for index in range(1, len(fields) + 1))
+    obj.pk = await conn.fetchval(
+        f'INSERT INTO "{obj._meta.db_table}" ({columns}) VALUES ({placeholders}) RETURNING "{pk.column}"',
+        *[_field_value(obj, field) for field in fields]
+    )
+    obj._state.adding = False
+    return obj
+
+
+async def copy_objects(conn: asyncpg.Connection, objs: Sequence[models.Model]) -> None:
+    """Вставляет объекты одной модели одним COPY без возврата первичных ключей."""
+    if not objs:
+        return
+    fields = _insert_fields(type(objs[0]))
+    await conn.copy_records_to_table(
+        objs[0]._meta.db_table,
+        columns=[field.column for field in fields],
+        records=[tuple(_field_value(obj, field) for field in fields) for obj in objs]
+    )
+
+
+async def fetch_one(query: str, *args: Any) -> Optional[asyncpg.Record]:
+    """Выполняет запрос на соединении из пула и возвращает первую строку."""
+    pool = await get_pool()
+    return await pool.fetchrow(query, *args)
+
+
+async def fetch_object(model: Type[models.Model], pk: Any, fields: Sequence[str]) -> Optional[models.Model]:
+    """Объект модели по первичному ключу с полями fields или None, если его нет."""
+    columns = [model._meta.get_field(name) for name in fields]
+    select = ', '.join(f'"{field.column}"' for field in columns)
+    row = await fetch_one(
+        f'SELECT {select} FROM "{model._meta.db_table}" WHERE "{model._meta.pk.column}" = $1', pk
+    )
+    if row is None:
+        return None
+    # jsonb asyncpg возвращает строкой, ее разбирает поле модели.
+    return model(**{
+        field.attname: field.from_db_value(row[field.column], None, connection)
+        if isinstance(field, models.JSONField) else row[field.column]
+        for field in columns
+    })
+
+
+async def fetch_all(query: str, *args: Any) -> List[asyncpg.Record]:
+    """Выполняет запрос на соединении из пула и возвращает все строки."""
+    pool = await get_pool()
+    return await pool.fetch(query, *args)
@@ -0,0 +1,166 @@
+import json
+from typing import Any, Dict, List, Optional, Type
+import asyncpg
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.db import models
+from django.http import HttpRequest, HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.renderers import JSONRenderer
+from notifications.async_db import copy_objects, fetch_all, fetch_object, fetch_one, get_pool, insert_object
+from notifications.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, acache_response, aget_cached_response
+from notifications.metrics import API_DB_INSERT_SECONDS, API_VALIDATION_SECONDS
+from notifications.models import Audience, Notification, OutboxMessage, Recipient, Template
+from notifications.serializers import AsyncCreateNotificationSerializer, build_notification
+from notifications.stats import build_channel_stats
+from notifications.views import NotificationViewSet
+
+# Синхронный create из DRF: под WSGI (runserver, тестовый клиент) нет постоянного цикла событий
+# для пула соединений, поэтому запрос обрабатывается прежним путем.
+sync_create_view = NotificationViewSet.as_view({'post': 'create'})
+# Список уведомлений на том же адресе читается синхронным ViewSet.
+list_view = NotificationViewSet.as_view({'get': 'list'})
+
+
+def json_response(data: Any, status_code: int, headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+    """Ответ в том же формате, что JSONRenderer DRF."""
+    return HttpResponse(JSONRenderer().render(data), status=status_code, content_type='application/json', headers=headers)
+
+
+def notification_data(notification: Notification, recipients: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Тело ответа на создание уведомления, как у NotificationViewSet."""
+    return {
+        'id': notification.id,
+        'message': notification.message,
+        'template': notification.template_id,
+        'audience': notification.audience_id,
+        'delay': notification.delay,
+        'priority': notification.priority,
+        'created_at': notification.created_at,
+        'scheduled_at': notification.scheduled_at,
+        'recipients': recipients
+    }
+
+
+async def save_notification(validated_data: Dict[str, Any]) -> Notification:
+    """
+    Асинхронный вариант CreateNotificationSerializer.create: уведомление, получатели и счетчики
+    каналов (COPY) и запись outbox сохраняются в одной транзакции на соединении из пула.
+    """
+    notification, recipients = build_notification(validated_data)
+    pool = await get_pool()
+    async with pool.acquire() as conn, conn.transaction():
+        await insert_object(conn, notification)
+        for recipient in recipients:
+            recipient.notification_id = notification.id
+        await copy_objects(conn, recipients)
+        await copy_objects(conn, build_channel_stats(notification, recipients))
+        if notification.status == Notification.QUEUED:
+            await insert_object(conn, OutboxMessage(notification_id=notification.id, priority=notification.priority))
+    return notification
+
+
+class AsyncNotificationCreateView(View):
+    """
+    Асинхронное создание уведомления для ASGI-сервера (uvicorn).
+    Контракт совпадает с NotificationViewSet.create: тело запроса, ответы и ошибки,
+    заголовок Idempotency-Key. Запрос не занимает поток: запись идет через пул asyncpg,
+    ответы по ключу идемпотентности — через асинхронный клиент Redis.
+    """
+    http_method_names = ['get', 'post']
+
+    @classmethod
+    def as_view(cls, **initkwargs: Any) -> Any:
+        view = super().as_view(**initkwargs)
+        # Как и представления DRF, API не использует CSRF-токены.
+        view.csrf_exempt = True
+        return view
+
+    async def get(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        return await sync_to_async(list_view)(request, *args, **kwargs)
+
+    async def post(self, request: HttpRequest, *args: Any, **kwargs: Any) -> HttpResponse:
+        if not isinstance(request, ASGIRequest):
+            return await sync_to_async(sync_create_view)(request, *args, **kwargs)
+
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None:
+            if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return json_response(
+                    {'Idempotency-Key': f"Ключ должен быть непустой строкой длиной до {IDEMPOTENCY_KEY_MAX_LENGTH} символов."},
+                    status.HTTP_400_BAD_REQUEST
+                )
+            replay = await self._replay(idempotency_key)
+            if replay is not None:
+                return replay
+
+        if request.body and request.content_type != 'application/json':
+            error = UnsupportedMediaType(request.content_type)
+            return json_response({'detail': error.detail}, error.status_code)
+        try:
+            data = json.loads(request.body) if request.body else {}
+        except ValueError as exc:
+            error = ParseError(f"JSON parse error - {exc}")
+            return json_response({'detail': error.detail}, error.status_code)
+
+        serializer = AsyncCreateNotificationSerializer(data=data, context={
+            'templates': await self._prefetch(data, 'template', Template, ['id', 'body', 'version']),
+            'audiences': await self._prefetch(data, 'audience', Audience, ['id', 'name', 'member_counts']),
+        })
+        with API_VALIDATION_SECONDS.labels('create').time():
+            is_valid = serializer.is_valid()
+        if not is_valid:
+            return json_response(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with API_DB_INSERT_SECONDS.labels('create').time():
+                notification = await save_notification({**serializer.validated_data, 'idempotency_key': idempotency_key})
+        except asyncpg.UniqueViolationError:
+            # Параллельный запрос с тем же ключом успел создать уведомление первым.
+            replay = await self._replay(idempotency_key) if idempotency_key is not None else None
+            if replay is None:
+                raise
+            return replay
+
+        data = notification_data(notification, [
+            {'recepient': recipient['recipient'], 'recepient_type': recipient['recipient_type']}
+            for recipient in serializer.validated_data.get('recepient', [])
+        ])
+        if idempotency_key is not None:
+            await acache_response(idempotency_key, data)
+        return json_response(data, status.HTTP_201_CREATED)
+
+    @staticmethod
+    async def _prefetch(data: Any, name: str, model: Type[models.Model], fields: List[str]) -> Dict[int, Any]:
+        """Связанный объект из поля name запроса, загруженный до валидации, по id; пустой словарь, если его нет."""
+        value = data.get(name) if isinstance(data, dict) else None
+        try:
+            pk = model._meta.pk.to_python(value) if value is not None and not isinstance(value, bool) else None
+        except (TypeError, ValueError, ValidationError):
+            return {}
+        if pk is None:
+            return {}
+        obj = await fetch_object(model, pk, fields)
+        return {pk: obj} if obj is not None else {}
+
+    async def _replay(self, idempotency_key: str) -> Optional[HttpResponse]:
+        """Исходный ответ на запрос с этим ключом: из Redis или собранный по уведомлению из БД."""
+        data = await aget_cached_response(idempotency_key)
+        if data is None:
+            row = await fetch_one(
+                f'SELECT id, message, template_id, audience_id, delay, priority, created_at, scheduled_at '
+                f'FROM "{Notification._meta.db_table}" WHERE idempotency_key = $1',
+                idempotency_key
+            )
+            if row is None:
+                return None
+            recipients = await fetch_all(
+                f'SELECT recepient, recepient_type FROM "{Recipient._meta.db_table}" WHERE notification_id = $1',
+                row['id']
+            )
+            data = notification_data(Notification(**row), [dict(recipient) for recipient in recipients])
+            await acache_response(idempotency_key, data)
+        return json_response(data, status.HTTP_201_CREATED, headers={'Idempotent-Replayed': 'true'})
@@ -0,0 +1,99 @@
+import csv
+import io
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import connection, transaction
+from django.db.models import Count
+from notifications.models import Audience, AudienceMember
+from notifications.utils import chunked
+from notifications.validators import classify_recipients
+
+# Временная таблица загрузки: участники копируются в нее COPY пачками,
+# а в AudienceMember переносятся одним INSERT ... SELECT. При ошибке она удаляется откатом транзакции.
+STAGING_TABLE = 'audience_member_import'
+
+
+def parse_member(line: str) -> Any:
+    """Строка файла участников: адрес получателя или JSON-объект {"recipient": ..., "context": {...}}."""
+    line = line.strip()
+    if line.startswith('{'):
+        try:
+            return json.loads(line)
+        except ValueError:
+            pass
+    return line
+
+
+def import_members(
+        audience: Audience, lines: Iterable[str], batch_size: int, replace: bool = False
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Загружает участников аудитории в одной транзакции. Строки проверяются и классифицируются
+    по каналам пачками по batch_size, как получатели в API, и копируются COPY во временную таблицу;
+    участники, уже состоящие в аудитории, пропускаются. replace — заменить прежний состав.
+    Возвращает число добавленных участников и ошибки проверки.
+    """
+    quote = connection.ops.quote_name
+    errors: List[Dict[str, Any]] = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {quote(STAGING_TABLE)} '
+            f'(recipient varchar(150), channel varchar(50), context jsonb)'
+        )
+        for chunk in chunked((line for line in lines if line.strip()), batch_size):
+            valid, invalid = classify_recipients([parse_member(line) for line in chunk])
+            errors.extend(invalid)
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for member in valid:
+                # Пустое значение без кавычек COPY в формате csv читает как NULL.
+                context = member.get('context')
+                writer.writerow([member['recipient'], member['recipient_type'], json.dumps(context) if context else ''])
+            buffer.seek(0)
+            cursor.copy_expert(
+                f'COPY {quote(STAGING_TABLE)} (recipient, channel, context) FROM STDIN WITH (FORMAT csv)', buffer
+            )
+
+        table = quote(AudienceMember._meta.db_table)
+        if replace:
+            cursor.execute(f'DELETE FROM {table} WHERE audience_id = %s', [audience.id])
+        cursor.execute(
+            f'INSERT INTO {table} (audience_id, recipient, channel, context) '
+            f'SELECT %s, recipient, channel, context FROM {quote(STAGING_TABLE)} '
+            f'ON CONFLICT (audience_id, channel, recipient) DO NOTHING',
+            [audience.id]
+        )
+        added = cursor.rowcount
+        # Временная таблица живет до конца сеанса, поэтому удаляется сразу после переноса.
+        cursor.execute(f'DROP TABLE {quote(STAGING_TABLE)}')
+        refresh_member_counts(audience)
+    return added, errors
+
+
+def refresh_member_counts(audience: Audience) -> None:
+    """Пересчитывает количество участников аудитории по каналам."""
+    audience.member_counts = dict(
+        AudienceMember.objects.filter(audience=audience).order_by().values_list('channel').annotate(Count('id'))
+    )
+    audience.save(update_fields=['member_counts', 'updated_at'])
+
+
+def iter_members(audience_id: int, channel: str, batch_size: int) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+    """
+    Участники канала аудитории парами (адрес, переменные шаблона) в порядке id.
+    Читаются запросами по batch_size строк с условием id > последнего прочитанного (keyset),
+    поэтому каждый запрос идет по индексу и не зависит от размера аудитории.
+    """
+    last_id = 0
+    while True:
+        batch = list(
+            AudienceMember.objects
+            .filter(audience_id=audience_id, channel=channel, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'recipient', 'context')[:batch_size]
+        )
+        for _, recipient, context in batch:
+            yield recipient, context
+        if len(batch) < batch_size:
+            return
+        last_id = batch[-1][0]
@@ -0,0 +1,138 @@
+import time
+from typing import Any, Callable, Hashable, Optional, Tuple, TypeVar
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import transaction
+from notifications.metrics import CACHE_REQUESTS_TOTAL
+from notifications.models import Audience, Template
+
+# Кэш по схеме cache-aside с версиями: значение хранится вместе с версией объекта, инвалидация увеличивает версию.
+# Значение и версия читаются одним запросом к кэшу; значение со старой версией считается устаревшим.
+# Кэш только ускоряет чтение: при недоступном Redis данные загружаются из БД.
+
+T = TypeVar('T')
+
+NOTIFICATION_STATUS = 'notification-status'
+TEMPLATE = 'template'
+AUDIENCE = 'audience'
+
+# Шаг ожидания значения, которое пересчитывает другой процесс.
+_WAIT_STEP = 0.05
+
+
+def _keys(namespace: str, ident: Hashable) -> Tuple[str, str, str]:
+    key = f"{namespace}:{ident}"
+    return key, f"{key}:version", f"{key}:lock"
+
+
+def _current_version(version_key: str) -> int:
+    """
+    Версия объекта, для которого в кэше нет версии: новая, больше любой выданной ранее,
+    чтобы значения, сохраненные до вытеснения версии, не считались актуальными.
+    """
+    cache.add(version_key, time.time_ns(), timeout=None)
+    return cache.get(version_key)
+
+
+def cache_aside(namespace: str, ident: Hashable, loader: Callable[[], T], timeout: Any = DEFAULT_TIMEOUT) -> T:
+    """
+    Возвращает значение объекта ident из кэша или загружает его через loader и сохраняет.
+    Защита от одновременного пересчета: значение загружает только процесс, взявший блокировку;
+    остальные отдают устаревшее значение, если оно есть, или ждут нового до CACHE_LOCK_TIMEOUT секунд.
+    None (объекта нет) не кэшируется: объект может появиться без инвалидации, например
+    при вставке строк SQL-запросом в асинхронном API.
+    """
+    key, version_key, lock_key = _keys(namespace, ident)
+    try:
+        values = cache.get_many([key, version_key])
+        version = values.get(version_key) or _current_version(version_key)
+        cached = values.get(key)
+        if cached is not None and cached[0] == version:
+            CACHE_REQUESTS_TOTAL.labels(namespace, 'hit').inc()
+            return cached[1]
+
+        locked = cache.add(lock_key, 1, timeout=settings.CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if cached is None:
+                cached = _wait_for(key, lock_key, version)
+            if cached is not None:
+                CACHE_REQUESTS_TOTAL.labels(namespace, 'stale' if cached[0] != version else 'hit').inc()
+                return cached[1]
+    except redis.RedisError:
+        return loader()
+
+    CACHE_REQUESTS_TOTAL.labels(namespace, 'miss').inc()
+    try:
+        value = loader()
+        if value is not None:
+            cache.set(key, (version, value), timeout=timeout)
+    except redis.RedisError:
+        return value
+    finally:
+        if locked:
+            _delete_lock(lock_key)
+    return value
+
+
+def _wait_for(key: str, lock_key: str, version: int) -> Optional[Tuple[int, Any]]:
+    """
+    Ждет значение версии version, которое загружает другой процесс. None, если блокировка снята
+    без сохранения значения (объекта нет) или истек CACHE_LOCK_TIMEOUT.
+    """
+    deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(_WAIT_STEP)
+        values = cache.get_many([key, lock_key])
+        cached = values.get(key)
+        if cached is not None and cached[0] == version:
+            return cached
+        if lock_key not in values:
+            return None
+    return None
+
+
+def _delete_lock(lock_key: str) -> None:
+    try:
+        cache.delete(lock_key)
+    except redis.RedisError:
+        pass
+
+
+def invalidate(namespace: str, *idents: Hashable) -> None:
+    """
+    Делает значения объектов в кэше устаревшими. Внутри транзакции — после ее фиксации,
+    чтобы параллельный запрос не сохранил в кэш данные до изменения под новой версией.
+    """
+    def bump() -> None:
+        for ident in idents:
+            _, version_key, _ = _keys(namespace, ident)
+            try:
+                try:
+                    cache.incr(version_key)
+                except ValueError:
+                    cache.set(version_key, time.time_ns(), timeout=None)
+            except redis.RedisError:
+                return
+
+    if idents:
+        transaction.on_commit(bump)
+
+
+def get_template(template_id: int) -> Optional[Template]:
+    """Шаблон уведомления по id из кэша; None, если шаблона нет."""
+    row = cache_aside(
+        TEMPLATE, template_id,
+        lambda: Template.objects.filter(id=template_id).values('id', 'name', 'body', 'version').first()
+    )
+    return Template(**row) if row is not None else None
+
+
+def get_audience(audience_id: int) -> Optional[Audience]:
+    """Аудитория по id с количеством участников по каналам из кэша; None, если аудитории нет."""
+    row = cache_aside(
+        AUDIENCE, audience_id,
+        lambda: Audience.objects.filter(id=audience_id).values('id', 'name', 'member_counts').first()
+    )
+    return Audience(**row) if row is not None else None
@@ -0,0 +1,132 @@
+import re
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.utils.module_loading import import_string
+from notifications.delivery import TRANSIENT, SendError
+from notifications.models import NotificationSendLog
+from notifications.services import classify_email_error, send_email_batch
+from notifications.telegram import classify_telegram_error, get_telegram_client, run_in_worker_loop
+
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+
+class ChannelBackend(ABC):
+    """
+    Канал доставки уведомлений. Общий конвейер (валидация получателей, разбиение
+    на пачки, очереди, повторы, предохранитель) работает с каналом только через этот интерфейс.
+    Синхронный канал реализует send_batch, асинхронный наследует AsyncChannelBackend.
+    Канал без validate или метода отправки не создается: ошибка возникает при загрузке реестра.
+    """
+    name: str = ''
+    # Код канала в NotificationSendLog.recipient_type.
+    log_code: int = 0
+
+    @property
+    def batch_size(self) -> int:
+        """Количество получателей в одной задаче отправки."""
+        return 100
+
+    @abstractmethod
+    def validate(self, value: str) -> bool:
+        """Проверяет, что строка — адрес получателя этого канала."""
+
+    @abstractmethod
+    def send_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        """Отправляет сообщение пачке получателей. Возвращает {получатель: ошибка или None}."""
+
+    def send_personalized(self, messages: Dict[str, str]) -> Dict[str, Optional[SendError]]:
+        """
+        Отправляет каждому получателю пачки свой текст ({получатель: текст}).
+        По умолчанию получатели с одинаковым текстом отправляются вместе через send_batch.
+        """
+        recipients_by_message: Dict[str, List[str]] = defaultdict(list)
+        for recipient, message in messages.items():
+            recipients_by_message[message].append(recipient)
+
+        results: Dict[str, Optional[SendError]] = {}
+        for message, recipients in recipients_by_message.items():
+            results.update(self.send_batch(message, recipients))
+        return results
+
+    def classify_error(self, error: Exception, recipient: str) -> str:
+        """
+        Возвращает класс ошибки отправки (notifications.delivery), от которого зависит повтор.
+        Вызывается конвейером, если отправка пачки прервалась исключением. По умолчанию ошибка временная.
+        """
+        return TRANSIENT
+
+
+class AsyncChannelBackend(ChannelBackend):
+    """Асинхронный канал: пачка отправляется корутиной asend_batch в event loop процесса воркера."""
+
+    def send_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        return run_in_worker_loop(self.asend_batch(message, recipients))
+
+    @abstractmethod
+    async def asend_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        """Асинхронно отправляет сообщение пачке получателей."""
+
+
+class EmailBackend(ChannelBackend):
+    name = 'email'
+    log_code = NotificationSendLog.EMAIL
+
+    @property
+    def batch_size(self) -> int:
+        return settings.EMAIL_BATCH_SIZE
+
+    def validate(self, value: str) -> bool:
+        return EMAIL_REGEX.match(value) is not None
+
+    def send_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        return send_email_batch(message, recipients)
+
+    def classify_error(self, error: Exception, recipient: str) -> str:
+        return classify_email_error(error, recipient)
+
+
+class TelegramBackend(AsyncChannelBackend):
+    name = 'telegram'
+    log_code = NotificationSendLog.TELEGRAM
+
+    @property
+    def batch_size(self) -> int:
+        return settings.TELEGRAM_BATCH_SIZE
+
+    def validate(self, value: str) -> bool:
+        return value.isdigit()
+
+    async def asend_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        return await get_telegram_client().send_many(recipients, message)
+
+    def send_personalized(self, messages: Dict[str, str]) -> Dict[str, Optional[SendError]]:
+        return run_in_worker_loop(get_telegram_client().send_each(messages))
+
+    def classify_error(self, error: Exception, recipient: str) -> str:
+        return classify_telegram_error(error)
+
+
+@lru_cache(maxsize=None)
+def get_backends() -> Dict[str, ChannelBackend]:
+    """
+    Возвращает каналы из настройки NOTIFICATION_CHANNEL_BACKENDS по имени.
+    Порядок важен: получатель относится к первому каналу, который его принял.
+    """
+    backends = (import_string(path)() for path in settings.NOTIFICATION_CHANNEL_BACKENDS)
+    return {backend.name: backend for backend in backends}
+
+
+def get_backend(name: str) -> ChannelBackend:
+    """Возвращает канал по имени (Recipient.recepient_type)."""
+    return get_backends()[name]
+
+
+def detect_channel(value: str) -> Optional[str]:
+    """Возвращает имя канала, к которому относится адрес получателя, или None."""
+    for backend in get_backends().values():
+        if backend.validate(value):
+            return backend.name
+    return None
@@ -0,0 +1,175 @@
+import random
+import time
+import uuid
+from typing import Dict, Optional
+import redis
+from django.conf import settings
+from notifications.delivery import RATE_LIMITED, TRANSIENT, SendError
+from notifications.redis_client import get_redis
+
+# Корректировка AIMD-лимита одной операцией Redis: одновременные release разных воркеров
+# не перезаписывают изменения друг друга. Лимит возвращается строкой, так как числа Lua
+# при передаче в Redis округляются до целых.
+AIMD_UPDATE_SCRIPT = """
+local limit = tonumber(redis.call('GET', KEYS[1]) or ARGV[1])
+if ARGV[2] == '1' then
+    limit = math.min(tonumber(ARGV[4]), limit + 1 / limit)
+else
+    limit = math.max(tonumber(ARGV[3]), limit * tonumber(ARGV[5]))
+end
+redis.call('SET', KEYS[1], tostring(limit))
+return tostring(limit)
+"""
+
+
+class CircuitBreaker:
+    """
+    Предохранитель канала, общий для всех воркеров через Redis.
+    После CIRCUIT_BREAKER_FAILURE_THRESHOLD неудачных пачек подряд канал закрывается
+    на CIRCUIT_BREAKER_OPEN_SECONDS, затем одна пачка пропускается пробной:
+    ее успех закрывает предохранитель, ошибка снова размыкает его.
+    """
+
+    def __init__(self, channel: str) -> None:
+        self.failures_key = f"notify:circuit:{channel}:failures"
+        self.open_key = f"notify:circuit:{channel}:open"
+        self.probe_key = f"notify:circuit:{channel}:probe"
+
+    def retry_after(self, client: redis.Redis) -> Optional[float]:
+        """Возвращает None, если отправка разрешена, иначе — через сколько секунд повторить попытку."""
+        pipeline = client.pipeline(transaction=False)
+        pipeline.pttl(self.open_key)
+        pipeline.get(self.failures_key)
+        open_ttl, failures = pipeline.execute()
+        if open_ttl > 0:
+            return open_ttl / 1000
+        if int(failures or 0) < settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            return None
+        # Полуоткрытое состояние: пробную пачку отправляет только один воркер.
+        if client.set(self.probe_key, 1, nx=True, ex=settings.CIRCUIT_BREAKER_OPEN_SECONDS):
+            return None
+        return settings.CIRCUIT_BREAKER_OPEN_SECONDS
+
+    def record_success(self, client: redis.Redis) -> None:
+        client.delete(self.failures_key, self.probe_key)
+
+    def record_failure(self, client: redis.Redis) -> None:
+        pipeline = client.pipeline(transaction=True)
+        pipeline.incr(self.failures_key)
+        pipeline.expire(self.failures_key, settings.CIRCUIT_BREAKER_FAILURE_WINDOW)
+        failures, _ = pipeline.execute()
+        if failures >= settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD:
+            pipeline = client.pipeline(transaction=True)
+            pipeline.set(self.open_key, 1, ex=settings.CIRCUIT_BREAKER_OPEN_SECONDS)
+            pipeline.delete(self.probe_key)
+            pipeline.execute()
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Общий для всех воркеров лимит одновременно отправляемых пачек канала по схеме AIMD:
+    успешная пачка увеличивает лимит на 1/лимит, неудачная уменьшает его в
+    CHANNEL_CONCURRENCY_DECREASE_FACTOR раз. Занятые слоты хранятся в sorted set
+    со временем истечения аренды, поэтому слоты упавших воркеров освобождаются сами.
+    """
+
+    def __init__(self, channel: str) -> None:
+        self.limit_key = f"notify:concurrency:{channel}:limit"
+        self.slots_key = f"notify:concurrency:{channel}:slots"
+        policy = settings.CHANNEL_CONCURRENCY.get(channel, settings.CHANNEL_CONCURRENCY_DEFAULT)
+        self.min_limit = policy['min']
+        self.max_limit = policy['max']
+        self.initial_limit = policy['initial']
+
+    def acquire(self, client: redis.Redis) -> Optional[str]:
+        """Занимает слот и возвращает его идентификатор или None, если лимит исчерпан."""
+        slot = uuid.uuid4().hex
+        now = time.time()
+        pipeline = client.pipeline(transaction=True)
+        pipeline.zremrangebyscore(self.slots_key, '-inf', now)
+        pipeline.zadd(self.slots_key, {slot: now + settings.CHANNEL_CONCURRENCY_LEASE})
+        pipeline.expire(self.slots_key, settings.CHANNEL_CONCURRENCY_LEASE)
+        pipeline.zrank(self.slots_key, slot)
+        pipeline.get(self.limit_key)
+        *_, rank, limit = pipeline.execute()
+
+        # Слоты упорядочены по времени выдачи: слот разрешен, если до него занято меньше лимита.
+        if rank < int(self._limit(limit)):
+            return slot
+        client.zrem(self.slots_key, slot)
+        return None
+
+    def release(self, client: redis.Redis, slot: str, success: bool) -> float:
+        """Освобождает слот, атомарно корректирует лимит по результату пачки и возвращает новый лимит."""
+        client.zrem(self.slots_key, slot)
+        limit = client.register_script(AIMD_UPDATE_SCRIPT)(
+            keys=[self.limit_key],
+            args=[
+                self.initial_limit, int(success), self.min_limit, self.max_limit,
+                settings.CHANNEL_CONCURRENCY_DECREASE_FACTOR
+            ]
+        )
+        return float(limit)
+
+    def _limit(self, value: Optional[bytes]) -> float:
+        return float(value) if value is not None else float(self.initial_limit)
+
+
+class ChannelGuard:
+    """
+    Пропуск пачки к провайдеру канала через предохранитель и адаптивный лимит конкурентности.
+    Если Redis недоступен, ограничения не применяются.
+    """
+
+    def __init__(self, channel: str) -> None:
+        self.breaker = CircuitBreaker(channel)
+        self.concurrency = AdaptiveConcurrencyLimit(channel)
+        self.slot: Optional[str] = None
+
+    def acquire(self) -> Optional[float]:
+        """
+        Возвращает None, если пачку можно отправлять, иначе — задержку в секундах,
+        на которую задачу стоит отложить, не занимая воркер.
+        """
+        client = get_redis()
+        if client is None:
+            return None
+        try:
+            retry_after = self.breaker.retry_after(client)
+            if retry_after is not None:
+                return retry_after + random.uniform(0, settings.CHANNEL_DEFER_JITTER)
+            self.slot = self.concurrency.acquire(client)
+        except redis.RedisError:
+            return None
+        if self.slot is None:
+            return settings.CHANNEL_CONCURRENCY_RETRY_DELAY + random.uniform(0, settings.CHANNEL_DEFER_JITTER)
+        return None
+
+    def release(self, results: Dict[str, Optional[SendError]]) -> None:
+        """Освобождает слот и сообщает предохранителю и лимиту, справился ли провайдер с пачкой."""
+        client = get_redis()
+        if client is None:
+            return
+        success = is_provider_healthy(results)
+        try:
+            if self.slot is not None:
+                self.concurrency.release(client, self.slot, success)
+            if success:
+                self.breaker.record_success(client)
+            else:
+                self.breaker.record_failure(client)
+        except redis.RedisError:
+            pass
+        self.slot = None
+
+
+def is_provider_healthy(results: Dict[str, Optional[SendError]]) -> bool:
+    """
+    Провайдер считается неисправным, если временными ошибками и превышением лимита
+    завершилась хотя бы половина пачки. Постоянные ошибки адресов не учитываются.
+    """
+    provider_errors = sum(
+        1 for error in results.values()
+        if error is not None and error.error_class in (TRANSIENT, RATE_LIMITED)
+    )
+    return not results or provider_errors * 2 < len(results)
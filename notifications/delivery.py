@@ -0,0 +1,156 @@
+import random
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import redis
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+from notifications.models import Recipient
+from notifications.stats import record_channel_results
+
+# Классы ошибок отправки. Временные ошибки и превышение лимитов повторяются
+# с экспоненциальной задержкой, постоянные сразу переводят получателя в «Не доставлено».
+# REJECTED — постоянная ошибка, относящаяся к самому получателю (чат не найден, бот заблокирован,
+# адрес не существует): только такой вердикт запоминается для следующих рассылок.
+TRANSIENT = 'transient'
+RATE_LIMITED = 'rate_limited'
+PERMANENT = 'permanent'
+REJECTED = 'rejected'
+
+# Итоговые статусы получателя: после них отправка не повторяется.
+FINAL_STATUSES = (Recipient.SENT, Recipient.DEAD, Recipient.SKIPPED)
+
+REJECTED_ERROR = "Получатель недавно отклонен каналом, отправка пропущена"
+
+
+class SendError(str):
+    """Текст ошибки отправки с классом ошибки, от которого зависит повтор."""
+
+    error_class: str
+
+    def __new__(cls, message: str, error_class: str = TRANSIENT) -> 'SendError':
+        error = super().__new__(cls, message)
+        error.error_class = error_class
+        return error
+
+
+def get_retry_delay(error_class: str, attempt: int) -> float:
+    """
+    Задержка перед повтором после attempt-й неудачной попытки: экспоненциальная
+    по классу ошибки, ограниченная max_delay, со случайным разбросом в пределах половины,
+    чтобы повторы после массового сбоя не приходили в брокер одновременно.
+    """
+    policy = settings.DELIVERY_RETRY_POLICIES[error_class]
+    delay = min(policy['max_delay'], policy['base_delay'] * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def can_retry(error: SendError, attempt: int) -> bool:
+    """Проверяет, нужно ли повторить отправку после attempt-й неудачной попытки."""
+    policy = settings.DELIVERY_RETRY_POLICIES.get(error.error_class)
+    return policy is not None and attempt < policy['max_attempts']
+
+
+def mark_sending(notification_id: int, recipient_type: str, recipients: List[str]) -> None:
+    """Переводит пачку получателей в статус «Отправляется»."""
+    _recipients(notification_id, recipient_type, recipients).update(delivery_status=Recipient.SENDING)
+
+
+def record_delivery(
+        notification_id: int, recipient_type: str, results: Dict[str, Optional[SendError]], attempt: int,
+        tracked: bool = True
+) -> Tuple[List[str], float]:
+    """
+    Сохраняет результат attempt-й попытки отправки пачки: по одному UPDATE на каждый итоговый статус
+    и счетчики канала уведомления — в одной транзакции. Получатели, уже получившие итоговый статус
+    (например, при повторной доставке задачи брокером), не учитываются в счетчиках второй раз.
+    tracked=False — получатели из аудитории: строк Recipient у них нет, поэтому счетчики увеличиваются
+    по результатам пачки, а повторно доставленная брокером задача учитывается еще раз.
+    Возвращает получателей для повтора и общую для них задержку — наибольшую по классам их ошибок,
+    чтобы пачка повторялась одной задачей.
+    """
+    sent: List[str] = []
+    retry: List[str] = []
+    dead: List[str] = []
+    countdown = 0.0
+    for recipient, error in results.items():
+        if error is None:
+            sent.append(recipient)
+        elif can_retry(error, attempt):
+            retry.append(recipient)
+            countdown = max(countdown, get_retry_delay(error.error_class, attempt))
+        else:
+            dead.append(recipient)
+
+    if not tracked:
+        record_channel_results(notification_id, recipient_type, len(sent), len(dead))
+        return retry, countdown
+
+    finished = {Recipient.SENT: 0, Recipient.DEAD: 0}
+    with transaction.atomic():
+        for status, recipients in ((Recipient.SENT, sent), (Recipient.DEAD, dead)):
+            if recipients:
+                finished[status] = _recipients(notification_id, recipient_type, recipients).exclude(
+                    delivery_status__in=FINAL_STATUSES
+                ).update(delivery_status=status, attempts=F('attempts') + 1, next_attempt_at=None)
+        if retry:
+            _recipients(notification_id, recipient_type, retry).update(
+                delivery_status=Recipient.FAILED,
+                attempts=F('attempts') + 1,
+                next_attempt_at=timezone.now() + timedelta(seconds=countdown)
+            )
+        record_channel_results(notification_id, recipient_type, finished[Recipient.SENT], finished[Recipient.DEAD])
+    return retry, countdown
+
+
+def record_skipped(notification_id: int, recipient_type: str, recipients: List[str], tracked: bool = True) -> None:
+    """
+    Завершает получателей, отсеянных как повтор недавно отправленного сообщения: статус
+    «Пропущено как повтор» и счетчик skipped канала, чтобы они не считались ожидающими отправки.
+    tracked=False — получатели из аудитории, у которых нет строк Recipient.
+    """
+    if not tracked:
+        record_channel_results(notification_id, recipient_type, 0, 0, len(recipients))
+        return
+    with transaction.atomic():
+        skipped = _recipients(notification_id, recipient_type, recipients).exclude(
+            delivery_status__in=FINAL_STATUSES
+        ).update(delivery_status=Recipient.SKIPPED)
+        record_channel_results(notification_id, recipient_type, 0, 0, skipped)
+
+
+def _rejection_key(channel: str, recipient: str) -> str:
+    return f"recipient-rejected:{channel}:{recipient}"
+
+
+def remember_rejections(channel: str, results: Dict[str, Optional[SendError]]) -> None:
+    """
+    Запоминает в кэше на RECIPIENT_VERDICT_TTL секунд получателей, отклоненных провайдером (класс REJECTED).
+    Остальные постоянные ошибки (текст сообщения, настройки канала) не запоминаются.
+    """
+    rejected = [recipient for recipient, error in results.items() if error is not None and error.error_class == REJECTED]
+    if not rejected:
+        return
+    try:
+        cache.set_many(
+            {_rejection_key(channel, recipient): True for recipient in rejected}, timeout=settings.RECIPIENT_VERDICT_TTL
+        )
+    except redis.RedisError:
+        pass
+
+
+def rejected_recipients(channel: str, recipients: List[str]) -> Set[str]:
+    """Получатели пачки, которых провайдер канала недавно отклонил; одно обращение к кэшу на пачку."""
+    try:
+        rejected = cache.get_many([_rejection_key(channel, recipient) for recipient in recipients])
+    except redis.RedisError:
+        return set()
+    return {recipient for recipient in recipients if _rejection_key(channel, recipient) in rejected}
+
+
+def _recipients(notification_id: int, recipient_type: str, recipients: Iterable[str]) -> QuerySet:
+    return Recipient.objects.filter(
+        notification_id=notification_id, recepient_type=recipient_type, recepient__in=list(recipients)
+    )
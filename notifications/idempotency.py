@@ -0,0 +1,120 @@
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Sequence, cast
+import redis
+from django.conf import settings
+from rest_framework.renderers import JSONRenderer
+from notifications.redis_client import get_async_redis, get_redis
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+def _response_cache_key(idempotency_key: str) -> str:
+    return f"notify:idempotency:{idempotency_key}"
+
+
+def get_cached_response(idempotency_key: str) -> Optional[Dict[str, Any]]:
+    """Возвращает сохраненный в Redis ответ на запрос с этим ключом или None."""
+    client = get_redis()
+    if client is None:
+        return None
+    try:
+        cached = client.get(_response_cache_key(idempotency_key))
+    except redis.RedisError:
+        return None
+    return json.loads(cast(bytes, cached)) if cached is not None else None
+
+
+def cache_response(idempotency_key: str, data: Dict[str, Any]) -> None:
+    """Сохраняет в Redis ответ на запрос с ключом идемпотентности на IDEMPOTENCY_KEY_TTL секунд."""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.set(_response_cache_key(idempotency_key), JSONRenderer().render(data), ex=settings.IDEMPOTENCY_KEY_TTL)
+    except redis.RedisError:
+        pass
+
+
+async def aget_cached_response(idempotency_key: str) -> Optional[Dict[str, Any]]:
+    """Асинхронный вариант get_cached_response."""
+    client = get_async_redis()
+    if client is None:
+        return None
+    try:
+        cached = await client.get(_response_cache_key(idempotency_key))
+    except redis.RedisError:
+        return None
+    return json.loads(cached) if cached is not None else None
+
+
+async def acache_response(idempotency_key: str, data: Dict[str, Any]) -> None:
+    """Асинхронный вариант cache_response."""
+    client = get_async_redis()
+    if client is None:
+        return
+    try:
+        await client.set(_response_cache_key(idempotency_key), JSONRenderer().render(data), ex=settings.IDEMPOTENCY_KEY_TTL)
+    except redis.RedisError:
+        pass
+
+
+def _dedup_keys(
+        recipient_type: str, message: str, recipients: List[str], template: Optional[Sequence[int]],
+        contexts: Optional[Dict[str, Any]]
+) -> List[str]:
+    """
+    Ключи отметок отправки сообщения получателям. Для уведомления по шаблону message — текст шаблона,
+    одинаковый у всех его уведомлений, поэтому в отпечаток входят id и версия шаблона и переменные получателя.
+    """
+    if template is None:
+        digest = hashlib.sha256(message.encode()).hexdigest()
+        return [f"notify:dedup:{recipient_type}:{recipient}:{digest}" for recipient in recipients]
+    contexts = contexts or {}
+    return [
+        f"notify:dedup:{recipient_type}:{recipient}:" + hashlib.sha256(
+            json.dumps([message, list(template), contexts.get(recipient) or None], sort_keys=True).encode()
+        ).hexdigest()
+        for recipient in recipients
+    ]
+
+
+def drop_recent_duplicates(
+        recipient_type: str, message: str, recipients: List[str], template: Optional[Sequence[int]] = None,
+        contexts: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """
+    Убирает получателей, которым то же сообщение уже отправлялось в течение NOTIFY_DEDUP_WINDOW секунд.
+    template — [id, версия] шаблона, contexts — переменные шаблона получателей.
+    Отметки ставятся одним pipeline SET NX на пачку до отправки и снимаются forget_failed_sends,
+    если отправка не удалась; если Redis недоступен, пачка не фильтруется.
+    """
+    client = get_redis()
+    if not settings.NOTIFY_DEDUP_WINDOW or client is None or not recipients:
+        return recipients
+
+    pipeline = client.pipeline(transaction=False)
+    for key in _dedup_keys(recipient_type, message, recipients, template, contexts):
+        pipeline.set(key, 1, nx=True, ex=settings.NOTIFY_DEDUP_WINDOW)
+    try:
+        first_seen = pipeline.execute()
+    except redis.RedisError:
+        return recipients
+    return [recipient for recipient, is_new in zip(recipients, first_seen) if is_new]
+
+
+def forget_failed_sends(
+        recipient_type: str, message: str, recipients: List[str], template: Optional[Sequence[int]] = None,
+        contexts: Optional[Dict[str, Any]] = None
+) -> None:
+    """
+    Снимает отметки drop_recent_duplicates с получателей, отправка которым завершилась ошибкой,
+    чтобы повторная рассылка того же сообщения в окне не была отсеяна.
+    """
+    client = get_redis()
+    if not settings.NOTIFY_DEDUP_WINDOW or client is None or not recipients:
+        return
+    try:
+        client.delete(*_dedup_keys(recipient_type, message, recipients, template, contexts))
+    except redis.RedisError:
+        pass
@@ -0,0 +1,33 @@
+from typing import Any, Dict, List
+from django.conf import settings
+from django.db import transaction
+from notifications.models import Notification, NotificationChannelStats, Recipient
+from notifications.outbox import add_to_outbox
+from notifications.serializers import build_notification
+from notifications.stats import build_channel_stats
+
+
+def create_notifications(items: List[Dict[str, Any]]) -> List[Notification]:
+    """
+    Создает пачку провалидированных уведомлений, их получателей и счетчики доставки по каналам
+    bulk_create в одной транзакции, в ней же уведомления без задержки записываются в outbox.
+    """
+    built = [build_notification(item) for item in items]
+
+    with transaction.atomic():
+        notifications = Notification.objects.bulk_create([notification for notification, _ in built])
+        Recipient.objects.bulk_create(
+            [recipient for _, recipients in built for recipient in recipients],
+            batch_size=settings.NOTIFY_BULK_RECIPIENTS_BATCH_SIZE
+        )
+        NotificationChannelStats.objects.bulk_create(
+            stats
+            for notification, recipients in built
+            for stats in build_channel_stats(notification, recipients)
+        )
+        add_to_outbox(
+            (notification.id, notification.priority)
+            for notification in notifications
+            if notification.status == Notification.QUEUED
+        )
+    return notifications
@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+import time
+from typing import Iterable, List, Optional
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, close_old_connections, transaction
+from notifications.models import Notification, NotificationSendLog
+
+logger = logging.getLogger(__name__)
+
+
+class SendLogBuffer:
+    """
+    Буфер записей лога отправки процесса воркера.
+    Накопленные записи сохраняются одним bulk_create при достижении
+    лимита по размеру или по времени с момента последнего сброса.
+    По времени буфер сбрасывает и фоновый поток, поэтому записи простаивающего
+    воркера не задерживаются дольше flush_interval.
+    """
+
+    def __init__(self, max_size: int, flush_interval: float) -> None:
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self._entries: List[NotificationSendLog] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._flusher_pid: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, entries: Iterable[NotificationSendLog]) -> None:
+        """
+        Добавляет записи в буфер и сбрасывает его, если лимит достигнут.
+        Ошибка БД при сбросе только записывается в журнал: сообщения уже отправлены,
+        и ошибка лога не должна приводить к повтору отправки.
+        """
+        with self._lock:
+            self._entries.extend(entries)
+            if self._is_due():
+                self._flush_logged()
+
+    def flush(self) -> int:
+        """Сохраняет все накопленные записи и возвращает их количество."""
+        with self._lock:
+            return self._flush()
+
+    def flush_if_due(self) -> int:
+        """Сохраняет записи, только если лимит по размеру или времени достигнут."""
+        with self._lock:
+            return self._flush_logged() if self._is_due() else 0
+
+    def start_periodic_flush(self) -> None:
+        """Запускает в текущем процессе фоновый поток, сбрасывающий буфер по времени."""
+        if self._flusher_pid == os.getpid():
+            return
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name='send-log-flush', daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush_if_due()
+            # Соединение потока закрывается по CONN_MAX_AGE, как в обработчиках задач.
+            close_old_connections()
+
+    def _is_due(self) -> bool:
+        return (
+            len(self._entries) >= self.max_size
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+
+    def _flush_logged(self) -> int:
+        try:
+            return self._flush()
+        except DatabaseError:
+            logger.exception("Не удалось сохранить лог отправки, записей в буфере: %s", len(self._entries))
+            return 0
+
+    def _flush(self) -> int:
+        # Записи удаляются из буфера только после успешной вставки,
+        # поэтому при ошибке БД они будут сохранены при следующем сбросе.
+        # Пачки bulk_create вставляются в одной транзакции: при ошибке не остается
+        # частично сохраненных записей, которые повторная вставка продублировала бы.
+        entries = self._entries
+        if entries:
+            try:
+                with transaction.atomic():
+                    NotificationSendLog.objects.bulk_create(entries, batch_size=self.max_size)
+            except IntegrityError:
+                # Уведомление могло быть удалено до сброса буфера: его записи
+                # отбрасываются, чтобы они не блокировали сохранение остальных.
+                with transaction.atomic():
+                    NotificationSendLog.objects.bulk_create(
+                        _without_deleted_notifications(entries), batch_size=self.max_size
+                    )
+            self._entries = []
+        self._last_flush = time.monotonic()
+        return len(entries)
+
+
+def _without_deleted_notifications(entries: List[NotificationSendLog]) -> List[NotificationSendLog]:
+    notification_ids = {entry.notification_id for entry in entries}
+    existing_ids = set(Notification.objects.filter(id__in=notification_ids).values_list('id', flat=True))
+    return [entry for entry in entries if entry.notification_id in existing_ids]
+
+
+send_log_buffer = SendLogBuffer(
+    max_size=settings.SEND_LOG_BUFFER_SIZE,
+    flush_interval=settings.SEND_LOG_FLUSH_INTERVAL,
+)
@@ -0,0 +1,36 @@
+from datetime import timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from notifications.partitions import ensure_partitions
+from notifications.retention import RETENTION_TABLES, archive_expired, count_expired
+
+
+class Command(BaseCommand):
+    help = "Архивирование в сжатый NDJSON и удаление данных старше сроков хранения DATA_RETENTION_DAYS"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--archive-dir', default=settings.ARCHIVE_DIR, help="Каталог архива")
+        parser.add_argument('--dry-run', action='store_true', help="Только показать, сколько строк будет удалено")
+
+    def handle(self, *args, **options):
+        archive_dir = Path(options['archive_dir'])
+        now = timezone.now()
+
+        created = ensure_partitions(settings.SEND_LOG_PARTITIONS_AHEAD)
+        if created:
+            self.stdout.write(f"Созданы секции лога: {', '.join(created)}")
+
+        for table in RETENTION_TABLES:
+            days = settings.DATA_RETENTION_DAYS.get(table, 0)
+            if not days:
+                continue
+            cutoff = now - timedelta(days=days)
+
+            if options['dry_run']:
+                self.stdout.write(f"{table}: старше {days} дн. — {count_expired(table, cutoff)} строк")
+                continue
+
+            deleted = archive_expired(table, archive_dir, cutoff, settings.ARCHIVE_BATCH_SIZE)
+            self.stdout.write(self.style.SUCCESS(f"{table}: архивировано и удалено строк — {deleted}"))
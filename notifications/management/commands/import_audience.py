@@ -0,0 +1,36 @@
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from notifications.audiences import import_members
+from notifications.models import Audience
+
+# Сколько ошибок проверки выводить; остальные только подсчитываются.
+MAX_REPORTED_ERRORS = 20
+
+
+class Command(BaseCommand):
+    help = "Загрузка участников аудитории из файла: адрес или JSON {\"recipient\": ..., \"context\": {...}} в строке"
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help="Название аудитории; аудитория создается, если ее нет")
+        parser.add_argument('path', help="Файл участников, - — стандартный ввод")
+        parser.add_argument('--replace', action='store_true', help="Заменить прежний состав аудитории")
+        parser.add_argument('--batch-size', type=int, default=settings.AUDIENCE_IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        audience, _ = Audience.objects.get_or_create(name=options['name'])
+
+        if options['path'] == '-':
+            added, errors = import_members(audience, sys.stdin, options['batch_size'], options['replace'])
+        else:
+            with open(options['path'], encoding='utf-8') as lines:
+                added, errors = import_members(audience, lines, options['batch_size'], options['replace'])
+
+        for error in errors[:MAX_REPORTED_ERRORS]:
+            self.stderr.write(f"{error['recipient']!r}: {error['error']}")
+        if len(errors) > MAX_REPORTED_ERRORS:
+            self.stderr.write(f"... и еще ошибок: {len(errors) - MAX_REPORTED_ERRORS}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Аудитория #{audience.id} «{audience.name}»: добавлено участников — {added}, "
+            f"всего по каналам — {audience.member_counts}, ошибок — {len(errors)}"
+        ))
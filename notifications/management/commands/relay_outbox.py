@@ -0,0 +1,35 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from notifications.tasks import relay_outbox
+
+
+class Command(BaseCommand):
+    help = "Передача записей transactional outbox в очередь Celery"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Разобрать outbox один раз и завершиться")
+
+    def handle(self, *args, **options):
+        batch_size = settings.OUTBOX_RELAY_BATCH_SIZE
+
+        while True:
+            try:
+                relayed = relay_outbox(batch_size)
+            except Exception as e:
+                if options['once']:
+                    raise
+                # Брокер или БД недоступны: записи остались в outbox, повторяем после паузы.
+                self.stderr.write(self.style.ERROR(f"Ошибка передачи outbox: {e}"))
+                close_old_connections()
+                time.sleep(settings.OUTBOX_RELAY_POLL_INTERVAL)
+                continue
+
+            if relayed:
+                self.stdout.write(f"Передано в очередь уведомлений: {relayed}")
+            # Пока outbox отдает полные пачки, он разбирается без пауз.
+            if relayed < batch_size:
+                if options['once']:
+                    return
+                time.sleep(settings.OUTBOX_RELAY_POLL_INTERVAL)
@@ -0,0 +1,67 @@
+import os
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess, start_http_server
+from django.http import HttpRequest, HttpResponse
+
+# Метрики пишутся в памяти процесса, а если задан PROMETHEUS_MULTIPROC_DIR — в файлы
+# этого каталога, откуда их собирает экспортер. Так метрики процессов пула воркеров
+# Celery и процессов веб-сервера отдаются вместе.
+
+LATENCY_BUCKETS = (.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30, 60)
+LAG_BUCKETS = (.1, .5, 1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200)
+SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+API_VALIDATION_SECONDS = Histogram(
+    'notify_api_validation_seconds', "Время валидации запроса на создание уведомлений",
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+API_DB_INSERT_SECONDS = Histogram(
+    'notify_api_db_insert_seconds', "Время сохранения уведомлений, получателей и outbox в БД",
+    ['endpoint'], buckets=LATENCY_BUCKETS
+)
+ENQUEUE_SECONDS = Histogram(
+    'notify_enqueue_seconds', "Время передачи пачки outbox в брокер",
+    buckets=LATENCY_BUCKETS
+)
+ENQUEUED_TOTAL = Counter('notify_enqueued', "Уведомления, переданные из outbox в брокер")
+FANOUT_RECIPIENTS = Histogram(
+    'notify_fanout_recipients', "Количество получателей канала в одной рассылке",
+    ['channel'], buckets=SIZE_BUCKETS
+)
+SEND_BATCH_SECONDS = Histogram(
+    'notify_send_batch_seconds', "Время отправки пачки провайдеру канала",
+    ['channel'], buckets=LATENCY_BUCKETS
+)
+SEND_LAG_SECONDS = Histogram(
+    'notify_send_lag_seconds', "Задержка первой попытки отправки относительно запланированного времени",
+    ['channel'], buckets=LAG_BUCKETS
+)
+SENT_TOTAL = Counter('notify_sent', "Успешно отправленные сообщения", ['channel'])
+SEND_FAILURES_TOTAL = Counter('notify_send_failures', "Ошибки отправки по классам", ['channel', 'error_class'])
+DEFERRED_TOTAL = Counter('notify_deferred', "Пачки, отложенные предохранителем или лимитом конкурентности", ['channel'])
+CACHE_REQUESTS_TOTAL = Counter('notify_cache_requests', "Обращения к кэшу по результату: hit, stale, miss", ['namespace', 'result'])
+
+
+def get_registry() -> CollectorRegistry:
+    """Реестр для экспорта: в многопроцессном режиме собирает метрики всех процессов."""
+    if not os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)  # type: ignore[no-untyped-call]
+    return registry
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Отдает метрики в формате Prometheus."""
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
+
+
+def start_exporter(port: int) -> None:
+    """Запускает HTTP-экспортер метрик в фоновом потоке (для главного процесса воркера Celery)."""
+    start_http_server(port, registry=get_registry())
+
+
+def mark_process_dead(pid: int) -> None:
+    """Удаляет файлы метрик завершившегося процесса в многопроцессном режиме."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(pid)  # type: ignore[no-untyped-call]
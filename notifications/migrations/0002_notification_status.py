@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="completed_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Дата и время завершения рассылки по всем каналам",
+                null=True,
+                verbose_name="Дата завершения",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="pending_channels",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Количество каналов, рассылка по которым еще не завершена",
+                verbose_name="Каналов в обработке",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает отправки"),
+                    ("processing", "Отправляется"),
+                    ("completed", "Отправлено"),
+                ],
+                default="pending",
+                help_text="Статус рассылки уведомления",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_notification_status"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="priority",
+            field=models.PositiveSmallIntegerField(
+                choices=[(0, "Низкий"), (1, "Обычный"), (2, "Высокий")],
+                default=1,
+                help_text="Приоритет рассылки: низкий для массовых рассылок, высокий для транзакционных уведомлений",
+                verbose_name="Приоритет",
+            ),
+        ),
+    ]
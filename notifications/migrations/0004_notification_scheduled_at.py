@@ -0,0 +1,56 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:12
+
+from django.db import migrations, models
+import django.utils.timezone
+
+# Уведомления, созданные до появления планировщика, уже переданы в Celery с countdown,
+# поэтому они переводятся в статус «В очереди», чтобы планировщик не отправил их повторно.
+FORWARD_SQL = """
+UPDATE notifications_notification
+SET scheduled_at = created_at + CASE delay WHEN 1 THEN interval '1 hour' WHEN 2 THEN interval '1 day' ELSE interval '0' END,
+    status = CASE status WHEN 'pending' THEN 'queued' ELSE status END
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0003_notification_priority"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="scheduled_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                help_text="Дата и время, начиная с которых уведомление должно быть отправлено",
+                verbose_name="Время отправки",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает отправки"),
+                    ("queued", "В очереди"),
+                    ("processing", "Отправляется"),
+                    ("completed", "Отправлено"),
+                ],
+                default="pending",
+                help_text="Статус рассылки уведомления",
+                max_length=20,
+                verbose_name="Статус",
+            ),
+        ),
+        migrations.RunSQL(FORWARD_SQL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("status", "pending")),
+                fields=["scheduled_at"],
+                name="notification_pending_due_idx",
+            ),
+        ),
+    ]
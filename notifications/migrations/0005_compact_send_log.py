@@ -0,0 +1,60 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+# Оба столбца переводятся в smallint одним ALTER TABLE, чтобы таблица лога
+# перезаписывалась один раз. Строковые значения отображаются в коды перечислений.
+FORWARD_SQL = """
+ALTER TABLE "notifications_notificationsendlog"
+    ALTER COLUMN "recipient_type" TYPE smallint
+        USING CASE "recipient_type" WHEN 'email' THEN 1 WHEN 'telegram' THEN 2 END,
+    ALTER COLUMN "status" TYPE smallint
+        USING CASE "status" WHEN 'Ok' THEN 1 ELSE 2 END,
+    ADD CONSTRAINT "notifications_notificationsendlog_recipient_type_f0704dcd_check" CHECK ("recipient_type" >= 0),
+    ADD CONSTRAINT "notifications_notificationsendlog_status_43884edb_check" CHECK ("status" >= 0);
+"""
+
+REVERSE_SQL = """
+ALTER TABLE "notifications_notificationsendlog"
+    DROP CONSTRAINT "notifications_notificationsendlog_recipient_type_f0704dcd_check",
+    DROP CONSTRAINT "notifications_notificationsendlog_status_43884edb_check",
+    ALTER COLUMN "recipient_type" TYPE varchar(50)
+        USING CASE "recipient_type" WHEN 1 THEN 'email' WHEN 2 THEN 'telegram' END,
+    ALTER COLUMN "status" TYPE varchar(50)
+        USING CASE "status" WHEN 1 THEN 'Ok' ELSE 'Error' END;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0004_notification_scheduled_at"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(FORWARD_SQL, REVERSE_SQL),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="notificationsendlog",
+                    name="recipient_type",
+                    field=models.PositiveSmallIntegerField(
+                        choices=[(1, "Email"), (2, "Telegram")],
+                        help_text="Тип получателя (Email или телефон)",
+                        verbose_name="Тип получателя",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="notificationsendlog",
+                    name="status",
+                    field=models.PositiveSmallIntegerField(
+                        choices=[(1, "Ok"), (2, "Error")],
+                        help_text="Статус отправки уведомления",
+                        verbose_name="Статус",
+                    ),
+                ),
+            ],
+        ),
+    ]
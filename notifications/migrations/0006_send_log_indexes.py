@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:13
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Индексы строятся через CREATE INDEX CONCURRENTLY, чтобы не блокировать
+    # запись в большие таблицы лога и получателей на время построения.
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0005_compact_send_log"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="notificationsendlog",
+            index=models.Index(
+                fields=["notification", "status"], name="sendlog_notif_status_idx"
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="notificationsendlog",
+            index=models.Index(fields=["-timestamp"], name="sendlog_timestamp_idx"),
+        ),
+        AddIndexConcurrently(
+            model_name="recipient",
+            index=models.Index(
+                fields=["notification", "recepient_type"],
+                name="recipient_notif_type_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Частичный уникальный индекс строится через CREATE UNIQUE INDEX CONCURRENTLY,
+    # чтобы не блокировать создание уведомлений на время построения.
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0007_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="idempotency_key",
+            field=models.CharField(
+                blank=True,
+                help_text="Значение заголовка Idempotency-Key запроса, создавшего уведомление",
+                max_length=255,
+                null=True,
+                verbose_name="Ключ идемпотентности",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    sql=(
+                        'CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS "notification_idempotency_key" '
+                        'ON "notifications_notification" ("idempotency_key") '
+                        'WHERE "idempotency_key" IS NOT NULL'
+                    ),
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS "notification_idempotency_key"',
+                ),
+            ],
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name="notification",
+                    constraint=models.UniqueConstraint(
+                        condition=models.Q(("idempotency_key__isnull", False)),
+                        fields=("idempotency_key",),
+                        name="notification_idempotency_key",
+                    ),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0008_notification_idempotency_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipient",
+            name="attempts",
+            field=models.PositiveSmallIntegerField(
+                default=0,
+                help_text="Количество выполненных попыток отправки",
+                verbose_name="Попыток отправки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipient",
+            name="delivery_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает отправки"),
+                    ("sending", "Отправляется"),
+                    ("sent", "Доставлено"),
+                    ("failed", "Ошибка, ожидает повтора"),
+                    ("dead", "Не доставлено"),
+                ],
+                default="pending",
+                help_text="Статус доставки уведомления получателю",
+                max_length=20,
+                verbose_name="Статус доставки",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipient",
+            name="next_attempt_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="Дата и время повторной отправки после временной ошибки",
+                null=True,
+                verbose_name="Время следующей попытки",
+            ),
+        ),
+    ]
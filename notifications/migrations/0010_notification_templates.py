@@ -0,0 +1,91 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import notifications.rendering
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0009_recipient_delivery_status"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Template",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=150, unique=True, verbose_name="Название"
+                    ),
+                ),
+                (
+                    "body",
+                    models.TextField(
+                        help_text="Текст на языке шаблонов Django, например: Здравствуйте, {{ name }}!",
+                        max_length=1024,
+                        validators=[notifications.rendering.validate_template],
+                        verbose_name="Текст шаблона",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveIntegerField(
+                        default=1, editable=False, verbose_name="Версия"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+                ),
+            ],
+            options={
+                "verbose_name": "Шаблон уведомления",
+                "verbose_name_plural": "Шаблоны уведомлений",
+            },
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="template_version",
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text="Версия шаблона на момент создания уведомления",
+                null=True,
+                verbose_name="Версия шаблона",
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipient",
+            name="context",
+            field=models.JSONField(
+                blank=True,
+                help_text="Значения переменных шаблона уведомления для этого получателя",
+                null=True,
+                verbose_name="Переменные шаблона",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="template",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Шаблон, по которому текст рендерится для каждого получателя; его текст копируется в message",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="notifications",
+                to="notifications.template",
+                verbose_name="Шаблон",
+            ),
+        ),
+    ]
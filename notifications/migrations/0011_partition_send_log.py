@@ -0,0 +1,95 @@
+from datetime import date, datetime, timezone
+
+from django.db import migrations
+
+# Лог отправки переводится на декларативное секционирование Postgres по месяцам
+# поля timestamp. Данные копируются в новую таблицу один раз, индексы и внешний ключ
+# создаются после копирования с прежними именами. Первичный ключ секционированной
+# таблицы должен включать ключ секционирования, поэтому он становится (id, timestamp).
+# На больших таблицах миграцию стоит выполнять в окно обслуживания.
+
+TABLE = "notifications_notificationsendlog"
+OLD_TABLE = f"{TABLE}_old"
+MONTHS_AHEAD = 3
+
+
+def _add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_bound(month):
+    return f"{month:%Y-%m-%d} 00:00:00+00"
+
+
+def _rebuild(schema_editor, partitioned):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s",
+            [TABLE, f"{TABLE}_pkey"],
+        )
+        indexes = cursor.fetchall()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'",
+            [TABLE],
+        )
+        foreign_keys = cursor.fetchall()
+        cursor.execute(f'SELECT min("timestamp"), pg_get_serial_sequence(%s, \'id\') FROM "{TABLE}"', [TABLE])
+        first_timestamp, sequence = cursor.fetchone()
+
+        # Последовательность id переименовывается вместе со старой таблицей,
+        # чтобы у новой таблицы было прежнее имя последовательности.
+        cursor.execute(f'ALTER TABLE "{TABLE}" RENAME TO "{OLD_TABLE}"')
+        cursor.execute(f'ALTER SEQUENCE {sequence} RENAME TO "{OLD_TABLE}_id_seq"')
+        cursor.execute(
+            f'CREATE TABLE "{TABLE}" (LIKE "{OLD_TABLE}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING IDENTITY)'
+            + (' PARTITION BY RANGE ("timestamp")' if partitioned else "")
+        )
+
+        if partitioned:
+            now = datetime.now(timezone.utc)
+            month = date((first_timestamp or now).year, (first_timestamp or now).month, 1)
+            last = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+            while month <= last:
+                cursor.execute(
+                    f'CREATE TABLE "{TABLE}_p{month:%Y_%m}" PARTITION OF "{TABLE}" FOR VALUES FROM (%s) TO (%s)',
+                    [_month_bound(month), _month_bound(_add_months(month, 1))],
+                )
+                month = _add_months(month, 1)
+            cursor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+
+        cursor.execute(f'INSERT INTO "{TABLE}" SELECT * FROM "{OLD_TABLE}"')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), coalesce(max(id), 0) + 1, false) FROM \"{TABLE}\"",
+            [TABLE],
+        )
+        cursor.execute(f'DROP TABLE "{OLD_TABLE}"')
+
+        primary_key = '(id, "timestamp")' if partitioned else "(id)"
+        cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{TABLE}_pkey" PRIMARY KEY {primary_key}')
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE "{TABLE}" ADD CONSTRAINT "{name}" {definition}')
+
+
+def partition(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=True)
+
+
+def unpartition(apps, schema_editor):
+    _rebuild(schema_editor, partitioned=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0010_notification_templates"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition, unpartition),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:43
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.functions.text
+
+# Индексы для поиска в админке. Триграммный индекс требует расширения pg_trgm:
+# если оно недоступно на сервере, индекс не создается и поиск по тексту
+# выполняется без него. Лог отправки секционирован, а CREATE INDEX CONCURRENTLY
+# не поддерживается для секционированных таблиц, поэтому его индекс строится обычным образом.
+
+MESSAGE_TRGM_INDEX = django.contrib.postgres.indexes.GinIndex(
+    django.contrib.postgres.indexes.OpClass(
+        django.db.models.functions.text.Upper("message"),
+        name="gin_trgm_ops",
+    ),
+    name="notification_message_trgm",
+)
+
+
+def _has_trigram(schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return False
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def create_message_trgm_index(apps, schema_editor):
+    if not _has_trigram(schema_editor):
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    model = apps.get_model("notifications", "Notification")
+    schema_editor.add_index(model, MESSAGE_TRGM_INDEX, concurrently=True)
+
+
+def drop_message_trgm_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{MESSAGE_TRGM_INDEX.name}"')
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0011_partition_send_log"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_message_trgm_index, drop_message_trgm_index),
+            ],
+            state_operations=[
+                migrations.AddIndex(model_name="notification", index=MESSAGE_TRGM_INDEX),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="notificationsendlog",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("recipient"),
+                    name="text_pattern_ops",
+                ),
+                name="sendlog_recipient_prefix_idx",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="recipient",
+            index=models.Index(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("recepient"),
+                    name="text_pattern_ops",
+                ),
+                name="recipient_prefix_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 4.2.30 on 2026-10-18 13:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Счетчики существующих уведомлений заполняются одним INSERT ... SELECT по статусам получателей.
+
+
+def backfill_channel_stats(apps, schema_editor):
+    Recipient = apps.get_model("notifications", "Recipient")
+    NotificationChannelStats = apps.get_model("notifications", "NotificationChannelStats")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO "{NotificationChannelStats._meta.db_table}" (notification_id, channel, total, sent, failed) '
+            f"SELECT notification_id, recepient_type, count(*), "
+            f"count(*) FILTER (WHERE delivery_status = 'sent'), count(*) FILTER (WHERE delivery_status = 'dead') "
+            f'FROM "{Recipient._meta.db_table}" GROUP BY notification_id, recepient_type'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0012_admin_search_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationChannelStats",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[("email", "Email"), ("telegram", "Telegram")],
+                        max_length=50,
+                        verbose_name="Канал",
+                    ),
+                ),
+                (
+                    "total",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Количество получателей уведомления в канале",
+                        verbose_name="Получателей",
+                    ),
+                ),
+                (
+                    "sent",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Количество получателей со статусом «Доставлено»",
+                        verbose_name="Доставлено",
+                    ),
+                ),
+                (
+                    "failed",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Количество получателей, отправка которым завершилась ошибкой без повтора",
+                        verbose_name="Не доставлено",
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="channel_stats",
+                        to="notifications.notification",
+                        verbose_name="Уведомление",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Статистика доставки по каналу",
+                "verbose_name_plural": "Статистика доставки по каналам",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="notificationchannelstats",
+            constraint=models.UniqueConstraint(
+                fields=("notification", "channel"), name="channel_stats_notif_channel"
+            ),
+        ),
+        migrations.RunPython(backfill_channel_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,150 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:04
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Индекс по аудитории в таблице уведомлений строится без блокировки записи.
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("notifications", "0013_notification_channel_stats"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Audience",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=150, unique=True, verbose_name="Название"
+                    ),
+                ),
+                (
+                    "member_counts",
+                    models.JSONField(
+                        default=dict,
+                        editable=False,
+                        help_text="Количество участников аудитории в каждом канале, обновляется при загрузке",
+                        verbose_name="Участников по каналам",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name="Дата создания"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Дата изменения"),
+                ),
+            ],
+            options={
+                "verbose_name": "Аудитория",
+                "verbose_name_plural": "Аудитории",
+            },
+        ),
+        migrations.CreateModel(
+            name="AudienceMember",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "recipient",
+                    models.CharField(
+                        help_text="Email или ID Telegram",
+                        max_length=150,
+                        verbose_name="Получатель",
+                    ),
+                ),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[("email", "Email"), ("telegram", "Telegram")],
+                        max_length=50,
+                        verbose_name="Канал",
+                    ),
+                ),
+                (
+                    "context",
+                    models.JSONField(
+                        blank=True,
+                        help_text="Значения переменных шаблона уведомления для этого получателя",
+                        null=True,
+                        verbose_name="Переменные шаблона",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Участник аудитории",
+                "verbose_name_plural": "Участники аудиторий",
+            },
+        ),
+        migrations.AddField(
+            model_name="audiencemember",
+            name="audience",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="members",
+                to="notifications.audience",
+                verbose_name="Аудитория",
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="audience",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="Аудитория, участникам которой отправляется уведомление, вместо списка получателей",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="notifications",
+                to="notifications.audience",
+                verbose_name="Аудитория",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("audience__isnull", False)),
+                fields=["audience"],
+                name="notification_audience_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="audiencemember",
+            index=models.Index(
+                fields=["audience", "channel", "id"], name="audience_member_keyset_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="audiencemember",
+            constraint=models.UniqueConstraint(
+                fields=("audience", "channel", "recipient"),
+                name="audience_member_unique",
+            ),
+        ),
+    ]
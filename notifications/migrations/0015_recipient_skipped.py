@@ -0,0 +1,40 @@
+# Generated by Django 4.2.30 on 2026-10-18 14:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0014_audiences"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notificationchannelstats",
+            name="skipped",
+            field=models.PositiveIntegerField(
+                default=0,
+                help_text="Количество получателей, которым то же сообщение недавно уже отправлялось",
+                verbose_name="Пропущено",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="recipient",
+            name="delivery_status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Ожидает отправки"),
+                    ("sending", "Отправляется"),
+                    ("sent", "Доставлено"),
+                    ("failed", "Ошибка, ожидает повтора"),
+                    ("dead", "Не доставлено"),
+                    ("skipped", "Пропущено как повтор"),
+                ],
+                default="pending",
+                help_text="Статус доставки уведомления получателю",
+                max_length=20,
+                verbose_name="Статус доставки",
+            ),
+        ),
+    ]
@@ -1,10 +1,87 @@
-from typing import Optional
+from typing import Any, Optional
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Upper
 from django.utils import timezone
+from notifications.rendering import validate_template
 
 NULLABLE = {'null': True, 'blank': True}
 
 
+class Template(models.Model):
+    """
+    Модель шаблона уведомления.
+    При изменении текста версия увеличивается: воркеры кэшируют скомпилированный
+    шаблон по паре (id, версия).
+    """
+    name: str = models.CharField(
+        max_length=150,
+        unique=True,
+        verbose_name="Название"
+    )
+    body: str = models.TextField(
+        max_length=1024,
+        validators=[validate_template],
+        verbose_name="Текст шаблона",
+        help_text="Текст на языке шаблонов Django, например: Здравствуйте, {{ name }}!"
+    )
+    version: int = models.PositiveIntegerField(
+        default=1,
+        editable=False,
+        verbose_name="Версия"
+    )
+    updated_at: timezone.datetime = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if self.pk is not None and Template.objects.filter(pk=self.pk).exclude(body=self.body).exists():
+            self.version += 1
+        super().save(*args, **kwargs)
+
+    def __str__(self) -> str:
+        return f"{self.name} (версия {self.version})"
+
+    class Meta:
+        verbose_name = "Шаблон уведомления"
+        verbose_name_plural = "Шаблоны уведомлений"
+
+
+class Audience(models.Model):
+    """
+    Аудитория: сохраненный один раз список получателей (загружается командой import_audience).
+    Уведомление на аудиторию не копирует получателей в Recipient: воркер читает участников
+    пачками при рассылке.
+    """
+    name: str = models.CharField(
+        max_length=150,
+        unique=True,
+        verbose_name="Название"
+    )
+    member_counts: dict = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name="Участников по каналам",
+        help_text="Количество участников аудитории в каждом канале, обновляется при загрузке"
+    )
+    created_at: timezone.datetime = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания"
+    )
+    updated_at: timezone.datetime = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Дата изменения"
+    )
+
+    def __str__(self) -> str:
+        return self.name
+
+    class Meta:
+        verbose_name = "Аудитория"
+        verbose_name_plural = "Аудитории"
+
+
 class Notification(models.Model):
     """
     Модель уведомления.
@@ -15,6 +92,26 @@ class Notification(models.Model):
         (2, '1 день'),
     ]
 
+    PRIORITY_LOW = 0
+    PRIORITY_NORMAL = 1
+    PRIORITY_HIGH = 2
+    PRIORITY_CHOICES = [
+        (PRIORITY_LOW, 'Низкий'),
+        (PRIORITY_NORMAL, 'Обычный'),
+        (PRIORITY_HIGH, 'Высокий'),
+    ]
+
+    PENDING = "pending"
+    QUEUED = "queued"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    STATUS_CHOICES = [
+        (PENDING, "Ожидает отправки"),
+        (QUEUED, "В очереди"),
+        (PROCESSING, "Отправляется"),
+        (COMPLETED, "Отправлено"),
+    ]
+
     message: str = models.TextField(
         max_length=1024,
         verbose_name="Сообщение",
@@ -26,11 +123,68 @@ class Notification(models.Model):
         verbose_name="Задержка",
         help_text="Задержка перед отправкой уведомления"
     )
+    priority: int = models.PositiveSmallIntegerField(
+        default=PRIORITY_NORMAL,
+        choices=PRIORITY_CHOICES,
+        verbose_name="Приоритет",
+        help_text="Приоритет рассылки: низкий для массовых рассылок, высокий для транзакционных уведомлений"
+    )
     created_at: timezone.datetime = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Дата создания",
         help_text="Дата и время создания уведомления"
     )
+    scheduled_at: timezone.datetime = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Время отправки",
+        help_text="Дата и время, начиная с которых уведомление должно быть отправлено"
+    )
+    status: str = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Статус",
+        help_text="Статус рассылки уведомления"
+    )
+    pending_channels: int = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Каналов в обработке",
+        help_text="Количество каналов, рассылка по которым еще не завершена"
+    )
+    completed_at: Optional[timezone.datetime] = models.DateTimeField(
+        **NULLABLE,
+        verbose_name="Дата завершения",
+        help_text="Дата и время завершения рассылки по всем каналам"
+    )
+    idempotency_key: Optional[str] = models.CharField(
+        max_length=255,
+        **NULLABLE,
+        verbose_name="Ключ идемпотентности",
+        help_text="Значение заголовка Idempotency-Key запроса, создавшего уведомление"
+    )
+    template: Optional[Template] = models.ForeignKey(
+        Template,
+        related_name='notifications',
+        on_delete=models.PROTECT,
+        **NULLABLE,
+        verbose_name="Шаблон",
+        help_text="Шаблон, по которому текст рендерится для каждого получателя; его текст копируется в message"
+    )
+    template_version: Optional[int] = models.PositiveIntegerField(
+        **NULLABLE,
+        verbose_name="Версия шаблона",
+        help_text="Версия шаблона на момент создания уведомления"
+    )
+    audience: Optional[Audience] = models.ForeignKey(
+        Audience,
+        related_name='notifications',
+        on_delete=models.PROTECT,
+        **NULLABLE,
+        # Уведомлений на аудитории мало: вместо индекса по всей таблице — частичный в Meta.indexes.
+        db_index=False,
+        verbose_name="Аудитория",
+        help_text="Аудитория, участникам которой отправляется уведомление, вместо списка получателей"
+    )
 
     def __str__(self) -> str:
         return f"Уведомление #{self.id} от {self.created_at}"
@@ -39,6 +193,27 @@ class Notification(models.Model):
         verbose_name = "Уведомление"
         verbose_name_plural = "Уведомления"
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=['scheduled_at'],
+                condition=models.Q(status="pending"),
+                name='notification_pending_due_idx'
+            ),
+            # Поиск по тексту в админке (icontains) — триграммы по UPPER(message).
+            GinIndex(OpClass(Upper('message'), name='gin_trgm_ops'), name='notification_message_trgm'),
+            models.Index(
+                fields=['audience'],
+                condition=models.Q(audience__isnull=False),
+                name='notification_audience_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['idempotency_key'],
+                condition=models.Q(idempotency_key__isnull=False),
+                name='notification_idempotency_key'
+            ),
+        ]
 
 
 class Recipient(models.Model):
@@ -52,6 +227,21 @@ class Recipient(models.Model):
         (TELEGRAM, "Telegram"),
     ]
 
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    DEAD = "dead"
+    SKIPPED = "skipped"
+    DELIVERY_STATUS_CHOICES = [
+        (PENDING, "Ожидает отправки"),
+        (SENDING, "Отправляется"),
+        (SENT, "Доставлено"),
+        (FAILED, "Ошибка, ожидает повтора"),
+        (DEAD, "Не доставлено"),
+        (SKIPPED, "Пропущено как повтор"),
+    ]
+
     notification: Notification = models.ForeignKey(
         Notification,
         related_name='recipients',
@@ -69,13 +259,139 @@ class Recipient(models.Model):
         verbose_name="Тип получателя",
         help_text="Тип получателя (Email или Telegram)"
     )
+    delivery_status: str = models.CharField(
+        max_length=20,
+        choices=DELIVERY_STATUS_CHOICES,
+        default=PENDING,
+        verbose_name="Статус доставки",
+        help_text="Статус доставки уведомления получателю"
+    )
+    attempts: int = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Попыток отправки",
+        help_text="Количество выполненных попыток отправки"
+    )
+    next_attempt_at: Optional[timezone.datetime] = models.DateTimeField(
+        **NULLABLE,
+        verbose_name="Время следующей попытки",
+        help_text="Дата и время повторной отправки после временной ошибки"
+    )
+    context: Optional[dict] = models.JSONField(
+        **NULLABLE,
+        verbose_name="Переменные шаблона",
+        help_text="Значения переменных шаблона уведомления для этого получателя"
+    )
 
     def __str__(self) -> str:
-        return f"Получатель {self.recepient} ({self.recepient_type}) для уведомления #{self.notification.id}"
+        return f"Получатель {self.recepient} ({self.recepient_type}) для уведомления #{self.notification_id}"
 
     class Meta:
         verbose_name = "Получатель уведомления"
         verbose_name_plural = "Получатели уведомлений"
+        indexes = [
+            models.Index(fields=['notification', 'recepient_type'], name='recipient_notif_type_idx'),
+            # Поиск по префиксу адреса в админке (istartswith).
+            models.Index(OpClass(Upper('recepient'), name='text_pattern_ops'), name='recipient_prefix_idx'),
+        ]
+
+
+class AudienceMember(models.Model):
+    """
+    Участник аудитории: адрес получателя, его канал и переменные шаблона.
+    Участники читаются пачками по id внутри канала аудитории (keyset), без OFFSET.
+    """
+    audience: Audience = models.ForeignKey(
+        Audience,
+        related_name='members',
+        on_delete=models.CASCADE,
+        # Поиск по аудитории покрывает индекс (audience, channel, id).
+        db_index=False,
+        verbose_name="Аудитория"
+    )
+    recipient: str = models.CharField(
+        max_length=150,
+        verbose_name="Получатель",
+        help_text="Email или ID Telegram"
+    )
+    channel: str = models.CharField(
+        max_length=50,
+        choices=Recipient.RECEPIENT_TYPE_CHOICES,
+        verbose_name="Канал"
+    )
+    context: Optional[dict] = models.JSONField(
+        **NULLABLE,
+        verbose_name="Переменные шаблона",
+        help_text="Значения переменных шаблона уведомления для этого получателя"
+    )
+
+    def __str__(self) -> str:
+        return f"{self.recipient} ({self.channel}) в аудитории #{self.audience_id}"
+
+    class Meta:
+        verbose_name = "Участник аудитории"
+        verbose_name_plural = "Участники аудиторий"
+        indexes = [
+            models.Index(fields=['audience', 'channel', 'id'], name='audience_member_keyset_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['audience', 'channel', 'recipient'], name='audience_member_unique'),
+        ]
+
+
+class NotificationChannelStats(models.Model):
+    """
+    Счетчики доставки уведомления по каналу.
+    Строка создается вместе с уведомлением и обновляется инкрементально по мере завершения
+    отправок, поэтому статус уведомления читается без подсчета получателей и лога.
+    """
+    notification: Notification = models.ForeignKey(
+        Notification,
+        related_name='channel_stats',
+        on_delete=models.CASCADE,
+        # Поиск по уведомлению покрывает уникальный индекс (notification, channel).
+        db_index=False,
+        verbose_name="Уведомление"
+    )
+    channel: str = models.CharField(
+        max_length=50,
+        choices=Recipient.RECEPIENT_TYPE_CHOICES,
+        verbose_name="Канал"
+    )
+    total: int = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Получателей",
+        help_text="Количество получателей уведомления в канале"
+    )
+    sent: int = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Доставлено",
+        help_text="Количество получателей со статусом «Доставлено»"
+    )
+    failed: int = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Не доставлено",
+        help_text="Количество получателей, отправка которым завершилась ошибкой без повтора"
+    )
+    skipped: int = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Пропущено",
+        help_text="Количество получателей, которым то же сообщение недавно уже отправлялось"
+    )
+
+    @property
+    def pending(self) -> int:
+        """Получатели, отправка которым еще не завершена (в том числе ожидающие повтора)."""
+        return self.total - self.sent - self.failed - self.skipped
+
+    def __str__(self) -> str:
+        return f"Уведомление #{self.notification_id}, {self.channel}: {self.sent}/{self.total}"
+
+    class Meta:
+        verbose_name = "Статистика доставки по каналу"
+        verbose_name_plural = "Статистика доставки по каналам"
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'channel'], name='channel_stats_notif_channel'),
+        ]
 
 
 class NotificationSendLog(models.Model):
@@ -83,9 +399,18 @@ class NotificationSendLog(models.Model):
     Модель для логирования попыток отправки уведомлений.
     """
 
+    OK = 1
+    ERROR = 2
     STATUS_CHOICES = [
-        ('Ok', 'Ok'),
-        ('Error', 'Error'),
+        (OK, 'Ok'),
+        (ERROR, 'Error'),
+    ]
+
+    EMAIL = 1
+    TELEGRAM = 2
+    RECIPIENT_TYPE_CHOICES = [
+        (EMAIL, 'Email'),
+        (TELEGRAM, 'Telegram'),
     ]
 
     notification: Notification = models.ForeignKey(
@@ -97,14 +422,12 @@ class NotificationSendLog(models.Model):
         verbose_name="Получатель",
         help_text="Email или номер телефона получателя"
     )
-    recipient_type: str = models.CharField(
-        max_length=50,
-        choices=[('email', 'Email'), ('telegram', 'Telegram')],
+    recipient_type: int = models.PositiveSmallIntegerField(
+        choices=RECIPIENT_TYPE_CHOICES,
         verbose_name="Тип получателя",
         help_text="Тип получателя (Email или телефон)"
     )
-    status: str = models.CharField(
-        max_length=50,
+    status: int = models.PositiveSmallIntegerField(
         choices=STATUS_CHOICES,
         verbose_name="Статус",
         help_text="Статус отправки уведомления"
@@ -121,9 +444,42 @@ class NotificationSendLog(models.Model):
     )
 
     def __str__(self) -> str:
-        return f"{self.recipient} - {self.status} - {self.timestamp}"
+        return f"{self.recipient} - {self.get_status_display()} - {self.timestamp}"
 
     class Meta:
         verbose_name = 'Лог отправки уведомления'
         verbose_name_plural = 'Логи отправки уведомлений'
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['notification', 'status'], name='sendlog_notif_status_idx'),
+            models.Index(fields=['-timestamp'], name='sendlog_timestamp_idx'),
+            models.Index(OpClass(Upper('recipient'), name='text_pattern_ops'), name='sendlog_recipient_prefix_idx'),
+        ]
+
+
+class OutboxMessage(models.Model):
+    """
+    Запись transactional outbox: уведомление, рассылку которого нужно передать в Celery.
+    Создается в одной транзакции с уведомлением, в брокер ее передает процесс relay_outbox.
+    """
+    notification: Notification = models.ForeignKey(
+        Notification,
+        related_name='outbox_messages',
+        on_delete=models.CASCADE,
+        verbose_name="Уведомление"
+    )
+    priority: int = models.PositiveSmallIntegerField(
+        choices=Notification.PRIORITY_CHOICES,
+        verbose_name="Приоритет"
+    )
+    created_at: timezone.datetime = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Дата создания"
+    )
+
+    def __str__(self) -> str:
+        return f"Outbox: уведомление #{self.notification_id}"
+
+    class Meta:
+        verbose_name = "Сообщение outbox"
+        verbose_name_plural = "Сообщения outbox"
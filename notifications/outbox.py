@@ -0,0 +1,30 @@
+from typing import Iterable, List, Tuple
+from notifications.models import OutboxMessage
+
+
+def add_to_outbox(notifications: Iterable[Tuple[int, int]]) -> None:
+    """
+    Записывает в outbox уведомления, переданные парами (id, приоритет).
+    Вызывается в транзакции, создающей уведомления: запись появится только вместе с ними.
+    """
+    OutboxMessage.objects.bulk_create(
+        OutboxMessage(notification_id=notification_id, priority=priority)
+        for notification_id, priority in notifications
+    )
+
+
+def claim_outbox_batch(batch_size: int) -> List[Tuple[int, int]]:
+    """
+    Забирает и удаляет из outbox пачку самых старых записей.
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет запускать несколько relay без двойной передачи.
+    Должна вызываться внутри транзакции. Возвращает пары (id уведомления, приоритет).
+    """
+    messages = list(
+        OutboxMessage.objects
+        .select_for_update(skip_locked=True)
+        .order_by('id')
+        .values_list('id', 'notification_id', 'priority')[:batch_size]
+    )
+    if messages:
+        OutboxMessage.objects.filter(id__in=[message_id for message_id, _, _ in messages]).delete()
+    return [(notification_id, priority) for _, notification_id, priority in messages]
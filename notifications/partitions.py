@@ -0,0 +1,86 @@
+from datetime import date, datetime, timezone as dt_timezone
+from typing import List, NamedTuple, Optional
+from django.db import connection
+from notifications.models import NotificationSendLog
+
+# Лог отправки в Postgres секционирован по месяцам по полю timestamp (миграция 0011).
+# Строки вне созданных секций попадают в секцию по умолчанию.
+SEND_LOG_TABLE = NotificationSendLog._meta.db_table
+DEFAULT_PARTITION = f"{SEND_LOG_TABLE}_default"
+
+
+class Partition(NamedTuple):
+    name: str
+    month: date
+
+    @property
+    def end(self) -> datetime:
+        return datetime.combine(add_months(self.month, 1), datetime.min.time(), tzinfo=dt_timezone.utc)
+
+
+def add_months(month: date, months: int) -> date:
+    """Первое число месяца, отстоящего от month на months месяцев."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_of(value: datetime) -> date:
+    value = value.astimezone(dt_timezone.utc)
+    return date(value.year, value.month, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{SEND_LOG_TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned() -> bool:
+    """Проверяет, что таблица лога секционирована (только Postgres)."""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [SEND_LOG_TABLE])
+        return cursor.fetchone() is not None
+
+
+def create_partition(month: date) -> bool:
+    """Создает секцию лога за месяц, если ее еще нет. Возвращает True, если секция создана."""
+    name = partition_name(month)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s)", [name])
+        if cursor.fetchone()[0] is not None:
+            return False
+        cursor.execute(
+            f'CREATE TABLE "{name}" PARTITION OF "{SEND_LOG_TABLE}" FOR VALUES FROM (%s) TO (%s)',
+            [f"{month:%Y-%m-%d} 00:00:00+00", f"{add_months(month, 1):%Y-%m-%d} 00:00:00+00"]
+        )
+    return True
+
+
+def ensure_partitions(months_ahead: int, now: Optional[datetime] = None) -> List[str]:
+    """
+    Создает секции лога на текущий и months_ahead следующих месяцев.
+    Секции создаются заранее: секцию нельзя создать, если ее строки уже попали в секцию по умолчанию.
+    """
+    if not is_partitioned():
+        return []
+    current = month_of(now or datetime.now(dt_timezone.utc))
+    months = (add_months(current, offset) for offset in range(months_ahead + 1))
+    return [partition_name(month) for month in months if create_partition(month)]
+
+
+def list_partitions() -> List[Partition]:
+    """Возвращает месячные секции лога в порядке возрастания месяца."""
+    prefix = f"{SEND_LOG_TABLE}_p"
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [SEND_LOG_TABLE]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = [
+        Partition(name, datetime.strptime(name[len(prefix):], '%Y_%m').date())
+        for name in names if name.startswith(prefix)
+    ]
+    return sorted(partitions, key=lambda partition: partition.month)
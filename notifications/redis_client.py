@@ -0,0 +1,51 @@
+import asyncio
+from typing import Optional
+from weakref import WeakKeyDictionary
+import redis
+import redis.asyncio
+from django.conf import settings
+
+_client: Optional[redis.Redis] = None
+# Асинхронные клиенты привязаны к циклу событий, в котором открыты их соединения.
+_async_clients: 'WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.Redis]' = WeakKeyDictionary()
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """
+    Возвращает общий для процесса клиент Redis или None, если REDIS_URL не задан.
+    Redis используется только как ускоритель: вызывающий код должен работать
+    без него и перехватывать redis.RedisError.
+    """
+    global _client
+    if _client is None and settings.REDIS_URL:
+        _client = redis.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return _client
+
+
+def get_async_redis() -> Optional[redis.asyncio.Redis]:
+    """
+    Асинхронный вариант get_redis: общий клиент с пулом соединений для текущего цикла событий
+    или None, если REDIS_URL не задан. Вызывается из корутины.
+    """
+    if not settings.REDIS_URL:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = redis.asyncio.Redis.from_url(
+            settings.REDIS_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        )
+    return client
+
+
+async def close_async_redis() -> None:
+    """Закрывает асинхронный клиент Redis текущего цикла событий."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
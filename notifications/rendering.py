@@ -0,0 +1,75 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.template import Context, Engine, Template, TemplateSyntaxError
+
+# Шаблоны уведомлений — обычный текст (email и Telegram), поэтому HTML-экранирование выключено.
+_engine = Engine(autoescape=False)
+
+
+def compile_template(source: str) -> Template:
+    """Компилирует текст шаблона на языке шаблонов Django."""
+    return _engine.from_string(source)
+
+
+def validate_template(source: str) -> None:
+    """Валидатор поля модели: текст должен быть корректным шаблоном."""
+    try:
+        compile_template(source)
+    except TemplateSyntaxError as e:
+        raise ValidationError(f"Некорректный шаблон: {e}")
+
+
+class CompiledTemplateCache:
+    """
+    LRU скомпилированных шаблонов процесса воркера с ключом (id шаблона, версия).
+    Текст шаблона версии не меняется, поэтому запись кэша не устаревает.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._templates: 'OrderedDict[Tuple[int, int], Template]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def get(self, template_id: int, version: int, source: str) -> Template:
+        key = (template_id, version)
+        template = self._templates.get(key)
+        if template is not None:
+            self._templates.move_to_end(key)
+            return template
+
+        template = compile_template(source)
+        self._templates[key] = template
+        if len(self._templates) > self.max_size:
+            self._templates.popitem(last=False)
+        return template
+
+    def clear(self) -> None:
+        self._templates.clear()
+
+
+template_cache = CompiledTemplateCache(max_size=settings.NOTIFICATION_TEMPLATE_CACHE_SIZE)
+
+
+def render_messages(
+        template_id: int, version: int, source: str, recipients: Iterable[str],
+        contexts: Optional[Dict[str, Dict[str, Any]]] = None
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Рендерит текст для каждого получателя пачки по его переменным.
+    В контексте также доступен адрес получателя (recipient).
+    Возвращает тексты по получателям и ошибки рендеринга по получателям.
+    """
+    template = template_cache.get(template_id, version, source)
+    contexts = contexts or {}
+    messages: Dict[str, str] = {}
+    errors: Dict[str, str] = {}
+    for recipient in recipients:
+        try:
+            messages[recipient] = template.render(Context({'recipient': recipient, **contexts.get(recipient, {})}))
+        except Exception as e:
+            errors[recipient] = f"Ошибка рендеринга шаблона: {e}"
+    return messages, errors
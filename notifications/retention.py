@@ -0,0 +1,129 @@
+import gzip
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import List, Sequence, Type
+from django.db import connection, models, transaction
+from django.db.models import Q, QuerySet
+from notifications.models import Notification, NotificationSendLog, Recipient
+from notifications.partitions import DEFAULT_PARTITION, SEND_LOG_TABLE, is_partitioned, list_partitions
+
+# Таблицы в порядке архивирования: сначала зависимые, затем уведомления.
+RETENTION_TABLES = ('send_log', 'recipient', 'notification')
+
+# Архив — сжатые NDJSON-файлы <каталог>/<таблица>/<имя>.ndjson.gz, по строке row_to_json на запись.
+# Файл пишется во временный и переименовывается до удаления строк из БД,
+# поэтому удаленные строки всегда есть в архиве целиком.
+
+
+def export_rows(path: Path, sql: str, params: Sequence = (), chunk_size: int = 5000) -> int:
+    """Выгружает строки запроса, возвращающего row_to_json, в сжатый NDJSON. Возвращает число строк."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f"{path.name}.tmp")
+    count = 0
+    with transaction.atomic(), connection.chunked_cursor() as cursor, gzip.open(temp_path, 'wt', encoding='utf-8') as file:
+        cursor.execute(sql, params)
+        while rows := cursor.fetchmany(chunk_size):
+            file.writelines(f"{row[0]}\n" for row in rows)
+            count += len(rows)
+    os.replace(temp_path, path)
+    return count
+
+
+def _archive_name(cutoff: datetime, first_id: int) -> str:
+    return f"{cutoff:%Y%m%dT%H%M%S}-{first_id}"
+
+
+def archive_queryset(queryset: QuerySet, archive_dir: Path, cutoff: datetime, batch_size: int) -> int:
+    """
+    Выгружает и удаляет строки queryset пачками по batch_size в порядке id.
+    Каждая пачка выгружается в отдельный файл до удаления. Возвращает число удаленных строк.
+    """
+    deleted = 0
+    while ids := list(queryset.order_by('pk').values_list('pk', flat=True)[:batch_size]):
+        deleted += _archive_batch(queryset.model, ids, archive_dir, cutoff)
+    return deleted
+
+
+def _archive_batch(model: Type[models.Model], ids: List[int], archive_dir: Path, cutoff: datetime) -> int:
+    """Выгружает строки модели с id из ids в отдельный файл и удаляет их. Возвращает число строк."""
+    table = model._meta.db_table
+    with transaction.atomic():
+        export_rows(
+            archive_dir / table / f"{_archive_name(cutoff, ids[0])}.ndjson.gz",
+            f'SELECT row_to_json(t)::text FROM "{table}" t WHERE id = ANY(%s) ORDER BY id', [ids]
+        )
+        model.objects.filter(pk__in=ids).delete()
+    return len(ids)
+
+
+def archive_send_log(archive_dir: Path, cutoff: datetime, batch_size: int) -> int:
+    """
+    Архивирует лог отправки старше cutoff. Месячные секции, целиком старше cutoff,
+    выгружаются и удаляются DROP TABLE без построчного удаления и VACUUM;
+    старые строки секции по умолчанию удаляются пачками.
+    """
+    if not is_partitioned():
+        return archive_queryset(NotificationSendLog.objects.filter(timestamp__lt=cutoff), archive_dir, cutoff, batch_size)
+
+    deleted = 0
+    for partition in list_partitions():
+        if partition.end > cutoff:
+            break
+        with transaction.atomic():
+            deleted += export_rows(
+                archive_dir / SEND_LOG_TABLE / f"{partition.month:%Y-%m}.ndjson.gz",
+                f'SELECT row_to_json(t)::text FROM "{partition.name}" t ORDER BY id'
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE "{partition.name}"')
+
+    # Строки секции по умолчанию читаются пачками по ключу (id > последнего), без загрузки всех id в память.
+    last_id = 0
+    while True:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT id FROM "{DEFAULT_PARTITION}" WHERE "timestamp" < %s AND id > %s ORDER BY id LIMIT %s',
+                [cutoff, last_id, batch_size]
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return deleted
+        deleted += _archive_batch(NotificationSendLog, ids, archive_dir, cutoff)
+        last_id = ids[-1]
+
+
+def completed_before(cutoff: datetime) -> Q:
+    """Условие для уведомлений, рассылка которых завершена раньше cutoff."""
+    return Q(status=Notification.COMPLETED) & (
+        Q(completed_at__lt=cutoff) | Q(completed_at__isnull=True, created_at__lt=cutoff)
+    )
+
+
+def count_expired(table: str, cutoff: datetime) -> int:
+    """Количество строк таблицы, подлежащих архивированию (для --dry-run)."""
+    if table == 'send_log':
+        return NotificationSendLog.objects.filter(timestamp__lt=cutoff).count()
+    if table == 'recipient':
+        return Recipient.objects.filter(
+            notification__in=Notification.objects.filter(completed_before(cutoff))
+        ).count()
+    return Notification.objects.filter(completed_before(cutoff)).count()
+
+
+def archive_expired(table: str, archive_dir: Path, cutoff: datetime, batch_size: int) -> int:
+    """
+    Архивирует и удаляет строки таблицы старше cutoff:
+    send_log — записи лога, recipient — получателей завершенных рассылок,
+    notification — завершенные уведомления. Получатели и лог удаляемых уведомлений
+    архивируются до них, чтобы каскадное удаление не удалило строки без архива.
+    """
+    if table == 'send_log':
+        return archive_send_log(archive_dir, cutoff, batch_size)
+    notifications = Notification.objects.filter(completed_before(cutoff))
+    if table == 'recipient':
+        return archive_queryset(Recipient.objects.filter(notification__in=notifications), archive_dir, cutoff, batch_size)
+
+    archive_queryset(Recipient.objects.filter(notification__in=notifications), archive_dir, cutoff, batch_size)
+    archive_queryset(NotificationSendLog.objects.filter(notification__in=notifications), archive_dir, cutoff, batch_size)
+    return archive_queryset(notifications, archive_dir, cutoff, batch_size)
@@ -0,0 +1,18 @@
+from django.conf import settings
+from notifications.models import Notification
+
+
+def get_channel_queue(recipient_type: str, priority: int) -> str:
+    """
+    Возвращает очередь задач отправки канала.
+    Массовые рассылки с низким приоритетом идут в отдельную очередь канала,
+    чтобы не задерживать транзакционные уведомления.
+    """
+    if priority == Notification.PRIORITY_LOW:
+        return f"{recipient_type}{settings.BULK_QUEUE_SUFFIX}"
+    return recipient_type
+
+
+def get_broker_priority(priority: int) -> int:
+    """Возвращает приоритет сообщения брокера для приоритета уведомления."""
+    return settings.NOTIFICATION_BROKER_PRIORITIES.get(priority, settings.CELERY_TASK_DEFAULT_PRIORITY)
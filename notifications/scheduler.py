@@ -0,0 +1,36 @@
+from datetime import timedelta
+from typing import List, Tuple
+from django.conf import settings
+from django.utils import timezone
+from notifications.cache import NOTIFICATION_STATUS, invalidate
+from notifications.models import Notification
+
+
+def get_schedule(delay: int) -> Tuple[timezone.datetime, str]:
+    """
+    Возвращает время отправки и начальный статус уведомления для задержки.
+    Уведомления без задержки сразу передаются в очередь, отложенные ждут планировщика.
+    """
+    delay_seconds = settings.DELAY_MAPPING.get(delay, 0)
+    status = Notification.QUEUED if delay_seconds == 0 else Notification.PENDING
+    return timezone.now() + timedelta(seconds=delay_seconds), status
+
+
+def claim_due_notifications(batch_size: int) -> List[Tuple[int, int]]:
+    """
+    Забирает пачку наступивших отложенных уведомлений и переводит их в статус «В очереди».
+    SELECT ... FOR UPDATE SKIP LOCKED позволяет нескольким планировщикам работать без двойной отправки.
+    Должна вызываться внутри транзакции. Возвращает пары (id, приоритет).
+    """
+    due = list(
+        Notification.objects
+        .select_for_update(skip_locked=True)
+        .filter(status=Notification.PENDING, scheduled_at__lte=timezone.now())
+        .order_by('scheduled_at')
+        .values_list('id', 'priority')[:batch_size]
+    )
+    if due:
+        notification_ids = [notification_id for notification_id, _ in due]
+        Notification.objects.filter(id__in=notification_ids).update(status=Notification.QUEUED)
+        invalidate(NOTIFICATION_STATUS, *notification_ids)
+    return due
@@ -1,85 +1,204 @@
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
+from django.db.models import QuerySet
 from rest_framework import serializers
-from .models import Notification, Recipient
-from .validators import StrictListField, validate_unique_recipients, validate_email, validate_telegram
+from .cache import get_audience, get_template
+from .models import Audience, Notification, NotificationChannelStats, Recipient, Template
+from .outbox import add_to_outbox
+from .scheduler import get_schedule
+from .stats import build_channel_stats, channel_summary
+from .validators import RecipientListField
 from rest_framework.exceptions import ValidationError
 
 
+def build_notification(validated_data: Dict[str, Any]) -> Tuple[Notification, List[Recipient]]:
+    """
+    Несохраненные уведомление и его получатели по проверенным данным запроса.
+    У уведомления на аудиторию получателей нет: участники читаются при рассылке.
+    """
+    # Получатели уже проверены и классифицированы полем RecipientListField.
+    prepared_recepients = validated_data.get('recepient', [])
+    audience = validated_data.get('audience')
+    if audience is not None:
+        channels = set(audience.member_counts)
+    else:
+        channels = {recepient["recipient_type"] for recepient in prepared_recepients}
+    scheduled_at, status = get_schedule(validated_data['delay'])
+    notification = Notification(
+        message=validated_data['message'],
+        delay=validated_data['delay'],
+        priority=validated_data['priority'],
+        scheduled_at=scheduled_at,
+        status=status,
+        pending_channels=len(channels),
+        idempotency_key=validated_data.get('idempotency_key'),
+        template=validated_data.get('template'),
+        template_version=validated_data.get('template_version'),
+        audience=audience
+    )
+    recipients = [
+        Recipient(
+            notification=notification,
+            recepient=recepient["recipient"],
+            recepient_type=recepient["recipient_type"],
+            context=recepient.get("context")
+        )
+        for recepient in prepared_recepients
+    ]
+    return notification, recipients
+
+
+class CachedRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Поле связанного объекта: объект читается функцией lookup из кэша, в БД — только при промахе.
+    Без lookup объект загружается из queryset поля.
+    """
+
+    def __init__(self, lookup: Optional[Callable[[Any], Optional[models.Model]]] = None, **kwargs: Any) -> None:
+        self.lookup = lookup
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data: Any) -> models.Model:
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = self.queryset.model._meta.pk.to_python(data)
+        except (TypeError, ValueError, DjangoValidationError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        obj = self.get_object(pk)
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+    def get_object(self, pk: Any) -> Optional[models.Model]:
+        if self.lookup is None:
+            return self.get_queryset().filter(pk=pk).first()
+        return self.lookup(pk)
+
+
 class CreateNotificationSerializer(serializers.Serializer):
     message: str
-    recepient: List[str]
+    template: Template
+    audience: Audience
+    recepient: List[Dict[str, Any]]
     delay: int
+    priority: int
 
-    message = serializers.CharField(max_length=1024)
-    recepient = StrictListField(
-        child=serializers.CharField(max_length=150),
-        allow_empty=False,
-        validators=[validate_unique_recipients]
-    )
+    message = serializers.CharField(max_length=1024, required=False)
+    template = CachedRelatedField(queryset=Template.objects.all(), lookup=get_template, required=False)
+    audience = CachedRelatedField(queryset=Audience.objects.all(), lookup=get_audience, required=False)
+    recepient = RecipientListField(required=False)
     delay = serializers.ChoiceField(
         choices=[(0, 'Без задержки'), (1, '1 час'), (2, '1 день')],
         default=0
     )
+    priority = serializers.ChoiceField(
+        choices=Notification.PRIORITY_CHOICES,
+        default=Notification.PRIORITY_NORMAL
+    )
 
     def to_internal_value(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Преобразуем поле 'recepient' в список, если это строка."""
+        """Преобразуем поле 'recepient' в список, если это строка. Без получателей нужна аудитория."""
         recepient = data.get('recepient')
         if isinstance(recepient, str):
             data['recepient'] = [recepient]
-        elif not isinstance(recepient, list):
+        elif not isinstance(recepient, list) and (recepient is not None or data.get('audience') is None):
             raise ValidationError({"recepient": "Поле 'recepient' должно быть строкой или списком строк."})
 
         return super().to_internal_value(data)
 
-    def validate_recepient(self, recepients: List[str]) -> List[Dict[str, str]]:
-        """Валидация получателей в список."""
-        invalid_recipients = []
-        valid_recipients = []
-
-        for recipient in recepients:
-            try:
-                if isinstance(recipient, str):
-                    recipient_value = recipient
-                elif isinstance(recipient, dict):
-                    recipient_value = recipient.get("recipient", "")
-                else:
-                    raise ValidationError
-
-                if '@' in recipient_value:
-                    validate_email(recipient_value)
-                    recipient_type = "email"
-                else:
-                    validate_telegram(recipient_value)
-                    recipient_type = "telegram"
-
-                valid_recipients.append({"recipient": recipient_value, "recipient_type": recipient_type})
-            except ValidationError:
-                invalid_recipients.append({"recipient": recipient, "error": "Некорректный получатель"})
-
-        if invalid_recipients:
-            raise ValidationError(invalid_recipients)
-
-        return valid_recipients
+    def validate(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Нужен текст сообщения или шаблон. Текст шаблона и его версия сохраняются в уведомлении,
+        чтобы изменение шаблона не затрагивало уже созданные рассылки.
+        Получатели задаются списком или непустой аудиторией, но не тем и другим вместе.
+        """
+        audience = attrs.get('audience')
+        if audience is not None:
+            if 'recepient' in attrs:
+                raise ValidationError({"audience": "Укажите получателей или аудиторию, но не то и другое."})
+            if not audience.member_counts:
+                raise ValidationError({"audience": "В аудитории нет участников."})
+        template = attrs.get('template')
+        if template is not None:
+            attrs['message'] = template.body
+            attrs['template_version'] = template.version
+        elif not attrs.get('message'):
+            raise ValidationError({"message": "Укажите текст сообщения или шаблон."})
+        return attrs
 
     def create(self, validated_data: Dict[str, Any]) -> Notification:
-        """Создание уведомления и добавление получателей в БД."""
-        message = validated_data['message']
-        delay = validated_data['delay']
-        recepients = validated_data['recepient']
-
-        prepared_recepients = self.validate_recepient(recepients)
+        """
+        Создание уведомления, его получателей и счетчиков доставки по каналам.
+        Уведомление без задержки в той же транзакции записывается в outbox для передачи в Celery.
+        """
+        notification, recipients = build_notification(validated_data)
+        with transaction.atomic():
+            notification.save()
+            Recipient.objects.bulk_create(recipients)
+            NotificationChannelStats.objects.bulk_create(build_channel_stats(notification, recipients))
+            if notification.status == Notification.QUEUED:
+                add_to_outbox([(notification.id, notification.priority)])
 
-        notification = Notification.objects.create(message=message, delay=delay)
-
-        recipients_to_create = [
-            Recipient(
-                notification=notification,
-                recepient=recepient["recipient"],
-                recepient_type=recepient["recipient_type"]
-            )
-            for recepient in prepared_recepients
-        ]
+        return notification
 
-        Recipient.objects.bulk_create(recipients_to_create)
 
-        return notification
+class PrefetchedRelatedField(CachedRelatedField):
+    """Поле связанного объекта без запроса к БД: объект ищется среди загруженных заранее в context[context_key]."""
+
+    def __init__(self, context_key: str, **kwargs: Any) -> None:
+        self.context_key = context_key
+        super().__init__(**kwargs)
+
+    def get_object(self, pk: Any) -> Optional[models.Model]:
+        return self.context.get(self.context_key, {}).get(pk)
+
+
+class AsyncCreateNotificationSerializer(CreateNotificationSerializer):
+    """
+    Валидация для асинхронного API: те же поля и ошибки, что у CreateNotificationSerializer,
+    но шаблон и аудитория загружаются вызывающим кодом до валидации, чтобы не выполнять
+    синхронный запрос в цикле событий.
+    """
+    template = PrefetchedRelatedField(queryset=Template.objects.none(), context_key='templates', required=False)
+    audience = PrefetchedRelatedField(queryset=Audience.objects.none(), context_key='audiences', required=False)
+
+
+class NotificationStatusSerializer(serializers.Serializer):
+    """
+    Статус уведомления со счетчиками доставки по каналам: {канал: {total, sent, failed, skipped, pending}}.
+    Счетчики читаются из NotificationChannelStats, без подсчета получателей.
+    """
+    id = serializers.IntegerField(read_only=True)
+    message = serializers.CharField(read_only=True)
+    template = serializers.IntegerField(source='template_id', read_only=True)
+    audience = serializers.IntegerField(source='audience_id', read_only=True)
+    status = serializers.CharField(read_only=True)
+    priority = serializers.IntegerField(read_only=True)
+    delay = serializers.IntegerField(read_only=True)
+    created_at = serializers.DateTimeField(read_only=True)
+    scheduled_at = serializers.DateTimeField(read_only=True)
+    completed_at = serializers.DateTimeField(read_only=True)
+    channels = serializers.SerializerMethodField()
+
+    def get_channels(self, notification: Notification) -> Dict[str, Dict[str, Any]]:
+        return channel_summary(notification.channel_stats.all())
+
+
+class NotificationFilterSerializer(serializers.Serializer):
+    """Параметры фильтрации списка уведомлений."""
+    status = serializers.ChoiceField(choices=Notification.STATUS_CHOICES, required=False)
+    priority = serializers.ChoiceField(choices=Notification.PRIORITY_CHOICES, required=False)
+    template = serializers.IntegerField(required=False)
+    audience = serializers.IntegerField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+    def filter(self, queryset: QuerySet) -> QuerySet:
+        """Применяет проверенные параметры к queryset уведомлений."""
+        lookups = {
+            'status': 'status', 'priority': 'priority', 'template': 'template_id', 'audience': 'audience_id',
+            'created_after': 'created_at__gte', 'created_before': 'created_at__lt',
+        }
+        return queryset.filter(**{lookups[name]: value for name, value in self.validated_data.items()})
@@ -1,15 +1,87 @@
-import os
-import requests
+import smtplib
+from typing import Dict, List, Optional
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from notifications.delivery import PERMANENT, REJECTED, TRANSIENT, SendError
 
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+EMAIL_SUBJECT = "Новое уведомление"
 
+# Ошибки, после которых SMTP-соединение считается потерянным и открывается заново.
+SMTP_CONNECTION_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
 
-def send_telegram_message(chat_id: str, message: str) -> requests.Response:
-    """Отправка сообщения в Telegram с использованием бота."""
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    params = {
-        "chat_id": chat_id,
-        "text": message
-    }
-    response: requests.Response = requests.get(url, params=params)
-    return response
+_email_connection: Optional[BaseEmailBackend] = None
+
+
+def get_email_connection() -> BaseEmailBackend:
+    """Возвращает долгоживущее SMTP-соединение текущего процесса воркера."""
+    global _email_connection
+    if _email_connection is None:
+        connection = get_connection(fail_silently=False)
+        connection.open()
+        _email_connection = connection
+    return _email_connection
+
+
+def close_email_connection() -> None:
+    """Закрывает SMTP-соединение процесса, если оно открыто."""
+    global _email_connection
+    connection, _email_connection = _email_connection, None
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+def _send_with_reconnect(email_message: EmailMessage) -> None:
+    """Отправляет письмо через общее соединение, один раз переподключаясь при обрыве."""
+    try:
+        get_email_connection().send_messages([email_message])
+    except SMTP_CONNECTION_ERRORS:
+        close_email_connection()
+        get_email_connection().send_messages([email_message])
+
+
+def classify_email_error(error: Exception, recipient_email: str) -> str:
+    """
+    Определяет класс ошибки SMTP: коды 4xx и обрывы соединения временные, отказ сервера
+    от этого адреса с кодом 5xx — отказ получателя, остальные ответы 5xx (например, на текст письма)
+    постоянные. Ошибки авторизации и отправителя, как и неизвестные ошибки, касаются сервиса
+    и считаются временными.
+    """
+    if isinstance(error, SMTP_CONNECTION_ERRORS + (smtplib.SMTPAuthenticationError, smtplib.SMTPSenderRefused)):
+        return TRANSIENT
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        code = error.recipients.get(recipient_email, (None, b""))[0]
+        return REJECTED if isinstance(code, int) and code >= 500 else TRANSIENT
+    if isinstance(error, smtplib.SMTPResponseException):
+        return PERMANENT if error.smtp_code >= 500 else TRANSIENT
+    return TRANSIENT
+
+
+def send_email_batch(message: str, recipient_emails: List[str]) -> Dict[str, Optional[SendError]]:
+    """
+    Отправка письма пачке получателей через одно SMTP-соединение.
+    Возвращает словарь {email: ошибка или None при успехе}.
+    """
+    results: Dict[str, Optional[SendError]] = {}
+
+    # Письма отправляются по одному через send_messages, чтобы ошибка
+    # одного адреса не прерывала пачку и результат был известен для каждого.
+    for recipient_email in recipient_emails:
+        email_message = EmailMessage(
+            subject=EMAIL_SUBJECT,
+            body=message,
+            from_email=settings.EMAIL_HOST_USER,
+            to=[recipient_email],
+        )
+        try:
+            _send_with_reconnect(email_message)
+            results[recipient_email] = None
+        except Exception as e:
+            if isinstance(e, SMTP_CONNECTION_ERRORS):
+                close_email_connection()
+            results[recipient_email] = SendError(str(e), classify_email_error(e, recipient_email))
+
+    return results
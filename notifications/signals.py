@@ -0,0 +1,28 @@
+from typing import Any
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from notifications.cache import AUDIENCE, NOTIFICATION_STATUS, TEMPLATE, invalidate
+from notifications.models import Audience, Notification, Recipient, Template
+
+# Инвалидация кэша при сохранении через ORM. Массовые UPDATE (queryset.update, bulk_create)
+# сигналов не отправляют, поэтому код, который их выполняет, вызывает invalidate сам.
+
+
+@receiver([post_save, post_delete], sender=Notification)
+def invalidate_notification(sender: type, instance: Notification, **kwargs: Any) -> None:
+    invalidate(NOTIFICATION_STATUS, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Recipient)
+def invalidate_recipient_notification(sender: type, instance: Recipient, **kwargs: Any) -> None:
+    invalidate(NOTIFICATION_STATUS, instance.notification_id)
+
+
+@receiver([post_save, post_delete], sender=Template)
+def invalidate_template(sender: type, instance: Template, **kwargs: Any) -> None:
+    invalidate(TEMPLATE, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Audience)
+def invalidate_audience(sender: type, instance: Audience, **kwargs: Any) -> None:
+    invalidate(AUDIENCE, instance.pk)
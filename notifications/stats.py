@@ -0,0 +1,43 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List
+from django.db.models import F
+from notifications.cache import NOTIFICATION_STATUS, invalidate
+from notifications.models import Notification, NotificationChannelStats, Recipient
+
+
+def build_channel_stats(notification: Notification, recipients: Iterable[Recipient]) -> List[NotificationChannelStats]:
+    """
+    Несохраненные счетчики каналов уведомления по его получателям, а для уведомления на аудиторию —
+    по числу ее участников в каналах. Все получатели ожидают отправки.
+    """
+    if notification.audience is not None:
+        totals = notification.audience.member_counts
+    else:
+        totals = Counter(recipient.recepient_type for recipient in recipients)
+    return [
+        NotificationChannelStats(notification=notification, channel=channel, total=total)
+        for channel, total in totals.items()
+    ]
+
+
+def record_channel_results(notification_id: int, channel: str, sent: int, failed: int, skipped: int = 0) -> None:
+    """
+    Увеличивает счетчики доставленных, недоставленных и пропущенных как повтор получателей канала
+    одним UPDATE и делает устаревшим закэшированный статус уведомления.
+    """
+    if sent or failed or skipped:
+        NotificationChannelStats.objects.filter(notification_id=notification_id, channel=channel).update(
+            sent=F('sent') + sent, failed=F('failed') + failed, skipped=F('skipped') + skipped
+        )
+        invalidate(NOTIFICATION_STATUS, notification_id)
+
+
+def channel_summary(stats: Iterable[NotificationChannelStats]) -> Dict[str, Dict[str, Any]]:
+    """Счетчики по каналам для ответа API: {канал: {total, sent, failed, skipped, pending}}."""
+    return {
+        item.channel: {
+            'total': item.total, 'sent': item.sent, 'failed': item.failed, 'skipped': item.skipped,
+            'pending': item.pending
+        }
+        for item in stats
+    }
@@ -0,0 +1,107 @@
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+
+# Каждый элемент потока возвращается парой (данные, текст ошибки разбора или None).
+StreamItem = Tuple[Any, Optional[str]]
+
+CHUNK_SIZE = 64 * 1024
+MAX_ITEM_SIZE = 1024 * 1024
+
+
+def iter_ndjson(stream: BinaryIO) -> Iterator[StreamItem]:
+    """
+    Построчно читает NDJSON из потока.
+    Ошибка в одной строке не прерывает разбор остальных.
+    """
+    for raw_line in stream:
+        line = raw_line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line), None
+        except ValueError as e:
+            yield None, f"Некорректный JSON: {e}"
+
+
+def iter_json_array(stream: BinaryIO) -> Iterator[StreamItem]:
+    """
+    Инкрементально читает элементы JSON-массива из потока, не загружая тело целиком.
+    Синтаксическая ошибка в массиве завершает разбор.
+    """
+    reader = _JSONArrayReader(stream)
+    try:
+        yield from reader
+    except ValueError as e:
+        yield None, f"Некорректный JSON: {e}"
+
+
+class _JSONArrayReader:
+    """Читает поток кусками и декодирует элементы массива через JSONDecoder.raw_decode."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream = stream
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def __iter__(self) -> Iterator[StreamItem]:
+        if self._next_char() != '[':
+            raise ValueError("ожидался массив")
+        self.position += 1
+
+        if self._next_char() == ']':
+            return
+
+        while True:
+            yield self._decode_item(), None
+
+            char = self._next_char()
+            self.position += 1
+            if char == ']':
+                return
+            if char != ',':
+                raise ValueError("ожидалась ',' или ']'")
+
+    def _read(self) -> bool:
+        """Дочитывает следующий кусок потока. Возвращает False, если поток закончился."""
+        if self.eof:
+            return False
+        data = self.stream.read(CHUNK_SIZE)
+        self.buffer = self.buffer[self.position:] + self.text_decoder.decode(data, final=not data)
+        self.position = 0
+        self.eof = not data
+        return True
+
+    def _next_char(self) -> str:
+        """Пропускает пробельные символы и возвращает следующий символ."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._read():
+                raise ValueError("неожиданный конец данных")
+
+    def _decode_item(self) -> Any:
+        self._next_char()
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(e.msg)
+                item, end = None, None
+
+            # Элемент, который заканчивается ровно на границе буфера, может быть
+            # обрезан (например, число), поэтому он декодируется повторно после дочитывания.
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.position = end
+                return item
+
+            if len(self.buffer) - self.position > MAX_ITEM_SIZE:
+                raise ValueError("элемент массива слишком большой")
+            if not self._read():
+                raise ValueError("неожиданный конец данных")
@@ -1,100 +1,489 @@
-from celery import shared_task
-from django.core.mail import send_mail
+import logging
+import os
+import time
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from celery import Task, chord, group, shared_task
+from celery.signals import task_postrun, task_prerun, worker_init, worker_process_init, worker_process_shutdown
+from django.conf import settings
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F
 from django.utils import timezone
-from config.settings import EMAIL_HOST_USER
-from notifications.models import Notification, NotificationSendLog, Recipient
-from notifications.services import send_telegram_message
+from notifications.cache import NOTIFICATION_STATUS, invalidate
+from notifications.channels import ChannelBackend, get_backend, get_backends
+from notifications.circuit import ChannelGuard
+from notifications.delivery import (
+    PERMANENT, REJECTED, REJECTED_ERROR, SendError, mark_sending, record_delivery, record_skipped,
+    rejected_recipients, remember_rejections
+)
+from notifications.idempotency import drop_recent_duplicates, forget_failed_sends
+from notifications.logbuffer import send_log_buffer
+from notifications import metrics
+from notifications.audiences import iter_members
+from notifications.models import Notification, NotificationChannelStats, NotificationSendLog, Recipient
+from notifications.outbox import add_to_outbox, claim_outbox_batch
+from notifications.partitions import ensure_partitions
+from notifications.rendering import render_messages
+from notifications.routing import get_broker_priority, get_channel_queue
+from notifications.scheduler import claim_due_notifications
+from notifications.services import close_email_connection
+from notifications.telegram import close_telegram_client
+from notifications.utils import chunked
+
+logger = logging.getLogger(__name__)
 
 
 @shared_task
-def send_email_to_recipient_task(notification_id: int, recipient_email: str) -> None:
+def send_email_to_recipient_task(notification_id: int, recipient_email: str, message: Optional[str] = None) -> None:
     """
-    Задача для отправки email одному получателю с учетом задержки.
+    Задача для отправки email одному получателю.
+    Оставлена для задач, уже поставленных в очередь; рассылка идет через send_batch_task.
     """
-    try:
-        notification = Notification.objects.get(id=notification_id)
-
-        send_mail(
-            subject="Новое уведомление",
-            message=notification.message,
-            from_email=EMAIL_HOST_USER,
-            recipient_list=[recipient_email],
-            fail_silently=False
+    send_email_batch_task.delay(notification_id, [recipient_email], message)
+
+
+def _get_message(notification_id: int) -> Optional[Dict[str, Any]]:
+    """Возвращает текст и шаблон уведомления или None, если уведомление удалено."""
+    return Notification.objects.filter(id=notification_id).values('message', 'template_id', 'template_version').first()
+
+
+def _get_contexts(notification_id: int, channel: str, recipients: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Возвращает переменные шаблона получателей пачки."""
+    return dict(
+        Recipient.objects
+        .filter(notification_id=notification_id, recepient_type=channel, recepient__in=recipients, context__isnull=False)
+        .values_list('recepient', 'context')
+    )
+
+
+def _send_rendered(
+        backend: ChannelBackend, template: List[int], source: str, recipients: List[str],
+        contexts: Optional[Dict[str, Dict[str, Any]]]
+) -> Dict[str, Optional[SendError]]:
+    """Рендерит шаблон для каждого получателя и отправляет персональные тексты. Ошибка рендеринга постоянная."""
+    template_id, version = template
+    messages, errors = render_messages(template_id, version, source, recipients, contexts)
+    results: Dict[str, Optional[SendError]] = {
+        recipient: SendError(error, PERMANENT) for recipient, error in errors.items()
+    }
+    if messages:
+        sent = backend.send_personalized(messages)
+        remember_rejections(backend.name, sent)
+        results.update(sent)
+    return results
+
+
+def _log_batch_results(notification_id: int, backend: ChannelBackend, results: Dict[str, Optional[SendError]]) -> Dict[str, int]:
+    """Записывает результаты отправки пачки в лог и возвращает количество успешных и неудачных отправок."""
+    timestamp = timezone.now()
+    send_log_buffer.add(
+        NotificationSendLog(
+            notification_id=notification_id,
+            recipient=recipient,
+            recipient_type=backend.log_code,
+            status=NotificationSendLog.OK if error is None else NotificationSendLog.ERROR,
+            error_message=error,
+            timestamp=timestamp
         )
+        for recipient, error in results.items()
+    )
+
+    failed = 0
+    for recipient, error in results.items():
+        if error is not None:
+            failed += 1
+            metrics.SEND_FAILURES_TOTAL.labels(backend.name, error.error_class).inc()
+            logger.warning("Ошибка отправки %s для %s: %s", backend.name, recipient, error)
+    metrics.SENT_TOTAL.labels(backend.name).inc(len(results) - failed)
+
+    return {'sent': len(results) - failed, 'failed': failed}
+
 
-        NotificationSendLog.objects.create(
-            notification=notification,
-            recipient=recipient_email,
-            recipient_type='email',
-            status='Ok',
-            timestamp=timezone.now()
+def _dispatch_chunks(notification_id: int, backend: ChannelBackend) -> None:
+    """
+    Запускает отправку по каналу одной группой задач-пачек.
+    Текст уведомления читается один раз и передается в задачи-пачки,
+    которые ставятся в очередь канала с приоритетом уведомления.
+    Для уведомления по шаблону вместе с пачкой передаются переменные ее получателей.
+    Получатели, которым то же сообщение недавно уже отправлялось, отсеиваются до постановки пачек
+    и сразу получают статус «Пропущено как повтор».
+    Участники аудитории читаются из нее пачками по ключу, без строк Recipient; итог канала
+    в счетчиках исправляется по числу прочитанных участников.
+    После выполнения всех пачек chord вызывает финализацию уведомления.
+    """
+    notification = (
+        Notification.objects
+        .filter(id=notification_id)
+        .values('message', 'priority', 'scheduled_at', 'template_id', 'template_version', 'audience_id')
+        .first()
+    )
+    if notification is None:
+        return
+
+    batch_size = backend.batch_size
+    audience_total = None
+    if notification['audience_id'] is not None:
+        # Каналы рассылки на аудиторию — те, что были в ней при создании уведомления (строки счетчиков):
+        # только они учтены в pending_channels.
+        audience_total = (
+            NotificationChannelStats.objects
+            .filter(notification_id=notification_id, channel=backend.name)
+            .values_list('total', flat=True)
+            .first()
         )
-    except Exception as e:
-        NotificationSendLog.objects.create(
-            notification=notification,
-            recipient=recipient_email,
-            recipient_type='email',
-            status='Error',
-            error_message=str(e),
-            timestamp=timezone.now()
+        if audience_total is None:
+            return
+        rows = iter_members(notification['audience_id'], backend.name, batch_size)
+    else:
+        rows = (
+            Recipient.objects
+            .filter(notification_id=notification_id, recepient_type=backend.name)
+            .values_list('recepient', 'context')
+            .iterator(chunk_size=batch_size)
         )
-        print(f"Ошибка отправки email для {recipient_email}: {e}")
+    template: Optional[List[int]] = None
+    if notification['template_id'] is not None:
+        template = [notification['template_id'], notification['template_version']]
+    signatures = []
+    total = 0
+    for chunk in chunked(rows, batch_size):
+        total += len(chunk)
+        contexts = dict(chunk)
+        recipients = drop_recent_duplicates(
+            backend.name, notification['message'], [recipient for recipient, _ in chunk], template, contexts
+        )
+        if len(recipients) < len(chunk):
+            kept = set(recipients)
+            record_skipped(
+                notification_id, backend.name, [recipient for recipient, _ in chunk if recipient not in kept],
+                tracked=notification['audience_id'] is None
+            )
+        if not recipients:
+            continue
 
+        kwargs: Dict[str, Any] = {'channel': backend.name, 'scheduled_at': notification['scheduled_at'].timestamp()}
+        if notification['audience_id'] is not None:
+            kwargs['audience_id'] = notification['audience_id']
+        if template is not None:
+            kwargs['template'] = template
+            kwargs['contexts'] = {recipient: contexts[recipient] for recipient in recipients if contexts[recipient]}
+        signatures.append(send_batch_task.signature(
+            (notification_id, recipients, notification['message']), kwargs,
+            queue=get_channel_queue(backend.name, notification['priority']),
+            priority=get_broker_priority(notification['priority'])
+        ))
+    if audience_total is None and not total:
+        return
+    metrics.FANOUT_RECIPIENTS.labels(backend.name).observe(total)
+    if audience_total is not None and audience_total != total:
+        # Состав аудитории изменился после создания уведомления: итог канала — число прочитанных участников.
+        NotificationChannelStats.objects.filter(notification_id=notification_id, channel=backend.name).update(total=total)
+        invalidate(NOTIFICATION_STATUS, notification_id)
 
-@shared_task
-def send_email_notifications_task(notification_id: int, delay_seconds: int) -> None:
+    if Notification.objects.filter(
+        id=notification_id, status__in=[Notification.PENDING, Notification.QUEUED]
+    ).update(status=Notification.PROCESSING):
+        invalidate(NOTIFICATION_STATUS, notification_id)
+    if not signatures:
+        # Все получатели канала отсеяны как повторы или в аудитории не осталось участников канала:
+        # канал завершается без отправки.
+        finalize_notification_task([], notification_id, backend.name)
+        return
+    chord(group(signatures))(finalize_notification_task.s(notification_id, backend.name))
+
+
+def _send_batch(
+        task: Task, backend: ChannelBackend, notification_id: int, recipients: List[str], message: Optional[str],
+        attempt: int
+) -> Dict[str, int]:
     """
-    Задача для запуска задач отправки email для всех получателей.
+    Отправляет пачку через канал и сохраняет статус доставки каждого получателя.
+    Пока предохранитель канала разомкнут или лимит конкурентности исчерпан, задача
+    откладывается через task.retry без отправки и без расхода попыток.
+    Получатели с временными ошибками повторяются одной задачей на пачку
+    с экспоненциальной задержкой по классу ошибки. Получатели, которых канал недавно
+    отклонил постоянной ошибкой, сразу получают статус «Не доставлено» без обращения к провайдеру.
+    С получателей, отправка которым не удалась, снимаются отметки дедупликации.
     """
-    recipients_email = Recipient.objects.filter(notification_id=notification_id, recepient_type='email')
+    task_kwargs = dict(task.request.kwargs or {})
+    if message is None:
+        notification = _get_message(notification_id)
+        if notification is None:
+            logger.warning("Уведомление #%s не найдено", notification_id)
+            metrics.SEND_FAILURES_TOTAL.labels(backend.name, PERMANENT).inc(len(recipients))
+            return {'sent': 0, 'failed': len(recipients)}
+        message = notification['message']
+        if notification['template_id'] is not None:
+            task_kwargs['template'] = [notification['template_id'], notification['template_version']]
+            task_kwargs['contexts'] = _get_contexts(notification_id, backend.name, recipients)
 
-    for recipient in recipients_email:
-        send_email_to_recipient_task.apply_async(
-            args=[notification_id, recipient.recepient],
-            countdown=delay_seconds
+    rejected = rejected_recipients(backend.name, recipients)
+    pending = [recipient for recipient in recipients if recipient not in rejected]
+    results: Dict[str, Optional[SendError]] = {}
+    if pending:
+        results = _deliver(task, backend, notification_id, recipients, pending, message, task_kwargs, attempt)
+    results.update({recipient: SendError(REJECTED_ERROR, REJECTED) for recipient in rejected})
+    counts = _log_batch_results(notification_id, backend, results)
+
+    retry, countdown = record_delivery(
+        notification_id, backend.name, results, attempt, tracked=task_kwargs.get('audience_id') is None
+    )
+    retried = set(retry)
+    failed = [recipient for recipient, error in results.items() if error is not None and recipient not in retried]
+    forget_failed_sends(backend.name, message, failed, task_kwargs.get('template'), task_kwargs.get('contexts'))
+    if retry:
+        raise task.retry(
+            args=(notification_id, retry, message), kwargs={**task_kwargs, 'attempt': attempt + 1},
+            countdown=countdown, max_retries=None
         )
+    return counts
+
+
+def _deliver(
+        task: Task, backend: ChannelBackend, notification_id: int, recipients: List[str], pending: List[str],
+        message: str, task_kwargs: Dict[str, Any], attempt: int
+) -> Dict[str, Optional[SendError]]:
+    """Отправляет получателям pending через предохранитель канала; recipients — вся пачка задачи для отсрочки."""
+    guard = ChannelGuard(backend.name)
+    defer_for = guard.acquire()
+    if defer_for is not None:
+        metrics.DEFERRED_TOTAL.labels(backend.name).inc()
+        raise task.retry(
+            args=(notification_id, recipients, message), kwargs={**task_kwargs, 'attempt': attempt},
+            countdown=defer_for, max_retries=None
+        )
+
+    scheduled_at = task_kwargs.get('scheduled_at')
+    if scheduled_at is not None and attempt == 1:
+        metrics.SEND_LAG_SECONDS.labels(backend.name).observe(max(0.0, time.time() - scheduled_at))
+
+    if task_kwargs.get('audience_id') is None:
+        mark_sending(notification_id, backend.name, pending)
+    results: Dict[str, Optional[SendError]] = {}
+    try:
+        with metrics.SEND_BATCH_SECONDS.labels(backend.name).time():
+            if task_kwargs.get('template') is None:
+                results = backend.send_batch(message, pending)
+                remember_rejections(backend.name, results)
+            else:
+                results = _send_rendered(backend, task_kwargs['template'], message, pending, task_kwargs.get('contexts'))
+    except Exception as error:
+        # Отправка пачки прервалась целиком: класс ошибки каждого получателя определяет канал.
+        text = str(error) or error.__class__.__name__
+        results = {recipient: SendError(text, backend.classify_error(error, recipient)) for recipient in pending}
+    finally:
+        guard.release(results)
+    return results
+
+
+@shared_task(bind=True)
+def send_batch_task(
+        self: Task, notification_id: int, recipients: List[str], message: Optional[str] = None, *,
+        channel: str, attempt: int = 1, scheduled_at: Optional[float] = None,
+        template: Optional[List[int]] = None, contexts: Optional[Dict[str, Dict[str, Any]]] = None,
+        audience_id: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Задача для отправки уведомления пачке получателей канала channel.
+    scheduled_at — запланированное время отправки (timestamp) для метрики задержки.
+    Для уведомления по шаблону message — текст шаблона, template — [id, версия],
+    contexts — переменные шаблона получателей пачки.
+    audience_id — получатели пачки из аудитории: статус доставки ведется только в счетчиках канала.
+    """
+    return _send_batch(self, get_backend(channel), notification_id, recipients, message, attempt)
+
+
+@shared_task
+def dispatch_channel_task(notification_id: int, channel: str) -> None:
+    """
+    Задача для запуска задач отправки по каналу channel пачками получателей.
+    """
+    _dispatch_chunks(notification_id, get_backend(channel))
+
+
+@shared_task(bind=True)
+def send_email_batch_task(
+        self: Task, notification_id: int, recipient_emails: List[str], message: Optional[str] = None, attempt: int = 1
+) -> Dict[str, int]:
+    """
+    Задача для отправки email пачке получателей.
+    Оставлена для задач, уже поставленных в очередь; рассылка идет через send_batch_task.
+    """
+    return _send_batch(self, get_backend('email'), notification_id, recipient_emails, message, attempt)
+
+
+@shared_task
+def send_email_notifications_task(notification_id: int, delay_seconds: int) -> None:
+    """
+    Задача для запуска задач отправки email пачками получателей.
+    Аргумент delay_seconds оставлен для совместимости: задержку учитывает планировщик.
+    """
+    _dispatch_chunks(notification_id, get_backend('email'))
 
 
 @shared_task
-def send_telegram_to_recipient_task(notification_id: int, recipient_telegram: str) -> None:
+def send_telegram_to_recipient_task(notification_id: int, recipient_telegram: str, message: Optional[str] = None) -> None:
     """
     Задача для отправки Telegram сообщения одному получателю.
+    Оставлена для задач, уже поставленных в очередь; рассылка идет через send_batch_task.
     """
-    try:
-        notification = Notification.objects.get(id=notification_id)
-        response = send_telegram_message(recipient_telegram, notification.message)
-
-        if response.status_code == 200:
-            NotificationSendLog.objects.create(
-                notification=notification,
-                recipient=recipient_telegram,
-                recipient_type='telegram',
-                status='Ok',
-                timestamp=timezone.now()
-            )
-        else:
-            raise Exception(f"Ошибка Telegram API, код ответа: {response.status_code}")
-
-    except Exception as e:
-        NotificationSendLog.objects.create(
-            notification=notification,
-            recipient=recipient_telegram,
-            recipient_type='telegram',
-            status='Error',
-            error_message=str(e),
-            timestamp=timezone.now()
-        )
-        print(f"Ошибка отправки в Telegram: {e}")
+    send_telegram_batch_task.delay(notification_id, [recipient_telegram], message)
+
+
+@shared_task(bind=True)
+def send_telegram_batch_task(
+        self: Task, notification_id: int, chat_ids: List[str], message: Optional[str] = None, attempt: int = 1
+) -> Dict[str, int]:
+    """
+    Задача для отправки Telegram сообщений пачке получателей.
+    Оставлена для задач, уже поставленных в очередь; рассылка идет через send_batch_task.
+    """
+    return _send_batch(self, get_backend('telegram'), notification_id, chat_ids, message, attempt)
 
 
 @shared_task
 def send_telegram_notification_task(notification_id: int, delay_seconds: int) -> None:
     """
-    Задача для запуска задач отправки Telegram сообщений для всех получателей.
+    Задача для запуска задач отправки Telegram сообщений пачками получателей.
+    Аргумент delay_seconds оставлен для совместимости: задержку учитывает планировщик.
+    """
+    _dispatch_chunks(notification_id, get_backend('telegram'))
+
+
+@shared_task
+def finalize_notification_task(results: List[Dict[str, int]], notification_id: int, recipient_type: str) -> None:
+    """
+    Задача-колбэк chord: отмечает завершение рассылки по каналу.
+    Итог берется из счетчиков канала, так как пачки с повторами
+    возвращают результат только последней попытки.
+    Когда завершены все каналы, уведомление переводится в статус «Отправлено».
+    """
+    stats = NotificationChannelStats.objects.filter(notification_id=notification_id, channel=recipient_type).first()
+    if stats is not None:
+        logger.info(
+            "Рассылка %s уведомления #%s завершена: доставлено %s, не доставлено %s",
+            recipient_type, notification_id, stats.sent, stats.failed
+        )
+
+    Notification.objects.filter(id=notification_id, pending_channels__gt=0).update(
+        pending_channels=F('pending_channels') - 1
+    )
+    if Notification.objects.filter(id=notification_id, pending_channels=0).exclude(
+        status=Notification.COMPLETED
+    ).update(status=Notification.COMPLETED, completed_at=timezone.now()):
+        invalidate(NOTIFICATION_STATUS, notification_id)
+
+
+@shared_task
+def dispatch_notifications_task(notification_ids: List[int]) -> None:
+    """
+    Задача для запуска рассылки пачки уведомлений.
+    Рассылка запускается, только если уведомление удалось перевести из статуса «В очереди»
+    в «Отправляется», поэтому повторно доставленная задача не отправит его второй раз.
     """
-    recipients_telegram = Recipient.objects.filter(notification_id=notification_id, recepient_type='telegram')
-    for recipient in recipients_telegram:
-        send_telegram_to_recipient_task.apply_async(
-            args=[notification_id, recipient.recepient],
-            countdown=delay_seconds
+    for notification_id in notification_ids:
+        claimed = Notification.objects.filter(id=notification_id, status=Notification.QUEUED).update(
+            status=Notification.PROCESSING
         )
+        if not claimed:
+            continue
+        invalidate(NOTIFICATION_STATUS, notification_id)
+        for backend in get_backends().values():
+            _dispatch_chunks(notification_id, backend)
+
+
+def enqueue_dispatch(notifications: Iterable[Tuple[int, int]]) -> None:
+    """Ставит в очередь рассылку уведомлений, переданных парами (id, приоритет), — одну задачу на приоритет."""
+    ids_by_priority: Dict[int, List[int]] = defaultdict(list)
+    for notification_id, priority in notifications:
+        ids_by_priority[priority].append(notification_id)
+
+    for priority, notification_ids in ids_by_priority.items():
+        dispatch_notifications_task.apply_async(args=[notification_ids], priority=get_broker_priority(priority))
+
+
+@shared_task
+def create_send_log_partitions_task() -> List[str]:
+    """Периодическая задача: заранее создает месячные секции лога отправки."""
+    return ensure_partitions(settings.SEND_LOG_PARTITIONS_AHEAD)
+
+
+@shared_task
+def dispatch_due_notifications_task() -> int:
+    """
+    Периодическая задача планировщика: передает наступившие отложенные уведомления в outbox.
+    Уведомления забираются из БД пачками, поэтому память не зависит от числа ожидающих отправок.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            due = claim_due_notifications(settings.SCHEDULER_BATCH_SIZE)
+            add_to_outbox(due)
+        total += len(due)
+        if len(due) < settings.SCHEDULER_BATCH_SIZE:
+            return total
+
+
+def relay_outbox(batch_size: int) -> int:
+    """
+    Передает одну пачку записей outbox в Celery и возвращает их количество.
+    Задачи публикуются до фиксации транзакции: если брокер недоступен, записи
+    останутся в outbox. Если же не удалась фиксация, повторную публикацию
+    отсечет dispatch_notifications_task по статусу уведомления.
+    """
+    with transaction.atomic():
+        messages = claim_outbox_batch(batch_size)
+        with metrics.ENQUEUE_SECONDS.time():
+            enqueue_dispatch(messages)
+    metrics.ENQUEUED_TOTAL.inc(len(messages))
+    return len(messages)
+
+
+@task_postrun.connect
+def flush_send_log(state: Optional[str] = None, **kwargs: Any) -> None:
+    """Сбрасывает буфер лога по лимиту, а после упавшей задачи — сразу."""
+    if state == 'FAILURE':
+        send_log_buffer.flush()
+    else:
+        send_log_buffer.flush_if_due()
+
+
+@task_prerun.connect
+@task_postrun.connect
+def close_stale_db_connections(task: Optional[Task] = None, **kwargs: Any) -> None:
+    """
+    Закрывает соединения процесса воркера с БД старше CONN_MAX_AGE или после ошибки,
+    как Django в начале и конце запроса; остальные переиспользуются следующей задачей.
+    Задачи, выполняемые синхронно (eager), работают в соединении вызывающего кода.
+    """
+    if task is not None and not task.request.is_eager:
+        close_old_connections()
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs: Any) -> None:
+    """Запускает в главном процессе воркера экспортер метрик всех процессов пула."""
+    if settings.CELERY_METRICS_PORT:
+        metrics.start_exporter(settings.CELERY_METRICS_PORT)
+
+
+@worker_init.connect
+@worker_process_init.connect
+def start_send_log_flusher(**kwargs: Any) -> None:
+    """
+    Запускает периодический сброс буфера лога в процессе, выполняющем задачи:
+    в процессах пула prefork и в главном процессе воркера с пулом solo или threads.
+    """
+    send_log_buffer.start_periodic_flush()
+
+
+@worker_process_shutdown.connect
+def close_worker_connections(**kwargs: Any) -> None:
+    """Сохраняет буфер лога и закрывает соединения при остановке процесса воркера."""
+    try:
+        send_log_buffer.flush()
+    finally:
+        close_email_connection()
+        close_telegram_client()
+        connections.close_all()
+        metrics.mark_process_dead(os.getpid())
@@ -0,0 +1,297 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Coroutine, Dict, Iterable, Optional, TypeVar
+import httpx
+import redis
+from django.conf import settings
+from notifications.delivery import PERMANENT, RATE_LIMITED, REJECTED, TRANSIENT, SendError
+from notifications.redis_client import get_async_redis
+
+T = TypeVar('T')
+
+# Время ожидания после 429, если Telegram не вернул корректный retry_after.
+DEFAULT_RETRY_AFTER = 1.0
+
+# Описания ответов Telegram, которые относятся к самому чату, а не к боту или тексту сообщения.
+REJECTED_DESCRIPTIONS = {
+    400: ("chat not found",),
+    403: ("bot was blocked", "bot was kicked", "user is deactivated"),
+}
+
+# Лимиты Telegram действуют на бота, поэтому при наличии Redis бюджет общий для всех процессов
+# и задач. Скрипт резервирует время отправки (мс по часам Redis) и возвращает, сколько ждать:
+# общий лимит — по алгоритму GCRA (KEYS[1] — теоретическое время следующего сообщения),
+# интервал чата — по времени, раньше которого в чат писать нельзя (KEYS[2]).
+# ARGV: интервал между сообщениями бота, допустимый всплеск, интервал чата (мс).
+RESERVE_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local interval, burst, chat_interval = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local tat = math.max(tonumber(redis.call('GET', KEYS[1]) or now), now)
+local send_at = math.max(tat - burst, tonumber(redis.call('GET', KEYS[2]) or now), now)
+tat = math.max(tat, send_at) + interval
+redis.call('SET', KEYS[1], tostring(tat), 'PX', math.ceil(tat - now) + 1000)
+redis.call('SET', KEYS[2], tostring(send_at + chat_interval), 'PX', math.ceil(send_at + chat_interval - now) + 1000)
+return tostring(send_at - now)
+"""
+# Пауза всего бота по retry_after: следующее сообщение не раньше чем через ARGV[1] мс.
+PAUSE_SCRIPT = """
+local time = redis.call('TIME')
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+local until_at = now + tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if until_at > tat then
+    redis.call('SET', KEYS[1], tostring(until_at), 'PX', math.ceil(until_at - now) + 1000)
+end
+return 1
+"""
+
+
+class RateLimiter:
+    """
+    Асинхронный ограничитель частоты запросов по алгоритму token bucket.
+    Поддерживает паузу всего потока запросов, например по retry_after от Telegram.
+    clock и sleep — источник времени и ожидание (в тестах подменяются искусственными часами).
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            capacity: Optional[float] = None,
+            clock: Callable[[], float] = time.monotonic,
+            sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def pause(self, seconds: float) -> None:
+        """Приостанавливает выдачу разрешений на указанное число секунд."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    async def acquire(self) -> None:
+        """Ожидает разрешения на отправку одного запроса."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await self._sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self.rate)
+
+
+class TelegramAPIError(Exception):
+    """Ответ Telegram Bot API с кодом ошибки и описанием из поля description."""
+
+    def __init__(self, status_code: int, description: str = "") -> None:
+        self.status_code = status_code
+        self.description = description
+        super().__init__(f"Ошибка Telegram API, код ответа: {status_code}")
+
+
+def classify_telegram_error(error: Exception) -> str:
+    """
+    Определяет класс ошибки Telegram: 429 — превышение лимита; чат не найден, бот заблокирован
+    или удален из чата — отказ получателя; 401, 404 (неверный токен бота), 5xx и сетевые ошибки
+    относятся к сервису и временные; остальные 4xx (например, слишком длинный текст) постоянные.
+    """
+    if not isinstance(error, TelegramAPIError) or error.status_code in (401, 404) or error.status_code >= 500:
+        return TRANSIENT
+    if error.status_code == 429:
+        return RATE_LIMITED
+    description = error.description.lower()
+    if any(reason in description for reason in REJECTED_DESCRIPTIONS.get(error.status_code, ())):
+        return REJECTED
+    return PERMANENT
+
+
+def _send_error(error: Exception) -> SendError:
+    return SendError(str(error) or error.__class__.__name__, classify_telegram_error(error))
+
+
+class TelegramClient:
+    """
+    Асинхронный клиент Telegram Bot API.
+    Использует общий пул keep-alive соединений, глобальный лимит сообщений в секунду,
+    интервал между сообщениями в один чат и учитывает retry_after в ответах 429.
+    Лимиты общие для всех процессов через Redis; без Redis они действуют в пределах процесса.
+    """
+
+    def __init__(
+            self,
+            token: Optional[str],
+            base_url: str = "https://api.telegram.org",
+            timeout: float = 10.0,
+            max_connections: int = 20,
+            rate_limit: float = 30.0,
+            chat_interval: float = 1.0,
+            max_retries: int = 3,
+    ) -> None:
+        self.url = f"{base_url.rstrip('/')}/bot{token}/sendMessage"
+        # Ключи Redis по id бота (часть токена до двоеточия), сам токен в Redis не попадает.
+        self.redis_prefix = f"notify:telegram:{(token or '').split(':')[0]}"
+        self.max_connections = max_connections
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.rate_limiter = RateLimiter(rate_limit)
+        self._chat_next_send: Dict[str, float] = {}
+        self._http = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def _throttle(self, chat_id: str) -> None:
+        """Ожидает разрешения на отправку сообщения в чат по лимиту бота и интервалу чата."""
+        client = get_async_redis()
+        if client is not None:
+            try:
+                delay = await client.register_script(RESERVE_SCRIPT)(
+                    keys=[f"{self.redis_prefix}:rate", f"{self.redis_prefix}:chat:{chat_id}"],
+                    args=[
+                        1000 / self.rate_limiter.rate,
+                        1000 * (self.rate_limiter.capacity - 1) / self.rate_limiter.rate,
+                        1000 * self.chat_interval
+                    ]
+                )
+            except redis.RedisError:
+                pass
+            else:
+                if float(delay) > 0:
+                    await asyncio.sleep(float(delay) / 1000)
+                return
+        await self._wait_for_chat(chat_id)
+        await self.rate_limiter.acquire()
+
+    async def _pause(self, seconds: float) -> None:
+        """Приостанавливает отправку всех сообщений бота на seconds секунд."""
+        self.rate_limiter.pause(seconds)
+        client = get_async_redis()
+        if client is not None:
+            try:
+                await client.register_script(PAUSE_SCRIPT)(keys=[f"{self.redis_prefix}:rate"], args=[1000 * seconds])
+            except redis.RedisError:
+                pass
+
+    async def _wait_for_chat(self, chat_id: str) -> None:
+        """Выдерживает интервал между сообщениями в один и тот же чат."""
+        now = time.monotonic()
+        next_send = self._chat_next_send.get(chat_id, now)
+        self._chat_next_send[chat_id] = max(now, next_send) + self.chat_interval
+        if next_send > now:
+            await asyncio.sleep(next_send - now)
+
+        if len(self._chat_next_send) > 10000:
+            self._chat_next_send = {key: value for key, value in self._chat_next_send.items() if value > now}
+
+    async def send_message(self, chat_id: str, message: str) -> Optional[SendError]:
+        """Отправляет сообщение в чат. Возвращает ошибку или None при успехе."""
+        for _ in range(self.max_retries + 1):
+            await self._throttle(chat_id)
+            try:
+                response = await self._http.post(self.url, json={"chat_id": chat_id, "text": message})
+            except httpx.HTTPError as e:
+                return _send_error(e)
+
+            if response.status_code == 200:
+                return None
+            if response.status_code != 429:
+                return _send_error(TelegramAPIError(response.status_code, _description(response)))
+
+            await self._pause(_retry_after(response))
+
+        return _send_error(TelegramAPIError(429))
+
+    async def send_many(self, chat_ids: Iterable[str], message: str) -> Dict[str, Optional[SendError]]:
+        """Конкурентно отправляет сообщение списку чатов."""
+        return await self.send_each({chat_id: message for chat_id in chat_ids})
+
+    async def send_each(self, messages: Dict[str, str]) -> Dict[str, Optional[SendError]]:
+        """Конкурентно отправляет каждому чату свой текст ({chat_id: текст})."""
+        semaphore = asyncio.Semaphore(self.max_connections)
+
+        async def send(chat_id: str, message: str) -> Optional[SendError]:
+            async with semaphore:
+                return await self.send_message(chat_id, message)
+
+        errors = await asyncio.gather(*(send(chat_id, message) for chat_id, message in messages.items()))
+        return dict(zip(messages, errors))
+
+
+def _description(response: httpx.Response) -> str:
+    """Достает описание ошибки из ответа Telegram; пустая строка, если тело не JSON."""
+    try:
+        description = response.json()["description"]
+    except (ValueError, KeyError, TypeError):
+        return ""
+    return description if isinstance(description, str) else ""
+
+
+def _retry_after(response: httpx.Response) -> float:
+    """Достает retry_after из ответа 429 Telegram; DEFAULT_RETRY_AFTER, если значение некорректно."""
+    try:
+        value = response.json()["parameters"]["retry_after"]
+    except (ValueError, KeyError, TypeError):
+        value = response.headers.get("Retry-After")
+    try:
+        seconds = float(value)
+    except (ValueError, TypeError):
+        return DEFAULT_RETRY_AFTER
+    return seconds if 0 <= seconds < float('inf') else DEFAULT_RETRY_AFTER
+
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_client: Optional[TelegramClient] = None
+
+
+def run_in_worker_loop(coroutine: Coroutine[Any, Any, T]) -> T:
+    """
+    Выполняет корутину в event loop процесса воркера.
+    Loop живет между задачами, чтобы пул соединений клиента переиспользовался.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coroutine)
+
+
+def get_telegram_client() -> TelegramClient:
+    """Возвращает общий для процесса воркера клиент Telegram."""
+    global _client
+    if _client is None:
+        _client = TelegramClient(
+            token=settings.TELEGRAM_BOT_TOKEN,
+            base_url=settings.TELEGRAM_API_URL,
+            timeout=settings.TELEGRAM_TIMEOUT,
+            max_connections=settings.TELEGRAM_MAX_CONNECTIONS,
+            rate_limit=settings.TELEGRAM_RATE_LIMIT,
+            chat_interval=settings.TELEGRAM_CHAT_INTERVAL,
+            max_retries=settings.TELEGRAM_MAX_RETRIES,
+        )
+    return _client
+
+
+def close_telegram_client() -> None:
+    """Закрывает клиент Telegram и event loop процесса воркера."""
+    global _client, _loop
+    client, _client = _client, None
+    if client is not None and _loop is not None and not _loop.is_closed():
+        _loop.run_until_complete(client.aclose())
+    if _loop is not None:
+        _loop.close()
+        _loop = None
@@ -1,7 +1,12 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from notifications.async_views import AsyncNotificationCreateView
 from notifications.views import NotificationViewSet
 
 router = DefaultRouter()
 router.register(r'notify', NotificationViewSet, basename='notification')
 
-urlpatterns = router.urls
+# Создание уведомления обрабатывает асинхронное представление; остальные маршруты — ViewSet.
+urlpatterns = [
+    path('notify/', AsyncNotificationCreateView.as_view(), name='notification-create'),
+] + router.urls
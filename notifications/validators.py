@@ -1,42 +1,74 @@
-import re
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import ListField
-from typing import List
+from rest_framework.fields import Field
+from typing import Any, Dict, List, Optional, Set, Tuple
+from notifications.channels import detect_channel
 
+RECIPIENT_MAX_LENGTH = 150
 
-class StrictListField(ListField):
-    """Кастомное поле, которое проверяет, что это список строк."""
 
-    def to_internal_value(self, data: List[str]) -> List[str]:
-        if not isinstance(data, list):
-            raise ValidationError("Поле должно быть списком.")
+def classify_recipients(values: List[Any]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Проверка и классификация получателей за один проход.
+    Получатель — строка или объект {"recipient": ..., "context": {...}} с переменными шаблона.
+    Проверяет тип и длину, уникальность и принадлежность адреса одному из каналов доставки.
+    Возвращает список корректных получателей с типом и список ошибок.
+    """
+    valid_recipients: List[Dict[str, Any]] = []
+    invalid_recipients: List[Dict[str, Any]] = []
+    seen: Set[str] = set()
 
-        for item in data:
-            if not isinstance(item, str):
-                raise ValidationError(f"Элемент списка '{item}' должен быть строкой.")
-            if not item:
-                raise ValidationError(f"Элемент списка не может быть пустым или None.")
+    for item in values:
+        recipient_type: Optional[str] = None
+        value: Any
+        error: Optional[str]
+        value, context = (item.get('recipient'), item.get('context')) if isinstance(item, dict) else (item, None)
+        if context is not None and not isinstance(context, dict):
+            error = "Переменные шаблона получателя должны быть объектом."
+        elif not isinstance(value, str):
+            error = "Получатель должен быть строкой."
+        elif not value:
+            error = "Получатель не может быть пустым."
+        elif len(value) > RECIPIENT_MAX_LENGTH:
+            error = f"Длина получателя не может превышать {RECIPIENT_MAX_LENGTH} символов."
+        elif value in seen:
+            error = "Получатели должны быть уникальными."
+        else:
+            recipient_type = detect_channel(value)
+            error = None if recipient_type is not None else "Некорректный получатель"
 
-        return super().to_internal_value(data)
+        if error is None:
+            seen.add(value)
+            recipient: Dict[str, Any] = {"recipient": value, "recipient_type": recipient_type}
+            if context:
+                recipient["context"] = context
+            valid_recipients.append(recipient)
+        else:
+            invalid_recipients.append({"recipient": value, "error": error})
 
+    return valid_recipients, invalid_recipients
 
-def validate_unique_recipients(value: List[str]) -> List[str]:
-    """Проверка на уникальность значений в списке."""
-    if len(value) != len(set(value)):
-        raise ValidationError("Получатели должны быть уникальными.")
-    return value
 
+class RecipientListField(Field):
+    """
+    Поле списка получателей: валидирует и классифицирует получателей за один проход.
+    Возвращает список словарей {"recipient": ..., "recipient_type": ..., "context": ...},
+    где context есть только у получателей с переменными шаблона.
+    """
+    default_error_messages = {
+        'not_a_list': "Поле должно быть списком.",
+        'empty': "Список получателей не может быть пустым.",
+    }
 
-def validate_email(value: str) -> str:
-    """Проверка на правильность формата email."""
-    email_regex = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    if not re.match(email_regex, value):
-        raise ValidationError
-    return value
+    def to_internal_value(self, data: Any) -> List[Dict[str, Any]]:
+        if not isinstance(data, list):
+            self.fail('not_a_list')
+        if not data:
+            self.fail('empty')
 
+        valid_recipients, invalid_recipients = classify_recipients(data)
+        if invalid_recipients:
+            raise ValidationError(invalid_recipients)
+        return valid_recipients
 
-def validate_telegram(value: str) -> str:
-    """Проверка, что это только цифры для Телеграма."""
-    if not value.isdigit():
-        raise ValidationError
-    return value
+    def to_representation(self, value: List[Dict[str, Any]]) -> List[str]:
+        return [recipient["recipient"] for recipient in value]
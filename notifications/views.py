@@ -1,25 +1,82 @@
 from django.conf import settings
+from django.db import IntegrityError
 from rest_framework import viewsets
+from django.http import Http404
+from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError, UnsupportedMediaType
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.request import Request
-from notifications.serializers import CreateNotificationSerializer
-from notifications.tasks import send_email_notifications_task, send_telegram_notification_task
+from notifications.cache import NOTIFICATION_STATUS, cache_aside
+from notifications.idempotency import IDEMPOTENCY_KEY_MAX_LENGTH, cache_response, get_cached_response
+from notifications.ingestion import create_notifications
+from notifications.metrics import API_DB_INSERT_SECONDS, API_VALIDATION_SECONDS
+from notifications.models import Notification
+from notifications.serializers import (
+    CreateNotificationSerializer, NotificationFilterSerializer, NotificationStatusSerializer
+)
+from notifications.streaming import iter_json_array, iter_ndjson
 from drf_yasg.utils import swagger_auto_schema
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl', 'application/json-seq')
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Постраничный вывод уведомлений по курсору от новых к старым, без OFFSET и COUNT(*)."""
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+
+    def get_page_size(self, request: Request) -> Optional[int]:
+        self.page_size = settings.NOTIFY_LIST_PAGE_SIZE
+        return super().get_page_size(request)
+
 
 class NotificationViewSet(viewsets.ViewSet):
     """
-    ViewSet для создания уведомлений.
+    ViewSet для создания уведомлений и чтения их статуса доставки.
     """
-    http_method_names: List[str] = ['post']
+    http_method_names: List[str] = ['get', 'post']
+    lookup_value_regex = r'\d+'
 
     @swagger_auto_schema(
-        request_body=CreateNotificationSerializer,
-        responses={201: 'Успех', 400: 'Ошибка'}
+        query_serializer=NotificationFilterSerializer,
+        responses={200: NotificationStatusSerializer(many=True), 400: 'Ошибка'}
     )
+    def list(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Список уведомлений со счетчиками доставки по каналам.
+        Фильтры: status, priority, template, created_after, created_before; страницы — по курсору.
+        """
+        filters = NotificationFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        paginator = NotificationCursorPagination()
+        page = paginator.paginate_queryset(
+            filters.filter(Notification.objects.prefetch_related('channel_stats')), request, view=self
+        )
+        return paginator.get_paginated_response(NotificationStatusSerializer(page, many=True).data)
+
+    @swagger_auto_schema(responses={200: NotificationStatusSerializer, 404: 'Не найдено'})
+    def retrieve(self, request: Request, pk: str, *args: Any, **kwargs: Any) -> Response:
+        """
+        Статус уведомления: счетчики доставленных, недоставленных и ожидающих получателей по каналам.
+        Ответ кэшируется и становится устаревшим при изменении уведомления или его счетчиков.
+        """
+        data = cache_aside(NOTIFICATION_STATUS, int(pk), lambda: self._status_data(int(pk)))
+        if data is None:
+            raise Http404
+        return Response(data)
+
+    def _status_data(self, notification_id: int) -> Optional[Dict[str, Any]]:
+        """Статус уведомления из БД или None, если уведомления нет."""
+        notification = Notification.objects.prefetch_related('channel_stats').filter(pk=notification_id).first()
+        return dict(NotificationStatusSerializer(notification).data) if notification is not None else None
+
     def format_date(self, created_at: str) -> str:
         """
         Форматирует дату в более читабельный формат.
@@ -27,29 +84,131 @@ class NotificationViewSet(viewsets.ViewSet):
         date_obj = datetime.fromisoformat(created_at[:-1])
         return date_obj.strftime("%B %d, %Y at %I:%M %p")
 
+    @swagger_auto_schema(
+        request_body=CreateNotificationSerializer,
+        responses={201: 'Успех', 400: 'Ошибка'}
+    )
     def create(self, request: Request, *args: Any, **kwargs: Any) -> Response:
         """
         Метод для создания уведомления.
+        Повторный запрос с тем же заголовком Idempotency-Key возвращает исходный ответ
+        и не создает новое уведомление.
         """
+        idempotency_key = request.headers.get('Idempotency-Key')
+        if idempotency_key is not None:
+            if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+                return Response(
+                    {'Idempotency-Key': f"Ключ должен быть непустой строкой длиной до {IDEMPOTENCY_KEY_MAX_LENGTH} символов."},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            replay = self._replay(idempotency_key)
+            if replay is not None:
+                return replay
+
         serializer = CreateNotificationSerializer(data=request.data)
+        with API_VALIDATION_SECONDS.labels('create').time():
+            is_valid = serializer.is_valid()
 
-        if serializer.is_valid():
-            notification = serializer.save()
+        if is_valid:
+            try:
+                with API_DB_INSERT_SECONDS.labels('create').time():
+                    notification = serializer.save(idempotency_key=idempotency_key)
+            except IntegrityError:
+                # Параллельный запрос с тем же ключом успел создать уведомление первым.
+                replay = self._replay(idempotency_key) if idempotency_key is not None else None
+                if replay is None:
+                    raise
+                return replay
 
-            recipients = notification.recipients.all().values('recepient', 'recepient_type')
+            # Рассылку передаст в Celery процесс relay_outbox, отложенные уведомления — планировщик.
+            data = self._notification_data(notification)
+            if idempotency_key is not None:
+                cache_response(idempotency_key, data)
+            return Response(data, status=status.HTTP_201_CREATED)
 
-            delay = notification.delay
-            delay_seconds = settings.DELAY_MAPPING.get(delay, 0)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            send_email_notifications_task.apply_async(args=[notification.id, delay_seconds], countdown=delay_seconds)
-            send_telegram_notification_task.apply_async(args=[notification.id, delay_seconds], countdown=delay_seconds)
+    def _notification_data(self, notification: Notification) -> Dict[str, Any]:
+        """Тело ответа на создание уведомления."""
+        recipients = notification.recipients.all().values('recepient', 'recepient_type')
+        return {
+            'id': notification.id,
+            'message': notification.message,
+            'template': notification.template_id,
+            'audience': notification.audience_id,
+            'delay': notification.delay,
+            'priority': notification.priority,
+            'created_at': notification.created_at,
+            'scheduled_at': notification.scheduled_at,
+            'recipients': list(recipients)
+        }
 
-            return Response({
-                'id': notification.id,
-                'message': notification.message,
-                'delay': notification.delay,
-                'created_at': notification.created_at,
-                'recipients': list(recipients)
-            }, status=status.HTTP_201_CREATED)
+    def _replay(self, idempotency_key: str) -> Optional[Response]:
+        """
+        Возвращает исходный ответ на запрос с этим ключом идемпотентности:
+        из Redis, а если там его нет — собранный заново по уведомлению из БД.
+        """
+        data = get_cached_response(idempotency_key)
+        if data is None:
+            notification = Notification.objects.filter(idempotency_key=idempotency_key).first()
+            if notification is None:
+                return None
+            data = self._notification_data(notification)
+            cache_response(idempotency_key, data)
+        return Response(data, status=status.HTTP_201_CREATED, headers={'Idempotent-Replayed': 'true'})
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        """
+        Массовое создание уведомлений из потока NDJSON или JSON-массива.
+        Элементы валидируются по мере чтения и сохраняются пачками,
+        ошибки возвращаются по индексу элемента.
+        """
+        content_type = request.content_type.split(';')[0].strip()
+        if content_type in NDJSON_CONTENT_TYPES:
+            parse = iter_ndjson
+        elif content_type == 'application/json':
+            parse = iter_json_array
+        else:
+            raise UnsupportedMediaType(content_type)
+
+        if request.stream is None:
+            raise ParseError("Пустое тело запроса.")
+
+        created: List[int] = []
+        errors: List[Dict[str, Any]] = []
+        batch: List[Dict[str, Any]] = []
+
+        for index, (data, parse_error) in enumerate(parse(request.stream)):
+            if parse_error is not None:
+                errors.append({'index': index, 'errors': parse_error})
+                continue
+            if not isinstance(data, dict):
+                errors.append({'index': index, 'errors': "Элемент должен быть объектом."})
+                continue
+
+            serializer = CreateNotificationSerializer(data=data)
+            with API_VALIDATION_SECONDS.labels('bulk').time():
+                is_valid = serializer.is_valid()
+            if not is_valid:
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+
+            batch.append(serializer.validated_data)
+            if len(batch) >= settings.NOTIFY_BULK_BATCH_SIZE:
+                created.extend(self._save_batch(batch))
+                batch = []
+
+        if batch:
+            created.extend(self._save_batch(batch))
+
+        return Response(
+            {'created': created, 'errors': errors},
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+
+    def _save_batch(self, batch: List[Dict[str, Any]]) -> List[int]:
+        """Сохраняет пачку уведомлений вместе с записями outbox."""
+        with API_DB_INSERT_SECONDS.labels('bulk').time():
+            notifications = create_notifications(batch)
+        return [notification.id for notification in notifications]
@@ -0,0 +1,39 @@
+import pytest
+from celery import current_app
+from django.core.cache import cache
+from typing import Iterator
+from unittest.mock import patch
+from notifications import services
+from notifications.logbuffer import SendLogBuffer
+
+
+@pytest.fixture(autouse=True)
+def clear_cache() -> Iterator[None]:
+    """Фикстура, очищающая кэш (в том числе отклоненных получателей) между тестами."""
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def reset_email_connection() -> Iterator[None]:
+    """Фикстура, сбрасывающая SMTP-соединение процесса между тестами."""
+    services.close_email_connection()
+    yield
+    services.close_email_connection()
+
+
+@pytest.fixture(autouse=True)
+def send_log_buffer() -> Iterator[SendLogBuffer]:
+    """Фикстура с отдельным буфером лога отправки для каждого теста."""
+    buffer = SendLogBuffer(max_size=500, flush_interval=3600)
+    with patch('notifications.tasks.send_log_buffer', buffer):
+        yield buffer
+
+
+@pytest.fixture
+def celery_eager() -> Iterator[None]:
+    """Фикстура, выполняющая задачи Celery синхронно."""
+    current_app.conf.task_always_eager = True
+    yield
+    current_app.conf.task_always_eager = False
@@ -0,0 +1,94 @@
+import json
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from notifications.admin_pagination import CURSOR_VAR, EstimatedCountPaginator
+from notifications.models import Notification, NotificationSendLog, Recipient
+
+
+def create_recipients(count: int) -> Notification:
+    """Создает уведомление с count получателями."""
+    notification = Notification.objects.create(message="Test message")
+    Recipient.objects.bulk_create(
+        Recipient(notification=notification, recepient=f"user{index}@test.com", recepient_type='email')
+        for index in range(count)
+    )
+    return notification
+
+
+@pytest.mark.django_db
+def test_recipient_changelist_queries_do_not_grow(admin_client) -> None:
+    """Тест отсутствия N+1: число запросов списка получателей не зависит от числа строк."""
+    url = reverse('admin:notifications_recipient_changelist')
+    create_recipients(2)
+    with CaptureQueriesContext(connection) as small:
+        assert admin_client.get(url).status_code == 200
+
+    create_recipients(15)
+    with CaptureQueriesContext(connection) as large:
+        assert admin_client.get(url).status_code == 200
+
+    assert len(large) == len(small)
+
+
+@pytest.mark.django_db
+def test_changelist_keyset_navigation(admin_client) -> None:
+    """Тест перехода на следующую страницу по курсору вместо OFFSET."""
+    create_recipients(25)
+    url = reverse('admin:notifications_recipient_changelist')
+
+    first = admin_client.get(url).context['cl']
+    assert len(first.result_list) == 20
+    assert isinstance(first.paginator, EstimatedCountPaginator)
+    assert first.next_cursor == json.dumps([first.result_list[-1].id])
+
+    second = admin_client.get(url, {CURSOR_VAR: first.next_cursor}).context['cl']
+    ids = [recipient.id for recipient in first.result_list + second.result_list]
+    assert len(second.result_list) == 5
+    assert second.next_cursor is None
+    assert ids == sorted(Recipient.objects.values_list('id', flat=True), reverse=True)
+
+
+@pytest.mark.django_db
+def test_send_log_changelist_invalid_cursor(admin_client) -> None:
+    """Тест некорректного курсора: админка сбрасывает параметры вместо ошибки 500."""
+    url = reverse('admin:notifications_notificationsendlog_changelist')
+    response = admin_client.get(url, {CURSOR_VAR: '["not a date", "x"]'})
+
+    assert response.status_code == 302
+
+
+@pytest.mark.django_db
+def test_numeric_search_filters_by_notification_id(admin_client) -> None:
+    """Тест поиска по числу: получатели фильтруются по id уведомления."""
+    create_recipients(3)
+    notification = create_recipients(2)
+    NotificationSendLog.objects.create(
+        notification=notification, recipient="user0@test.com", recipient_type=NotificationSendLog.EMAIL,
+        status=NotificationSendLog.OK
+    )
+
+    recipients = admin_client.get(
+        reverse('admin:notifications_recipient_changelist'), {'q': str(notification.id)}
+    ).context['cl']
+    logs = admin_client.get(reverse('admin:notifications_notificationsendlog_changelist'), {'q': "USER0"}).context['cl']
+
+    assert {recipient.notification_id for recipient in recipients.result_list} == {notification.id}
+    assert len(recipients.result_list) == 2
+    assert [log.recipient for log in logs.result_list] == ["user0@test.com"]
+
+
+@pytest.mark.django_db
+def test_estimated_count_uses_statistics(settings) -> None:
+    """Тест оценки количества строк по статистике без COUNT(*) выше порога."""
+    settings.ADMIN_EXACT_COUNT_THRESHOLD = 0
+    create_recipients(30)
+    with connection.cursor() as cursor:
+        cursor.execute(f'ANALYZE "{Recipient._meta.db_table}"')
+
+    with CaptureQueriesContext(connection) as queries:
+        count = EstimatedCountPaginator(Recipient.objects.all(), 20).count
+
+    assert count == 30
+    assert not any('COUNT(' in query['sql'].upper() for query in queries)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+from typing import Any, Dict, List
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from notifications.async_db import close_pool
+from notifications.audiences import import_members
+from notifications.models import Audience, Notification, NotificationChannelStats, OutboxMessage, Recipient, Template
+
+
+async def post_all(payloads: List[Dict[str, Any]], **headers: str) -> List[Any]:
+    """Параллельно отправляет запросы асинхронному API и закрывает пул соединений."""
+    client = AsyncClient()
+    try:
+        return await asyncio.gather(*[
+            client.post('/api/notify/', json.dumps(payload), content_type='application/json', headers=headers)
+            for payload in payloads
+        ])
+    finally:
+        await close_pool()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_create_notification() -> None:
+    """Тест асинхронного создания: уведомление, получатели и outbox сохраняются, ответ как у DRF."""
+    template = Template.objects.create(name="greeting", body="Здравствуйте, {{ name }}!")
+    payload = {"template": template.id, "recepient": [{"recipient": "a@test.com", "context": {"name": "Анна"}}, "123456789"]}
+
+    response, = async_to_sync(post_all)([payload])
+
+    assert response.status_code == 201
+    data = response.json()
+    notification = Notification.objects.get()
+    assert data['id'] == notification.id
+    assert data['template'] == template.id
+    assert data['message'] == template.body
+    assert data['recipients'] == [
+        {'recepient': "a@test.com", 'recepient_type': 'email'},
+        {'recepient': "123456789", 'recepient_type': 'telegram'},
+    ]
+    assert notification.template_version == template.version
+    assert notification.pending_channels == 2
+    assert Recipient.objects.get(recepient="a@test.com").context == {"name": "Анна"}
+    assert list(OutboxMessage.objects.values_list('notification_id', flat=True)) == [notification.id]
+    assert set(data) == set(APIClient().post('/api/notify/', payload, format='json').json())
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize(
+    "payload",
+    [
+        pytest.param({"recepient": "a@test.com"}, id="no_message"),
+        pytest.param({"message": "Test", "recepient": ["bad", "a@test.com"]}, id="bad_recipient"),
+        pytest.param({"template": 999999, "recepient": "a@test.com"}, id="missing_template"),
+        pytest.param({"template": "abc", "message": "Test", "recepient": 5}, id="bad_types"),
+    ],
+)
+def test_async_create_validation_errors_match_sync(payload: Dict[str, Any]) -> None:
+    """Тест совпадения ошибок валидации асинхронного и синхронного путей."""
+    sync_response = APIClient().post('/api/notify/', payload, format='json')
+
+    response, = async_to_sync(post_all)([payload])
+
+    assert response.status_code == sync_response.status_code == 400
+    assert response.json() == sync_response.json()
+    assert not Notification.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_create_concurrent_idempotent_requests() -> None:
+    """Тест параллельных запросов с одним ключом идемпотентности: создается одно уведомление."""
+    payload = {"message": "Test", "recepient": "a@test.com"}
+
+    responses = async_to_sync(post_all)([payload] * 10, **{'Idempotency-Key': 'order-1'})
+
+    assert {response.status_code for response in responses} == {201}
+    assert len({response.json()['id'] for response in responses}) == 1
+    assert Notification.objects.count() == 1
+    assert Recipient.objects.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_create_notification_for_audience() -> None:
+    """Тест асинхронного создания уведомления на аудиторию: без получателей, счетчики каналов по участникам."""
+    audience = Audience.objects.create(name="subscribers")
+    import_members(audience, ["a@test.com", "b@test.com", "123456789"], batch_size=100)
+
+    response, = async_to_sync(post_all)([{"message": "Test", "audience": audience.id}])
+
+    assert response.status_code == 201
+    assert (response.json()['audience'], response.json()['recipients']) == (audience.id, [])
+    notification = Notification.objects.get()
+    assert notification.audience_id == audience.id
+    assert not Recipient.objects.exists()
+    assert dict(NotificationChannelStats.objects.values_list('channel', 'total')) == {'email': 2, 'telegram': 1}
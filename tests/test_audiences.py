@@ -0,0 +1,126 @@
+import json
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from rest_framework import status
+from rest_framework.test import APIClient
+from notifications.audiences import import_members, iter_members
+from notifications.channels import TelegramBackend
+from notifications.models import Audience, AudienceMember, Notification, NotificationChannelStats, Recipient, Template
+from notifications.tasks import dispatch_notifications_task
+
+
+@pytest.fixture
+def audience() -> Audience:
+    """Фикстура с аудиторией из трех email-получателей и одного чата Telegram."""
+    audience = Audience.objects.create(name="subscribers")
+    import_members(
+        audience,
+        ["a@test.com", json.dumps({"recipient": "b@test.com", "context": {"name": "Борис"}}), "c@test.com", "123456789"],
+        batch_size=2
+    )
+    return audience
+
+
+@pytest.mark.django_db
+def test_import_audience_command(tmp_path: Path, capsys: Any) -> None:
+    """Тест загрузки аудитории: повторы пропускаются, ошибки выводятся, --replace заменяет состав."""
+    path = tmp_path / "members.txt"
+    path.write_text("a@test.com\n123456789\n\nbad\na@test.com\n", encoding='utf-8')
+
+    call_command('import_audience', 'subscribers', str(path), '--batch-size', '2')
+    call_command('import_audience', 'subscribers', str(path))
+
+    audience = Audience.objects.get(name="subscribers")
+    assert audience.member_counts == {'email': 1, 'telegram': 1}
+    assert "'bad': Некорректный получатель" in capsys.readouterr().err
+
+    path.write_text("b@test.com\n", encoding='utf-8')
+    call_command('import_audience', 'subscribers', str(path), '--replace')
+    assert list(AudienceMember.objects.filter(audience=audience).values_list('recipient', flat=True)) == ["b@test.com"]
+    audience.refresh_from_db()
+    assert audience.member_counts == {'email': 1}
+
+
+@pytest.mark.django_db
+def test_iter_members_reads_by_keyset(audience: Audience, django_assert_num_queries: Any) -> None:
+    """Тест чтения участников канала пачками по ключу: один запрос на пачку, порядок по id."""
+    with django_assert_num_queries(2):
+        members = list(iter_members(audience.id, 'email', batch_size=2))
+
+    assert members == [("a@test.com", None), ("b@test.com", {"name": "Борис"}), ("c@test.com", None)]
+
+
+@pytest.mark.django_db
+def test_create_notification_for_audience(audience: Audience) -> None:
+    """Тест уведомления на аудиторию: получатели не копируются, счетчики каналов — по участникам."""
+    client = APIClient()
+
+    response = client.post('/api/notify/', data={"message": "Test", "audience": audience.id}, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert (response.data['audience'], response.data['recipients']) == (audience.id, [])
+    notification = Notification.objects.get(id=response.data['id'])
+    assert notification.pending_channels == 2
+    assert not Recipient.objects.filter(notification=notification).exists()
+    assert dict(NotificationChannelStats.objects.filter(notification=notification).values_list('channel', 'total')) == {
+        'email': 3, 'telegram': 1
+    }
+
+
+@pytest.mark.django_db
+def test_create_notification_for_audience_errors(audience: Audience) -> None:
+    """Тест ошибок валидации: аудитория вместе со списком получателей, несуществующая и пустая аудитория."""
+    client = APIClient()
+    empty = Audience.objects.create(name="empty")
+
+    for data in (
+        {"message": "Test", "audience": audience.id, "recepient": "a@test.com"},
+        {"message": "Test", "audience": 999999},
+        {"message": "Test", "audience": empty.id},
+    ):
+        response = client.post('/api/notify/', data=data, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'audience' in response.data
+    assert not Notification.objects.exists()
+
+
+@pytest.mark.django_db
+def test_audience_notification_is_sent_to_members(celery_eager: None, audience: Audience, settings: Any) -> None:
+    """Тест рассылки на аудиторию по шаблону: участники читаются пачками, счетчики и статус обновляются."""
+    settings.EMAIL_BATCH_SIZE = 2
+    template = Template.objects.create(name="greeting", body="Привет, {{ name|default:'друг' }}!")
+    notification_id = APIClient().post(
+        '/api/notify/', data={"template": template.id, "audience": audience.id}, format='json'
+    ).data['id']
+
+    with patch.object(TelegramBackend, 'send_personalized', return_value={"123456789": None}):
+        dispatch_notifications_task([notification_id])
+
+    assert sorted((message.to[0], message.body) for message in mail.outbox) == [
+        ("a@test.com", "Привет, друг!"), ("b@test.com", "Привет, Борис!"), ("c@test.com", "Привет, друг!")
+    ]
+    notification = Notification.objects.get(id=notification_id)
+    assert notification.status == Notification.COMPLETED
+    assert dict(notification.channel_stats.values_list('channel', 'sent')) == {'email': 3, 'telegram': 1}
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_audience_changes_before_dispatch(mock_chord: Any, audience: Audience) -> None:
+    """Тест, что канал, все участники которого удалены до рассылки, завершается, а итог канала исправляется."""
+    notification_id = APIClient().post(
+        '/api/notify/', data={"message": "Test", "audience": audience.id}, format='json'
+    ).data['id']
+    AudienceMember.objects.filter(audience=audience, channel='telegram').delete()
+    AudienceMember.objects.filter(audience=audience, recipient="a@test.com").delete()
+
+    dispatch_notifications_task([notification_id])
+
+    mock_chord.assert_called_once()
+    notification = Notification.objects.get(id=notification_id)
+    assert notification.pending_channels == 1
+    assert dict(notification.channel_stats.values_list('channel', 'total')) == {'email': 2, 'telegram': 0}
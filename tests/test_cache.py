@@ -0,0 +1,88 @@
+from typing import Any
+from unittest.mock import MagicMock
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from notifications.cache import cache_aside, invalidate
+from notifications.delivery import record_delivery
+from notifications.models import Notification, Template
+
+
+@pytest.mark.django_db
+def test_cache_aside_reloads_after_invalidation(django_capture_on_commit_callbacks: Any) -> None:
+    """Тест, что значение загружается один раз и перезагружается после инвалидации."""
+    loader = MagicMock(side_effect=["first", "second"])
+
+    assert cache_aside('test', 1, loader) == "first"
+    assert cache_aside('test', 1, loader) == "first"
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate('test', 1)
+    assert cache_aside('test', 1, loader) == "second"
+    assert loader.call_count == 2
+
+
+@pytest.mark.django_db
+def test_cache_aside_serves_stale_value_while_locked(django_capture_on_commit_callbacks: Any) -> None:
+    """Тест защиты от одновременного пересчета: пока значение пересчитывает другой процесс, отдается устаревшее."""
+    cache_aside('test', 1, lambda: "old")
+    with django_capture_on_commit_callbacks(execute=True):
+        invalidate('test', 1)
+    cache.add('test:1:lock', 1)
+    loader = MagicMock(return_value="new")
+
+    assert cache_aside('test', 1, loader) == "old"
+    loader.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_notification_status_is_cached_until_counters_change(
+        django_assert_num_queries: Any, django_capture_on_commit_callbacks: Any
+) -> None:
+    """Тест кэша статуса уведомления: повторное чтение без запросов к БД, результат отправки обновляет ответ."""
+    client = APIClient()
+    notification_id = client.post(
+        '/api/notify/', data={"message": "Test", "recepient": ["a@test.com", "b@test.com"]}, format='json'
+    ).data['id']
+    client.get(f'/api/notify/{notification_id}/')
+
+    with django_assert_num_queries(0):
+        response = client.get(f'/api/notify/{notification_id}/')
+    assert response.data['channels']['email']['sent'] == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        record_delivery(notification_id, 'email', {"a@test.com": None}, 1)
+    assert client.get(f'/api/notify/{notification_id}/').data['channels']['email'] == {
+        'total': 2, 'sent': 1, 'failed': 0, 'skipped': 0, 'pending': 1
+    }
+
+
+@pytest.mark.django_db
+def test_missing_notification_is_not_cached() -> None:
+    """Тест, что 404 не кэшируется: уведомление, вставленное без сигналов post_save, сразу доступно."""
+    client = APIClient()
+    assert client.get('/api/notify/999999/').status_code == status.HTTP_404_NOT_FOUND
+
+    Notification.objects.bulk_create([Notification(id=999999, message="Test")])
+    assert client.get('/api/notify/999999/').status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+def test_template_lookup_is_cached(django_capture_on_commit_callbacks: Any) -> None:
+    """Тест, что шаблон при создании уведомлений читается из кэша, а после изменения — новая версия."""
+    template = Template.objects.create(name="greeting", body="Привет, {{ name }}!")
+    client = APIClient()
+    payload = {"template": template.id, "recepient": "a@test.com"}
+    client.post('/api/notify/', data=payload, format='json')
+
+    with CaptureQueriesContext(connection) as queries:
+        client.post('/api/notify/', data=payload, format='json')
+    assert not [query for query in queries if f'FROM "{Template._meta.db_table}"' in query['sql']]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        template.body = "Здравствуйте, {{ name }}!"
+        template.save()
+    response = client.post('/api/notify/', data=payload, format='json')
+    assert response.data['message'] == "Здравствуйте, {{ name }}!"
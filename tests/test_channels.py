@@ -0,0 +1,106 @@
+import pytest
+from celery import current_app
+from typing import Dict, Iterator, List, Optional
+from unittest.mock import patch
+from notifications.channels import AsyncChannelBackend, get_backends
+from notifications.delivery import PERMANENT, SendError
+from notifications.models import Notification, Recipient
+from notifications.tasks import dispatch_notifications_task
+from notifications.validators import classify_recipients
+
+
+class WebhookBackend(AsyncChannelBackend):
+    """Тестовый асинхронный канал: получатели — https-адреса вебхуков."""
+    name = 'webhook'
+    log_code = 99
+    sent: List[str] = []
+
+    def validate(self, value: str) -> bool:
+        return value.startswith('https://')
+
+    async def asend_batch(self, message: str, recipients: List[str]) -> Dict[str, Optional[SendError]]:
+        self.sent.extend(recipients)
+        return {recipient: None for recipient in recipients}
+
+    def classify_error(self, error: Exception, recipient: str) -> str:
+        return 'transient'
+
+
+class IncompleteBackend(AsyncChannelBackend):
+    """Тестовый канал без asend_batch."""
+    name = 'incomplete'
+
+    def validate(self, value: str) -> bool:
+        return False
+
+
+@pytest.fixture
+def webhook_channel(settings) -> Iterator[None]:
+    """Фикстура, подключающая тестовый канал через NOTIFICATION_CHANNEL_BACKENDS."""
+    settings.NOTIFICATION_CHANNEL_BACKENDS = [*settings.NOTIFICATION_CHANNEL_BACKENDS, 'tests.test_channels.WebhookBackend']
+    get_backends.cache_clear()
+    WebhookBackend.sent = []
+    yield
+    get_backends.cache_clear()
+
+
+def test_registry_classifies_recipients(webhook_channel: None) -> None:
+    """Тест, что тип получателя определяется зарегистрированными каналами по порядку."""
+    valid, invalid = classify_recipients(["user@test.com", "123456789", "https://example.com/hook", "ftp://x"])
+
+    assert [recipient["recipient_type"] for recipient in valid] == ['email', 'telegram', 'webhook']
+    assert [recipient["recipient"] for recipient in invalid] == ["ftp://x"]
+
+
+def test_incomplete_channel_fails_on_registry_load(settings) -> None:
+    """Тест, что канал без метода отправки не загружается в реестр, а не падает при первой отправке."""
+    settings.NOTIFICATION_CHANNEL_BACKENDS = [*settings.NOTIFICATION_CHANNEL_BACKENDS, 'tests.test_channels.IncompleteBackend']
+    get_backends.cache_clear()
+
+    try:
+        with pytest.raises(TypeError, match="asend_batch"):
+            get_backends()
+    finally:
+        get_backends.cache_clear()
+
+
+@pytest.mark.django_db
+def test_new_channel_uses_shared_pipeline(webhook_channel: None) -> None:
+    """Тест, что новый канал проходит общий конвейер рассылки без собственных задач."""
+    current_app.conf.task_always_eager = True
+    notification = Notification.objects.create(message="Test message", status=Notification.QUEUED, pending_channels=1)
+    Recipient.objects.bulk_create([
+        Recipient(notification=notification, recepient=f"https://example.com/hook/{i}", recepient_type='webhook')
+        for i in range(3)
+    ])
+
+    try:
+        dispatch_notifications_task([notification.id])
+    finally:
+        current_app.conf.task_always_eager = False
+
+    assert sorted(WebhookBackend.sent) == [f"https://example.com/hook/{i}" for i in range(3)]
+    assert set(Recipient.objects.filter(notification=notification).values_list('delivery_status', flat=True)) == {
+        Recipient.SENT
+    }
+    assert Notification.objects.get(id=notification.id).status == Notification.COMPLETED
+
+
+@pytest.mark.django_db
+def test_batch_exception_classified_by_channel(webhook_channel: None) -> None:
+    """Тест, что при исключении в отправке пачки класс ошибки получателей определяет канал."""
+    current_app.conf.task_always_eager = True
+    notification = Notification.objects.create(message="Test message", status=Notification.QUEUED, pending_channels=1)
+    Recipient.objects.create(notification=notification, recepient="https://example.com/hook", recepient_type='webhook')
+
+    try:
+        with patch.object(WebhookBackend, 'asend_batch', side_effect=ValueError("invalid payload")), \
+                patch.object(WebhookBackend, 'classify_error', return_value=PERMANENT) as classify_error:
+            dispatch_notifications_task([notification.id])
+    finally:
+        current_app.conf.task_always_eager = False
+
+    classify_error.assert_called_once()
+    recipient = Recipient.objects.get(notification=notification)
+    assert recipient.delivery_status == Recipient.DEAD
+    assert Notification.objects.get(id=notification.id).status == Notification.COMPLETED
@@ -0,0 +1,97 @@
+import fakeredis
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from celery.exceptions import Retry
+from django.core import mail
+from unittest.mock import patch
+from typing import Iterator
+from notifications.circuit import AdaptiveConcurrencyLimit, ChannelGuard, CircuitBreaker
+from notifications.delivery import PERMANENT, TRANSIENT, SendError
+from notifications.models import Notification, Recipient
+from notifications.tasks import send_email_batch_task
+
+
+@pytest.fixture
+def redis_client() -> Iterator[fakeredis.FakeRedis]:
+    """Фикстура с in-memory Redis, общим для предохранителя и лимита конкурентности."""
+    client = fakeredis.FakeRedis()
+    with patch('notifications.circuit.get_redis', return_value=client):
+        yield client
+
+
+def test_circuit_breaker_opens_and_probes(redis_client: fakeredis.FakeRedis, settings) -> None:
+    """Тест размыкания предохранителя после серии ошибок и пропуска одной пробной пачки."""
+    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD = 3
+    breaker = CircuitBreaker('email')
+
+    for _ in range(3):
+        assert breaker.retry_after(redis_client) is None
+        breaker.record_failure(redis_client)
+    assert breaker.retry_after(redis_client) == pytest.approx(settings.CIRCUIT_BREAKER_OPEN_SECONDS, abs=1)
+
+    redis_client.delete(breaker.open_key)
+    assert breaker.retry_after(redis_client) is None
+    assert breaker.retry_after(redis_client) is not None
+
+    breaker.record_success(redis_client)
+    assert breaker.retry_after(redis_client) is None
+
+
+def test_adaptive_concurrency_limit(redis_client: fakeredis.FakeRedis, settings) -> None:
+    """Тест AIMD-лимита: слоты выдаются до лимита, ошибка уменьшает его вдвое, успех увеличивает."""
+    settings.CHANNEL_CONCURRENCY = {'email': {'initial': 4, 'min': 1, 'max': 8}}
+    limit = AdaptiveConcurrencyLimit('email')
+
+    slots = [limit.acquire(redis_client) for _ in range(5)]
+    assert all(slots[:4]) and slots[4] is None
+
+    limit.release(redis_client, slots[0], success=False)
+    assert float(redis_client.get(limit.limit_key)) == 2
+    assert limit.acquire(redis_client) is None
+
+    limit.release(redis_client, slots[1], success=True)
+    assert float(redis_client.get(limit.limit_key)) == 2.5
+
+
+def test_adaptive_concurrency_limit_concurrent_releases(redis_client: fakeredis.FakeRedis, settings) -> None:
+    """Тест, что одновременные release не теряют увеличения лимита."""
+    settings.CHANNEL_CONCURRENCY = {'email': {'initial': 4, 'min': 1, 'max': 100}}
+    limit = AdaptiveConcurrencyLimit('email')
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: limit.release(redis_client, "slot", success=True), range(40)))
+
+    expected = 4.0
+    for _ in range(40):
+        expected += 1 / expected
+    assert float(redis_client.get(limit.limit_key)) == pytest.approx(expected)
+
+
+def test_channel_guard_counts_only_provider_errors(redis_client: fakeredis.FakeRedis, settings) -> None:
+    """Тест, что постоянные ошибки адресов не размыкают предохранитель, а временные — размыкают."""
+    settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD = 1
+    guard = ChannelGuard('email')
+
+    assert guard.acquire() is None
+    guard.release({"a@test.com": SendError("No such user", PERMANENT), "b@test.com": None})
+    assert guard.acquire() is None
+    guard.release({"a@test.com": SendError("Connection refused", TRANSIENT)})
+
+    assert guard.acquire() is not None
+
+
+@pytest.mark.django_db
+def test_send_batch_deferred_while_circuit_open(redis_client: fakeredis.FakeRedis, settings) -> None:
+    """Тест, что при разомкнутом предохранителе пачка откладывается без отправки и без расхода попыток."""
+    notification = Notification.objects.create(message="Test message", status=Notification.PROCESSING)
+    Recipient.objects.create(notification=notification, recepient="user@test.com", recepient_type='email')
+    redis_client.set(CircuitBreaker('email').open_key, 1, ex=30)
+
+    with patch.object(send_email_batch_task, 'retry', return_value=Retry()) as mock_retry:
+        with pytest.raises(Retry):
+            send_email_batch_task(notification.id, ["user@test.com"], "Test message", attempt=2)
+
+    assert mail.outbox == []
+    assert mock_retry.call_args.kwargs['kwargs'] == {'attempt': 2}
+    assert 30 <= mock_retry.call_args.kwargs['countdown'] <= 30 + settings.CHANNEL_DEFER_JITTER
+    assert Recipient.objects.get(notification=notification).delivery_status == Recipient.PENDING
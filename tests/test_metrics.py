@@ -0,0 +1,55 @@
+import smtplib
+import pytest
+from prometheus_client import REGISTRY
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import MagicMock, patch
+from typing import Dict, Optional
+from notifications.delivery import REJECTED
+from notifications.models import Notification, Recipient
+from notifications.tasks import send_email_batch_task
+
+
+def sample(name: str, labels: Optional[Dict[str, str]] = None) -> float:
+    """Текущее значение метрики из реестра по умолчанию."""
+    return REGISTRY.get_sample_value(name, labels or {}) or 0.0
+
+
+@pytest.mark.django_db
+def test_metrics_endpoint_exposes_api_timings() -> None:
+    """Тест, что создание уведомления попадает в метрики, отдаваемые по /metrics."""
+    client = APIClient()
+    before = sample('notify_api_db_insert_seconds_count', {'endpoint': 'create'})
+
+    response = client.post('/api/notify/', {"message": "Test", "recepient": "a@test.com", "delay": 0}, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+
+    metrics = client.get('/metrics')
+    assert metrics.status_code == status.HTTP_200_OK
+    assert b'notify_api_validation_seconds_bucket' in metrics.content
+    assert sample('notify_api_db_insert_seconds_count', {'endpoint': 'create'}) == before + 1
+
+
+@pytest.mark.django_db
+def test_send_batch_counts_sent_and_failures_by_error_class() -> None:
+    """Тест счетчиков успешных отправок и ошибок по классу ошибки."""
+    notification = Notification.objects.create(message="Test message", delay=0)
+    Recipient.objects.bulk_create([
+        Recipient(notification=notification, recepient=email, recepient_type='email')
+        for email in ("bad@test.com", "good@test.com")
+    ])
+    connection = MagicMock()
+    connection.send_messages.side_effect = [
+        smtplib.SMTPRecipientsRefused({"bad@test.com": (550, b"No such user")}),
+        1,
+    ]
+    sent_before = sample('notify_sent_total', {'channel': 'email'})
+    failed_before = sample('notify_send_failures_total', {'channel': 'email', 'error_class': REJECTED})
+    batches_before = sample('notify_send_batch_seconds_count', {'channel': 'email'})
+
+    with patch('notifications.services.get_connection', return_value=connection):
+        send_email_batch_task(notification.id, ["bad@test.com", "good@test.com"])
+
+    assert sample('notify_sent_total', {'channel': 'email'}) == sent_before + 1
+    assert sample('notify_send_failures_total', {'channel': 'email', 'error_class': REJECTED}) == failed_before + 1
+    assert sample('notify_send_batch_seconds_count', {'channel': 'email'}) == batches_before + 1
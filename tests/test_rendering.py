@@ -0,0 +1,102 @@
+import pytest
+from django.core import mail
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from notifications.logbuffer import SendLogBuffer
+from notifications.models import Notification, Recipient, Template
+from notifications.rendering import CompiledTemplateCache, render_messages, template_cache
+from notifications.tasks import send_email_batch_task, send_email_notifications_task
+
+
+@pytest.fixture
+def template() -> Template:
+    """Фикстура с шаблоном уведомления."""
+    template_cache.clear()
+    return Template.objects.create(name="greeting", body="Здравствуйте, {{ name }}! Ваш адрес: {{ recipient }}")
+
+
+def test_compiled_template_cache_compiles_once_per_version() -> None:
+    """Тест, что шаблон компилируется один раз на версию, а старые записи вытесняются."""
+    cache = CompiledTemplateCache(max_size=2)
+
+    with patch('notifications.rendering.compile_template', wraps=lambda source: source) as compile_template:
+        cache.get(1, 1, "v1")
+        cache.get(1, 1, "v1")
+        cache.get(1, 2, "v2")
+        cache.get(2, 1, "other")
+        cache.get(1, 1, "v1")
+
+    assert [call.args[0] for call in compile_template.call_args_list] == ["v1", "v2", "other", "v1"]
+    assert len(cache) == 2
+
+
+def test_render_messages_uses_recipient_context() -> None:
+    """Тест рендеринга текста по переменным каждого получателя."""
+    messages, errors = render_messages(
+        1, 1, "Привет, {{ name }}", ["a@test.com", "b@test.com"], {"a@test.com": {"name": "Анна"}}
+    )
+
+    assert messages == {"a@test.com": "Привет, Анна", "b@test.com": "Привет, "}
+    assert errors == {}
+
+
+@pytest.mark.django_db
+def test_template_version_increases_on_body_change(template: Template) -> None:
+    """Тест увеличения версии шаблона только при изменении текста."""
+    template.name = "welcome"
+    template.save()
+    assert template.version == 1
+
+    template.body = "Привет, {{ name }}"
+    template.save()
+    assert template.version == 2
+
+
+@pytest.mark.django_db
+def test_templated_notification_is_personalized(
+        celery_eager: None, template: Template, send_log_buffer: SendLogBuffer
+) -> None:
+    """Тест создания уведомления по шаблону и отправки каждому получателю своего текста."""
+    response = APIClient().post('/api/notify/', {
+        "template": template.id,
+        "recepient": [{"recipient": "anna@test.com", "context": {"name": "Анна"}}, "ivan@test.com"],
+        "delay": 0,
+    }, format='json')
+    assert response.status_code == status.HTTP_201_CREATED
+
+    notification = Notification.objects.get(id=response.data['id'])
+    assert (notification.message, notification.template_version) == (template.body, 1)
+    assert Recipient.objects.get(recepient="anna@test.com").context == {"name": "Анна"}
+
+    # Изменение шаблона не затрагивает созданное уведомление.
+    template.body = "Другой текст"
+    template.save()
+    send_email_notifications_task(notification.id, 0)
+
+    bodies = {message.to[0]: message.body for message in mail.outbox}
+    assert bodies == {
+        "anna@test.com": "Здравствуйте, Анна! Ваш адрес: anna@test.com",
+        "ivan@test.com": "Здравствуйте, ! Ваш адрес: ivan@test.com",
+    }
+
+
+@pytest.mark.django_db
+def test_send_batch_without_message_renders_template(template: Template) -> None:
+    """Тест, что пачка без переданного текста сама читает шаблон и переменные получателей."""
+    notification = Notification.objects.create(message=template.body, template=template, template_version=1)
+    Recipient.objects.create(
+        notification=notification, recepient="anna@test.com", recepient_type='email', context={"name": "Анна"}
+    )
+
+    send_email_batch_task(notification.id, ["anna@test.com"])
+
+    assert mail.outbox[0].body == "Здравствуйте, Анна! Ваш адрес: anna@test.com"
+
+
+def test_create_requires_message_or_template() -> None:
+    """Тест, что без текста и шаблона уведомление не создается."""
+    response = APIClient().post('/api/notify/', {"recepient": "a@test.com", "delay": 0}, format='json')
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'message' in response.data
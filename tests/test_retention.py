@@ -0,0 +1,100 @@
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import List
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+from notifications.models import Notification, NotificationSendLog, Recipient
+from notifications.partitions import create_partition, ensure_partitions, is_partitioned, list_partitions, partition_name
+from notifications.retention import archive_send_log
+
+
+def read_archive(path: Path) -> List[dict]:
+    """Читает строки всех файлов архива в каталоге."""
+    rows = []
+    for file in sorted(path.glob('*.ndjson.gz')):
+        with gzip.open(file, 'rt', encoding='utf-8') as archive:
+            rows.extend(json.loads(line) for line in archive)
+    return rows
+
+
+@pytest.mark.django_db
+def test_ensure_partitions_creates_months_ahead() -> None:
+    """Тест заблаговременного создания месячных секций лога."""
+    created = ensure_partitions(2, now=datetime(2030, 11, 15, tzinfo=dt_timezone.utc))
+
+    assert created == [partition_name(date(2030, 11, 1)), partition_name(date(2030, 12, 1)), partition_name(date(2031, 1, 1))]
+    assert ensure_partitions(2, now=datetime(2030, 11, 15, tzinfo=dt_timezone.utc)) == []
+
+
+@pytest.mark.django_db
+def test_archive_drops_expired_send_log_partition(tmp_path: Path, settings) -> None:
+    """Тест выгрузки старой секции лога в сжатый NDJSON и удаления ее целиком."""
+    settings.DATA_RETENTION_DAYS = {'send_log': 30}
+    notification = Notification.objects.create(message="Test message")
+    old_month = date(2020, 1, 1)
+    create_partition(old_month)
+    NotificationSendLog.objects.create(
+        notification=notification, recipient="old@test.com", recipient_type=NotificationSendLog.EMAIL,
+        status=NotificationSendLog.OK, timestamp=datetime(2020, 1, 10, tzinfo=dt_timezone.utc)
+    )
+    NotificationSendLog.objects.create(
+        notification=notification, recipient="new@test.com", recipient_type=NotificationSendLog.EMAIL,
+        status=NotificationSendLog.OK
+    )
+    # Проверки отложенного внешнего ключа выполняются сразу, как после фиксации транзакции.
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    call_command('archive_old_data', archive_dir=str(tmp_path))
+
+    assert partition_name(old_month) not in [partition.name for partition in list_partitions()]
+    assert list(NotificationSendLog.objects.values_list('recipient', flat=True)) == ["new@test.com"]
+    archived = read_archive(tmp_path / NotificationSendLog._meta.db_table)
+    assert [row['recipient'] for row in archived] == ["old@test.com"]
+
+
+@pytest.mark.django_db
+def test_archive_send_log_default_partition_in_batches(tmp_path: Path) -> None:
+    """Тест архивирования старых строк секции по умолчанию пачками по ключу."""
+    notification = Notification.objects.create(message="Test message")
+    NotificationSendLog.objects.bulk_create(
+        NotificationSendLog(
+            notification=notification, recipient=f"old{day}@test.com", recipient_type=NotificationSendLog.EMAIL,
+            status=NotificationSendLog.OK, timestamp=datetime(2019, 1, day, tzinfo=dt_timezone.utc)
+        )
+        for day in range(1, 4)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    assert is_partitioned()
+    deleted = archive_send_log(tmp_path, timezone.now() - timedelta(days=30), batch_size=2)
+
+    assert deleted == 3
+    assert not NotificationSendLog.objects.exists()
+    table_dir = tmp_path / NotificationSendLog._meta.db_table
+    assert len(list(table_dir.glob('*.ndjson.gz'))) == 2
+    assert sorted(row['recipient'] for row in read_archive(table_dir)) == [f"old{day}@test.com" for day in range(1, 4)]
+
+
+@pytest.mark.django_db
+def test_archive_expired_notifications_with_recipients(tmp_path: Path, settings) -> None:
+    """Тест архивирования завершенных уведомлений старше срока вместе с получателями."""
+    settings.DATA_RETENTION_DAYS = {'notification': 30}
+    old = Notification.objects.create(
+        message="Old", status=Notification.COMPLETED, completed_at=timezone.now() - timedelta(days=40)
+    )
+    recent = Notification.objects.create(message="Recent", status=Notification.COMPLETED, completed_at=timezone.now())
+    pending = Notification.objects.create(message="Pending", created_at=timezone.now() - timedelta(days=40))
+    for notification in (old, recent, pending):
+        Recipient.objects.create(notification=notification, recepient=f"{notification.message}@test.com", recepient_type='email')
+
+    call_command('archive_old_data', archive_dir=str(tmp_path))
+
+    assert set(Notification.objects.values_list('id', flat=True)) == {recent.id, pending.id}
+    assert [row['id'] for row in read_archive(tmp_path / Notification._meta.db_table)] == [old.id]
+    assert [row['recepient'] for row in read_archive(tmp_path / Recipient._meta.db_table)] == ["Old@test.com"]
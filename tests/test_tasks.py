@@ -0,0 +1,526 @@
+import fakeredis
+import smtplib
+import threading
+from datetime import timedelta
+import pytest
+from django.core import mail
+from django.db import DatabaseError, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from unittest.mock import MagicMock, patch
+from notifications import delivery, services
+from notifications.channels import TelegramBackend
+from notifications.idempotency import drop_recent_duplicates
+from notifications.logbuffer import SendLogBuffer
+from notifications.models import Notification, NotificationChannelStats, NotificationSendLog, OutboxMessage, Recipient
+from notifications.outbox import add_to_outbox
+from notifications.tasks import (
+    close_stale_db_connections, dispatch_due_notifications_task, dispatch_notifications_task, flush_send_log,
+    relay_outbox, send_email_batch_task,
+    send_email_notifications_task, send_telegram_notification_task, send_telegram_to_recipient_task
+)
+
+
+def make_send_log(notification_id: int, recipient: str) -> NotificationSendLog:
+    """Создает несохраненную запись лога успешной отправки email."""
+    return NotificationSendLog(
+        notification_id=notification_id,
+        recipient=recipient,
+        recipient_type=NotificationSendLog.EMAIL,
+        status=NotificationSendLog.OK
+    )
+
+
+@pytest.fixture
+def notification() -> Notification:
+    """Фикстура с уведомлением и email-получателями."""
+    notification = Notification.objects.create(message="Test message", delay=0)
+    Recipient.objects.bulk_create([
+        Recipient(notification=notification, recepient=f"user{i}@test.com", recepient_type='email')
+        for i in range(5)
+    ])
+    return notification
+
+
+@pytest.mark.django_db
+def test_send_email_batch_task_logs_each_recipient(
+        notification: Notification, send_log_buffer: SendLogBuffer
+) -> None:
+    """Тест отправки пачки писем с записью результата по каждому получателю."""
+    emails = ["user0@test.com", "user1@test.com"]
+
+    send_email_batch_task(notification.id, emails)
+    send_log_buffer.flush()
+
+    assert sorted(message.to[0] for message in mail.outbox) == emails
+    logs = NotificationSendLog.objects.filter(notification=notification)
+    assert sorted(logs.values_list('recipient', flat=True)) == emails
+    assert set(logs.values_list('status', flat=True)) == {NotificationSendLog.OK}
+
+
+def test_send_email_batch_reuses_connection() -> None:
+    """Тест, что пачка писем отправляется через одно соединение."""
+    connection = MagicMock()
+
+    with patch('notifications.services.get_connection', return_value=connection) as get_connection:
+        results = services.send_email_batch("Test message", ["a@test.com", "b@test.com", "c@test.com"])
+
+    assert results == {"a@test.com": None, "b@test.com": None, "c@test.com": None}
+    get_connection.assert_called_once()
+    assert connection.send_messages.call_count == 3
+
+
+def test_send_email_batch_reconnects_after_disconnect() -> None:
+    """Тест переподключения при обрыве SMTP-соединения."""
+    broken = MagicMock()
+    broken.send_messages.side_effect = smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+    healthy = MagicMock()
+
+    with patch('notifications.services.get_connection', side_effect=[broken, healthy]):
+        results = services.send_email_batch("Test message", ["a@test.com", "b@test.com"])
+
+    assert results == {"a@test.com": None, "b@test.com": None}
+    broken.close.assert_called_once()
+    assert healthy.send_messages.call_count == 2
+
+
+def test_send_email_batch_records_recipient_error() -> None:
+    """Тест, что ошибка одного адреса не прерывает отправку пачки."""
+    connection = MagicMock()
+    connection.send_messages.side_effect = [
+        smtplib.SMTPRecipientsRefused({"bad@test.com": (550, b"No such user")}),
+        1,
+    ]
+
+    with patch('notifications.services.get_connection', return_value=connection):
+        results = services.send_email_batch("Test message", ["bad@test.com", "good@test.com"])
+
+    assert results["bad@test.com"] is not None
+    assert results["good@test.com"] is None
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_send_email_notifications_task_chunks_recipients(
+        mock_chord: MagicMock, notification: Notification, settings
+) -> None:
+    """Тест разбиения получателей на пачки одной группой задач."""
+    settings.EMAIL_BATCH_SIZE = 2
+
+    send_email_notifications_task(notification.id, 0)
+
+    header = mock_chord.call_args.args[0]
+    assert [len(signature.args[1]) for signature in header.tasks] == [2, 2, 1]
+    mock_chord.return_value.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_notification_completed_after_all_channels(
+        celery_eager: None, send_log_buffer: SendLogBuffer, settings
+) -> None:
+    """Тест финализации уведомления после отправки всех пачек по всем каналам."""
+    settings.EMAIL_BATCH_SIZE = 2
+    settings.TELEGRAM_BATCH_SIZE = 2
+    notification = Notification.objects.create(message="Test message", delay=0, pending_channels=2)
+    Recipient.objects.bulk_create(
+        [Recipient(notification=notification, recepient=f"user{i}@test.com", recepient_type='email') for i in range(3)]
+        + [Recipient(notification=notification, recepient="123456789", recepient_type='telegram')]
+    )
+
+    with patch.object(TelegramBackend, 'send_batch', return_value={"123456789": None}):
+        send_email_notifications_task(notification.id, 0)
+        notification.refresh_from_db()
+        assert notification.status == Notification.PROCESSING
+
+        send_telegram_notification_task(notification.id, 0)
+
+    notification.refresh_from_db()
+    assert notification.status == Notification.COMPLETED
+    assert notification.completed_at is not None
+    assert len(mail.outbox) == 3
+    send_log_buffer.flush()
+    assert NotificationSendLog.objects.filter(notification=notification, status=NotificationSendLog.OK).count() == 4
+
+
+@pytest.mark.django_db
+def test_send_log_buffer_flushes_on_size_limit(notification: Notification) -> None:
+    """Тест сброса буфера лога одним bulk_create при достижении лимита по размеру."""
+    buffer = SendLogBuffer(max_size=3, flush_interval=3600)
+    entries = [
+        make_send_log(notification.id, f"user{i}@test.com") for i in range(3)
+    ]
+
+    buffer.add(entries[:2])
+    assert NotificationSendLog.objects.count() == 0
+
+    buffer.add(entries[2:])
+    assert NotificationSendLog.objects.count() == 3
+    assert len(buffer) == 0
+
+
+@pytest.mark.django_db
+def test_send_log_buffer_keeps_entries_on_db_error(notification: Notification) -> None:
+    """Тест, что записи не теряются, если сохранение в БД не удалось."""
+    buffer = SendLogBuffer(max_size=500, flush_interval=3600)
+    buffer.add([make_send_log(notification.id, "a@test.com")])
+
+    with patch.object(NotificationSendLog.objects, 'bulk_create', side_effect=DatabaseError("connection lost")):
+        with pytest.raises(DatabaseError):
+            buffer.flush()
+
+    assert len(buffer) == 1
+    assert buffer.flush() == 1
+    assert NotificationSendLog.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_send_log_buffer_add_logs_db_error(notification: Notification) -> None:
+    """Тест, что ошибка БД при сбросе из add не прерывает отправку, а записи остаются в буфере."""
+    buffer = SendLogBuffer(max_size=1, flush_interval=3600)
+
+    with patch.object(NotificationSendLog.objects, 'bulk_create', side_effect=DatabaseError("connection lost")):
+        buffer.add([make_send_log(notification.id, "a@test.com")])
+
+    assert len(buffer) == 1
+    assert buffer.flush_if_due() == 1
+
+
+def test_send_log_buffer_flushes_periodically() -> None:
+    """Тест, что фоновый поток сбрасывает буфер по времени без новых задач."""
+    buffer = SendLogBuffer(max_size=500, flush_interval=0.05)
+    flushed = threading.Event()
+
+    with patch.object(buffer, 'flush_if_due', side_effect=lambda: flushed.set()):
+        buffer.start_periodic_flush()
+        assert flushed.wait(timeout=1)
+
+
+@pytest.mark.django_db
+def test_send_log_flushed_after_failed_task(notification: Notification, send_log_buffer: SendLogBuffer) -> None:
+    """Тест сброса буфера лога после падения задачи."""
+    send_log_buffer.add([make_send_log(notification.id, "a@test.com")])
+
+    flush_send_log(state='SUCCESS')
+    assert len(send_log_buffer) == 1
+
+    flush_send_log(state='FAILURE')
+    assert len(send_log_buffer) == 0
+    assert NotificationSendLog.objects.filter(notification=notification).count() == 1
+
+
+@pytest.mark.django_db
+def test_send_batch_task_uses_passed_message(notification: Notification) -> None:
+    """Тест, что задача-пачка не читает уведомление из БД, если текст передан при рассылке."""
+    with CaptureQueriesContext(connection) as queries:
+        send_email_batch_task(notification.id, ["user0@test.com"], "Test message")
+
+    assert not [query for query in queries if 'FROM "notifications_notification"' in query['sql']]
+
+    assert mail.outbox[0].body == "Test message"
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_fan_out_passes_message_to_chunks(mock_chord: MagicMock, notification: Notification) -> None:
+    """Тест, что текст уведомления читается один раз и передается во все пачки."""
+    send_email_notifications_task(notification.id, 0)
+
+    header = mock_chord.call_args.args[0]
+    assert {signature.args[2] for signature in header.tasks} == {"Test message"}
+
+
+@pytest.mark.django_db
+def test_send_to_recipient_task_with_deleted_notification(celery_eager: None, send_log_buffer: SendLogBuffer) -> None:
+    """Тест, что задача для удаленного уведомления завершается без ошибки и без записи в лог."""
+    send_telegram_to_recipient_task(999999, "123456789")
+
+    assert len(send_log_buffer) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_send_log_buffer_skips_deleted_notifications(notification: Notification) -> None:
+    """Тест, что записи удаленного уведомления не блокируют сохранение остальных."""
+    deleted = Notification.objects.create(message="Deleted", delay=0)
+    buffer = SendLogBuffer(max_size=500, flush_interval=3600)
+    buffer.add([make_send_log(notification.id, "a@test.com"), make_send_log(deleted.id, "b@test.com")])
+    deleted.delete()
+
+    buffer.flush()
+
+    assert list(NotificationSendLog.objects.values_list('recipient', flat=True)) == ["a@test.com"]
+    assert len(buffer) == 0
+
+
+@pytest.mark.django_db(transaction=True)
+def test_send_log_buffer_does_not_duplicate_batches_before_error(notification: Notification) -> None:
+    """Тест, что пачки, вставленные до ошибки, откатываются и не дублируются при повторной вставке."""
+    deleted = Notification.objects.create(message="Deleted", delay=0)
+    entries = [
+        make_send_log(notification.id, "a@test.com"), make_send_log(notification.id, "b@test.com"),
+        make_send_log(deleted.id, "c@test.com")
+    ]
+    deleted.delete()
+    buffer = SendLogBuffer(max_size=2, flush_interval=3600)
+
+    buffer.add(entries)
+
+    assert sorted(NotificationSendLog.objects.values_list('recipient', flat=True)) == ["a@test.com", "b@test.com"]
+    assert len(buffer) == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "priority, expected_queue, expected_broker_priority",
+    [
+        pytest.param(Notification.PRIORITY_HIGH, 'email', 0, id="high"),
+        pytest.param(Notification.PRIORITY_NORMAL, 'email', 3, id="normal"),
+        pytest.param(Notification.PRIORITY_LOW, 'email.bulk', 6, id="low"),
+    ],
+)
+@patch('notifications.tasks.chord')
+def test_fan_out_routes_chunks_by_priority(
+        mock_chord: MagicMock, notification: Notification, priority: int, expected_queue: str,
+        expected_broker_priority: int
+) -> None:
+    """Тест маршрутизации пачек в очередь канала с приоритетом брокера по приоритету уведомления."""
+    Notification.objects.filter(id=notification.id).update(priority=priority)
+
+    send_email_notifications_task(notification.id, 0)
+
+    header = mock_chord.call_args.args[0]
+    assert {signature.options['queue'] for signature in header.tasks} == {expected_queue}
+    assert {signature.options['priority'] for signature in header.tasks} == {expected_broker_priority}
+
+
+@pytest.mark.django_db
+def test_dispatch_due_notifications_task(settings) -> None:
+    """Тест, что планировщик пачками забирает только наступившие уведомления и не передает их повторно."""
+    settings.SCHEDULER_BATCH_SIZE = 2
+    now = timezone.now()
+    due = [
+        Notification.objects.create(message=f"Due {i}", scheduled_at=now - timedelta(minutes=i), status=Notification.PENDING)
+        for i in range(3)
+    ]
+    not_due = Notification.objects.create(message="Later", scheduled_at=now + timedelta(hours=1), status=Notification.PENDING)
+
+    assert dispatch_due_notifications_task() == 3
+    assert dispatch_due_notifications_task() == 0
+
+    dispatched = OutboxMessage.objects.values_list('notification_id', flat=True)
+    assert sorted(dispatched) == sorted(notification.id for notification in due)
+    assert Notification.objects.get(id=not_due.id).status == Notification.PENDING
+    assert Notification.objects.filter(status=Notification.QUEUED).count() == 3
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.dispatch_notifications_task.apply_async')
+def test_relay_outbox_publishes_by_priority(mock_dispatch: MagicMock) -> None:
+    """Тест передачи outbox в Celery пачками по приоритетам с удалением переданных записей."""
+    notifications = [
+        Notification.objects.create(message=f"Test {i}", status=Notification.QUEUED, priority=priority)
+        for i, priority in enumerate([Notification.PRIORITY_HIGH, Notification.PRIORITY_NORMAL, Notification.PRIORITY_HIGH])
+    ]
+    add_to_outbox((notification.id, notification.priority) for notification in notifications)
+
+    assert relay_outbox(batch_size=10) == 3
+    assert relay_outbox(batch_size=10) == 0
+
+    published = {call.kwargs['priority']: call.kwargs['args'][0] for call in mock_dispatch.call_args_list}
+    assert published == {0: [notifications[0].id, notifications[2].id], 3: [notifications[1].id]}
+    assert not OutboxMessage.objects.exists()
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.dispatch_notifications_task.apply_async', side_effect=ConnectionError("broker is down"))
+def test_relay_outbox_keeps_messages_on_broker_error(mock_dispatch: MagicMock, notification: Notification) -> None:
+    """Тест, что при недоступном брокере записи остаются в outbox."""
+    add_to_outbox([(notification.id, notification.priority)])
+
+    with pytest.raises(ConnectionError):
+        relay_outbox(batch_size=10)
+
+    assert OutboxMessage.objects.filter(notification=notification).exists()
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_dispatch_notifications_task_skips_redelivered(mock_chord: MagicMock) -> None:
+    """Тест, что повторно доставленная задача не запускает рассылку уведомления второй раз."""
+    notification = Notification.objects.create(message="Test message", status=Notification.QUEUED)
+    Recipient.objects.create(notification=notification, recepient="user@test.com", recepient_type='email')
+
+    dispatch_notifications_task([notification.id])
+    dispatch_notifications_task([notification.id])
+
+    mock_chord.return_value.assert_called_once()
+    assert Notification.objects.get(id=notification.id).status == Notification.PROCESSING
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_fan_out_drops_recent_duplicates(mock_chord: MagicMock, notification: Notification, settings) -> None:
+    """Тест, что получатели, которым то же сообщение уже отправлялось в окне дедупликации, отсеиваются."""
+    settings.NOTIFY_DEDUP_WINDOW = 600
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute.return_value = [True, False, True, False, True]
+
+    with patch('notifications.idempotency.get_redis', return_value=redis_client):
+        send_email_notifications_task(notification.id, 0)
+
+    header = mock_chord.call_args.args[0]
+    assert [signature.args[1] for signature in header.tasks] == [["user0@test.com", "user2@test.com", "user4@test.com"]]
+    skipped = Recipient.objects.filter(notification=notification, delivery_status=Recipient.SKIPPED)
+    assert sorted(skipped.values_list('recepient', flat=True)) == ["user1@test.com", "user3@test.com"]
+
+
+def test_dedup_of_templated_messages_includes_context(settings) -> None:
+    """Тест, что сообщения одного шаблона с разными переменными получателя не считаются повтором."""
+    settings.NOTIFY_DEDUP_WINDOW = 600
+
+    with patch('notifications.idempotency.get_redis', return_value=fakeredis.FakeRedis()):
+        first = drop_recent_duplicates('telegram', "Код: {{ code }}", ["1"], [1, 1], {"1": {"code": "1111"}})
+        second = drop_recent_duplicates('telegram', "Код: {{ code }}", ["1"], [1, 1], {"1": {"code": "2222"}})
+        repeated = drop_recent_duplicates('telegram', "Код: {{ code }}", ["1"], [1, 1], {"1": {"code": "2222"}})
+
+    assert (first, second, repeated) == (["1"], ["1"], [])
+
+
+@pytest.mark.django_db
+def test_failed_send_does_not_suppress_resend(celery_eager: None, notification: Notification, settings) -> None:
+    """Тест, что после постоянной ошибки отправки отметка дедупликации снимается и повтор сообщения не отсеивается."""
+    settings.NOTIFY_DEDUP_WINDOW = 600
+    smtp_connection = MagicMock()
+    smtp_connection.send_messages.side_effect = [smtplib.SMTPRecipientsRefused({"user0@test.com": (550, b"Mailbox full")}), 1]
+
+    with patch('notifications.idempotency.get_redis', return_value=fakeredis.FakeRedis()), \
+            patch('notifications.services.get_connection', return_value=smtp_connection):
+        assert drop_recent_duplicates('email', "Test", ["user0@test.com", "user1@test.com"]) == ["user0@test.com", "user1@test.com"]
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com", "user1@test.com"], "Test"))
+
+        assert drop_recent_duplicates('email', "Test", ["user0@test.com", "user1@test.com"]) == ["user0@test.com"]
+
+
+@pytest.mark.django_db
+@patch('notifications.tasks.chord')
+def test_fan_out_completes_channel_when_all_duplicates(mock_chord: MagicMock, settings) -> None:
+    """Тест, что канал, все получатели которого отсеяны как повторы, сразу завершается."""
+    settings.NOTIFY_DEDUP_WINDOW = 600
+    notification = Notification.objects.create(message="Test message", status=Notification.QUEUED, pending_channels=1)
+    Recipient.objects.create(notification=notification, recepient="user@test.com", recepient_type='email')
+    NotificationChannelStats.objects.create(notification=notification, channel='email', total=1)
+    redis_client = MagicMock()
+    redis_client.pipeline.return_value.execute.return_value = [False]
+
+    with patch('notifications.idempotency.get_redis', return_value=redis_client):
+        send_email_notifications_task(notification.id, 0)
+
+    mock_chord.assert_not_called()
+    assert Notification.objects.get(id=notification.id).status == Notification.COMPLETED
+    stats = NotificationChannelStats.objects.get(notification=notification)
+    assert (stats.skipped, stats.pending) == (1, 0)
+
+
+@pytest.mark.django_db
+def test_send_batch_retries_transient_errors(
+        celery_eager: None, notification: Notification, send_log_buffer: SendLogBuffer
+) -> None:
+    """Тест повтора пачки только для получателей с временной ошибкой и сохранения статусов доставки."""
+    smtp_connection = MagicMock()
+    smtp_connection.send_messages.side_effect = [
+        smtplib.SMTPRecipientsRefused({"user0@test.com": (451, b"Try again later")}),
+        1,
+        smtplib.SMTPRecipientsRefused({"user2@test.com": (550, b"No such user")}),
+        1,
+    ]
+
+    with patch('notifications.services.get_connection', return_value=smtp_connection):
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com", "user1@test.com", "user2@test.com"], "Test"))
+
+    retried = [call.args[0][0].to for call in smtp_connection.send_messages.call_args_list]
+    assert retried == [["user0@test.com"], ["user1@test.com"], ["user2@test.com"], ["user0@test.com"]]
+    recipients = {
+        recipient.recepient: (recipient.delivery_status, recipient.attempts)
+        for recipient in Recipient.objects.filter(notification=notification, recepient__in=["user0@test.com", "user1@test.com", "user2@test.com"])
+    }
+    assert recipients == {
+        "user0@test.com": (Recipient.SENT, 2),
+        "user1@test.com": (Recipient.SENT, 1),
+        "user2@test.com": (Recipient.DEAD, 1),
+    }
+
+
+@pytest.mark.django_db
+def test_send_batch_marks_recipient_dead_after_max_attempts(
+        celery_eager: None, notification: Notification, settings
+) -> None:
+    """Тест, что после исчерпания попыток получатель переводится в статус «Не доставлено»."""
+    settings.DELIVERY_RETRY_POLICIES = {
+        delivery.TRANSIENT: {'base_delay': 1, 'max_delay': 1, 'max_attempts': 3},
+    }
+    smtp_connection = MagicMock()
+    smtp_connection.send_messages.side_effect = smtplib.SMTPRecipientsRefused({"user0@test.com": (421, b"Busy")})
+
+    with patch('notifications.services.get_connection', return_value=smtp_connection):
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com"], "Test"))
+
+    assert smtp_connection.send_messages.call_count == 3
+    recipient = Recipient.objects.get(notification=notification, recepient="user0@test.com")
+    assert (recipient.delivery_status, recipient.attempts, recipient.next_attempt_at) == (Recipient.DEAD, 3, None)
+
+
+@pytest.mark.django_db
+def test_send_batch_skips_recently_rejected_recipients(celery_eager: None, notification: Notification) -> None:
+    """Тест, что получатель, отклоненный провайдером постоянной ошибкой, в следующей рассылке пропускается без отправки."""
+    smtp_connection = MagicMock()
+    smtp_connection.send_messages.side_effect = [smtplib.SMTPRecipientsRefused({"user0@test.com": (550, b"No such user")}), 1]
+
+    with patch('notifications.services.get_connection', return_value=smtp_connection):
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com"], "Test"))
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com", "user1@test.com"], "Test"))
+
+    sent = [call.args[0][0].to for call in smtp_connection.send_messages.call_args_list]
+    assert sent == [["user0@test.com"], ["user1@test.com"]]
+    assert Recipient.objects.get(notification=notification, recepient="user0@test.com").delivery_status == Recipient.DEAD
+
+
+@pytest.mark.django_db
+def test_send_batch_does_not_remember_message_errors(celery_eager: None, notification: Notification) -> None:
+    """Тест, что отказ SMTP-сервера принять текст письма не запоминается как отказ получателя."""
+    smtp_connection = MagicMock()
+    smtp_connection.send_messages.side_effect = [smtplib.SMTPDataError(554, b"Message rejected"), 1]
+
+    with patch('notifications.services.get_connection', return_value=smtp_connection):
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com"], "Test"))
+        send_email_batch_task.apply(args=(notification.id, ["user0@test.com"], "Fixed test"))
+
+    assert [call.args[0][0].body for call in smtp_connection.send_messages.call_args_list] == ["Test", "Fixed test"]
+    assert delivery.rejected_recipients('email', ["user0@test.com"]) == set()
+
+
+@pytest.mark.parametrize(
+    "error_class, attempt, expected_min, expected_max",
+    [
+        pytest.param(delivery.TRANSIENT, 1, 15, 30, id="first_transient"),
+        pytest.param(delivery.TRANSIENT, 3, 60, 120, id="third_transient"),
+        pytest.param(delivery.RATE_LIMITED, 1, 30, 60, id="first_rate_limited"),
+        pytest.param(delivery.TRANSIENT, 20, 450, 900, id="capped"),
+    ],
+)
+def test_retry_delay_is_jittered_exponential(error_class: str, attempt: int, expected_min: float, expected_max: float) -> None:
+    """Тест экспоненциальной задержки повтора с разбросом и ограничением сверху."""
+    delays = [delivery.get_retry_delay(error_class, attempt) for _ in range(100)]
+
+    assert all(expected_min <= delay <= expected_max for delay in delays)
+    assert len(set(delays)) > 1
+
+
+@pytest.mark.parametrize("is_eager, expected_calls", [pytest.param(False, 1, id="worker"), pytest.param(True, 0, id="eager")])
+def test_close_stale_db_connections_skips_eager_tasks(is_eager: bool, expected_calls: int) -> None:
+    """Тест, что воркер закрывает только устаревшие соединения, а синхронные задачи не трогают соединение."""
+    task = MagicMock()
+    task.request.is_eager = is_eager
+
+    with patch('notifications.tasks.close_old_connections') as close_old:
+        close_stale_db_connections(task=task)
+
+    assert close_old.call_count == expected_calls
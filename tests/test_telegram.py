@@ -0,0 +1,241 @@
+import asyncio
+import json
+import threading
+import time
+import fakeredis
+import httpx
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List
+from unittest.mock import patch
+from notifications import telegram
+from notifications.delivery import PERMANENT, REJECTED, TRANSIENT, rejected_recipients, remember_rejections
+from notifications.channels import get_backend
+from notifications.telegram import RateLimiter, TelegramClient, run_in_worker_loop
+
+
+class TelegramStubHandler(BaseHTTPRequestHandler):
+    """
+    Заглушка Telegram Bot API: отвечает 429 на первый запрос в чаты из rate_limited
+    и ошибкой (код, описание) из errors на запросы в остальные перечисленные там чаты.
+    """
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        server: Any = self.server
+        with server.lock:
+            server.requests.append(body)
+            chat_id = str(body['chat_id'])
+            limited = chat_id in server.rate_limited
+            server.rate_limited.discard(chat_id)
+
+        if limited:
+            self._respond(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.2}})
+        elif chat_id in server.errors:
+            status, description = server.errors[chat_id]
+            self._respond(status, {"ok": False, "error_code": status, "description": description})
+        else:
+            self._respond(200, {"ok": True, "result": {"message_id": len(server.requests)}})
+
+    def _respond(self, status: int, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+
+class TelegramStubServer(ThreadingHTTPServer):
+    """Сервер заглушки с очередью соединений на всю пачку: при очереди по умолчанию (5) соединения сбрасываются."""
+    request_queue_size = 128
+    daemon_threads = True
+
+
+@pytest.fixture
+def telegram_stub() -> Iterator[Any]:
+    """Фикстура с локальным HTTP-сервером вместо api.telegram.org."""
+    server: Any = TelegramStubServer(('127.0.0.1', 0), TelegramStubHandler)
+    server.lock = threading.Lock()
+    server.requests = []
+    server.rate_limited = set()
+    server.errors = {}
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(autouse=True)
+def reset_telegram_client() -> Iterator[None]:
+    """Фикстура, сбрасывающая клиент Telegram процесса между тестами."""
+    telegram.close_telegram_client()
+    yield
+    telegram.close_telegram_client()
+
+
+def send_many(client: TelegramClient, chat_ids: List[str]) -> Dict[str, Any]:
+    """Отправляет тестовое сообщение в чаты и закрывает клиент."""
+    try:
+        return run_in_worker_loop(client.send_many(chat_ids, "Test message"))
+    finally:
+        run_in_worker_loop(client.aclose())
+
+
+def test_send_many_delivers_all_messages(telegram_stub: Any) -> None:
+    """Тест конкурентной отправки пачки сообщений."""
+    client = TelegramClient(token="token", base_url=telegram_stub.url, rate_limit=1000)
+    chat_ids = [str(i) for i in range(50)]
+
+    results = send_many(client, chat_ids)
+
+    assert results == {chat_id: None for chat_id in chat_ids}
+    assert sorted(request['chat_id'] for request in telegram_stub.requests) == sorted(chat_ids)
+
+
+def test_send_many_retries_after_429(telegram_stub: Any) -> None:
+    """Тест повторной отправки после ответа 429 с учетом retry_after."""
+    telegram_stub.rate_limited.add("1")
+    client = TelegramClient(token="token", base_url=telegram_stub.url, rate_limit=1000)
+
+    started_at = time.monotonic()
+    results = send_many(client, ["1", "2"])
+
+    assert results == {"1": None, "2": None}
+    assert [request['chat_id'] for request in telegram_stub.requests].count("1") == 2
+    assert time.monotonic() - started_at >= 0.2
+
+
+def test_send_many_reports_api_errors(telegram_stub: Any) -> None:
+    """Тест, что ошибка одного чата не влияет на остальные."""
+    telegram_stub.errors["2"] = (403, "Forbidden: bot was blocked by the user")
+    client = TelegramClient(token="token", base_url=telegram_stub.url, rate_limit=1000)
+
+    results = send_many(client, ["1", "2"])
+
+    assert results["1"] is None
+    assert results["2"] == "Ошибка Telegram API, код ответа: 403"
+    assert results["2"].error_class == REJECTED
+
+
+@pytest.mark.parametrize(
+    "status_code, description, error_class",
+    [
+        pytest.param(401, "Unauthorized", TRANSIENT, id="invalid_token"),
+        pytest.param(404, "Not Found", TRANSIENT, id="unknown_bot"),
+        pytest.param(400, "Bad Request: message is too long", PERMANENT, id="message_too_long"),
+        pytest.param(400, "Bad Request: can't parse entities", PERMANENT, id="bad_markup"),
+        pytest.param(400, "Bad Request: chat not found", REJECTED, id="chat_not_found"),
+        pytest.param(403, "Forbidden: bot was kicked from the group chat", REJECTED, id="bot_kicked"),
+    ],
+)
+def test_only_recipient_errors_are_remembered(
+        telegram_stub: Any, status_code: int, description: str, error_class: str
+) -> None:
+    """Тест, что в кэш отклоненных получателей попадают только ошибки самого чата, а не бота или текста."""
+    telegram_stub.errors["1"] = (status_code, description)
+    client = TelegramClient(token="token", base_url=telegram_stub.url, rate_limit=1000)
+
+    results = send_many(client, ["1"])
+    remember_rejections('telegram', results)
+
+    assert results["1"].error_class == error_class
+    assert rejected_recipients('telegram', ["1"]) == ({"1"} if error_class == REJECTED else set())
+
+
+class FakeClock:
+    """
+    Искусственные часы: ожидание мгновенно сдвигает время вперед.
+    В тестах частота — степень двойки, чтобы интервалы считались без ошибок округления.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_rate_limiter_spaces_requests_by_rate() -> None:
+    """Тест, что ограничитель выдает разрешения не чаще rate в секунду и учитывает паузу."""
+    clock = FakeClock()
+    limiter = RateLimiter(rate=16, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+
+    async def acquire_times(count: int) -> List[float]:
+        times = []
+        for _ in range(count):
+            await limiter.acquire()
+            times.append(clock.now)
+        return times
+
+    assert run_in_worker_loop(acquire_times(3)) == [0.0, 0.0625, 0.125]
+    limiter.pause(1)
+    assert run_in_worker_loop(acquire_times(2)) == [1.125, 1.1875]
+
+
+def test_send_many_respects_global_rate_limit(telegram_stub: Any) -> None:
+    """Тест глобального ограничения частоты отправки."""
+    clock = FakeClock()
+    client = TelegramClient(token="token", base_url=telegram_stub.url)
+    client.rate_limiter = RateLimiter(rate=16, capacity=1, clock=clock.monotonic, sleep=clock.sleep)
+
+    send_many(client, [str(i) for i in range(5)])
+
+    assert len(telegram_stub.requests) == 5
+    assert clock.now == 0.25
+
+
+def test_rate_limit_shared_between_clients_through_redis(telegram_stub: Any) -> None:
+    """Тест, что клиенты разных процессов делят лимит бота через Redis."""
+    redis_client = fakeredis.FakeAsyncRedis()
+    clients = [TelegramClient(token="1:token", base_url=telegram_stub.url, rate_limit=20) for _ in range(2)]
+    for client in clients:
+        client.rate_limiter = RateLimiter(rate=20, capacity=1)
+
+    async def send_from_all() -> None:
+        await asyncio.gather(*(client.send_many([f"{i}{j}" for j in range(3)], "Test") for i, client in enumerate(clients)))
+        for client in clients:
+            await client.aclose()
+
+    started_at = time.monotonic()
+    with patch('notifications.telegram.get_async_redis', return_value=redis_client):
+        run_in_worker_loop(send_from_all())
+
+    assert len(telegram_stub.requests) == 6
+    assert time.monotonic() - started_at >= 0.24
+
+
+@pytest.mark.parametrize(
+    "payload, headers",
+    [
+        pytest.param({"parameters": {"retry_after": "soon"}}, {"Retry-After": "later"}, id="malformed"),
+        pytest.param({}, {}, id="missing"),
+        pytest.param({"parameters": {"retry_after": -5}}, {}, id="negative"),
+    ],
+)
+def test_retry_after_falls_back_on_invalid_value(payload: Dict[str, Any], headers: Dict[str, str]) -> None:
+    """Тест, что некорректный retry_after не прерывает пачку, а заменяется значением по умолчанию."""
+    response = httpx.Response(429, json=payload, headers=headers)
+
+    assert telegram._retry_after(response) == telegram.DEFAULT_RETRY_AFTER
+
+
+def test_telegram_backend_uses_shared_client(telegram_stub: Any, settings) -> None:
+    """Тест, что пачки разных задач используют один клиент процесса."""
+    settings.TELEGRAM_API_URL = telegram_stub.url
+    backend = get_backend('telegram')
+
+    assert backend.send_batch("Test message", ["1"]) == {"1": None}
+    client = telegram.get_telegram_client()
+    assert backend.send_batch("Test message", ["2"]) == {"2": None}
+
+    assert telegram.get_telegram_client() is client
+    assert len(telegram_stub.requests) == 2
@@ -0,0 +1,22 @@
+from notifications.validators import classify_recipients
+
+
+def test_classify_recipients() -> None:
+    """Тест классификации получателей по типу за один проход."""
+    valid, invalid = classify_recipients(["test@test.com", "123456789"])
+
+    assert valid == [
+        {"recipient": "test@test.com", "recipient_type": "email"},
+        {"recipient": "123456789", "recipient_type": "telegram"},
+    ]
+    assert invalid == []
+
+
+def test_classify_recipients_collects_all_errors() -> None:
+    """Тест, что ошибки собираются по всем получателям, а не до первой."""
+    values = ["test@test.com", "test@test.com", "test1test.com", 123, "", "1" * 151, "@test.com"]
+
+    valid, invalid = classify_recipients(values)
+
+    assert [recipient["recipient"] for recipient in valid] == ["test@test.com"]
+    assert [error["recipient"] for error in invalid] == values[1:]
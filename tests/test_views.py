@@ -1,8 +1,11 @@
+import json
 import pytest
 from rest_framework import status
 from rest_framework.test import APIClient
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from typing import Dict, Any
+from notifications.delivery import PERMANENT, SendError, record_delivery
+from notifications.models import Notification, NotificationChannelStats, OutboxMessage, Recipient
 
 
 @pytest.fixture
@@ -61,22 +64,21 @@ def test_create_notification(api_client: APIClient, notification_data: Dict[str,
 
 
 @pytest.mark.django_db
-@patch('notifications.views.send_email_notifications_task.apply_async')
-@patch('notifications.views.send_telegram_notification_task.apply_async')
-def test_create_notification_with_task_call(
-        mock_send_email, mock_send_telegram, api_client: APIClient, create_notification_data_list: Dict[str, Any]
+@patch('notifications.tasks.dispatch_notifications_task.apply_async')
+def test_create_notification_writes_outbox(
+        mock_dispatch, api_client: APIClient, create_notification_data_list: Dict[str, Any]
 ) -> None:
-    """Тест успешного создания уведомления с вызовом задач."""
+    """Тест, что создание уведомления записывает его в outbox, не обращаясь к брокеру."""
     url = '/api/notify/'
 
     response = api_client.post(url, data=create_notification_data_list, format='json')
 
-    mock_send_email.assert_called_once()
-    mock_send_telegram.assert_called_once()
-
     assert response.status_code == status.HTTP_201_CREATED
-    assert 'id' in response.data
     assert response.data['message'] == create_notification_data_list['message']
+    mock_dispatch.assert_not_called()
+    assert list(OutboxMessage.objects.values_list('notification_id', 'priority')) == [
+        (response.data['id'], Notification.PRIORITY_NORMAL)
+    ]
 
 
 @pytest.mark.django_db
@@ -145,3 +147,172 @@ def test_create_notification_missing_field(api_client: APIClient) -> None:
 
     assert response.status_code == status.HTTP_400_BAD_REQUEST
     assert 'recepient' in response.data
+
+
+@pytest.mark.django_db
+def test_bulk_create_ndjson(api_client: APIClient) -> None:
+    """Тест массового создания уведомлений из NDJSON с ошибками в отдельных строках."""
+    body = "\n".join([
+        json.dumps({"message": "First", "recepient": ["test1@test.com", "123456789"], "delay": 0}),
+        "not json",
+        json.dumps({"message": "Second", "recepient": "test1test.com", "delay": 0}),
+        json.dumps({"message": "Third", "recepient": "987654321", "delay": 1}),
+    ])
+
+    response = api_client.post('/api/notify/bulk/', data=body, content_type='application/x-ndjson')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert len(response.data['created']) == 2
+    assert [error['index'] for error in response.data['errors']] == [1, 2]
+    assert 'recepient' in response.data['errors'][1]['errors']
+    assert Recipient.objects.filter(notification_id__in=response.data['created']).count() == 3
+    first_id, delayed_id = response.data['created']
+    assert list(OutboxMessage.objects.values_list('notification_id', flat=True)) == [first_id]
+    assert Notification.objects.get(id=delayed_id).status == Notification.PENDING
+
+
+@pytest.mark.django_db
+def test_bulk_create_json_array_in_batches(api_client: APIClient, settings) -> None:
+    """Тест массового создания уведомлений из JSON-массива пачками."""
+    settings.NOTIFY_BULK_BATCH_SIZE = 2
+    items = [{"message": f"Message {i}", "recepient": f"user{i}@test.com", "delay": 0} for i in range(5)]
+
+    response = api_client.post('/api/notify/bulk/', data=json.dumps(items), content_type='application/json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data['errors'] == []
+    assert list(Notification.objects.filter(id__in=response.data['created']).values_list('message', flat=True)
+                .order_by('id')) == [item['message'] for item in items]
+    assert sorted(OutboxMessage.objects.values_list('notification_id', flat=True)) == sorted(response.data['created'])
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "body, content_type, expected_status",
+    [
+        pytest.param('{"message": "Test"', 'application/json', status.HTTP_400_BAD_REQUEST, id="broken_array"),
+        pytest.param('[{"message": "Test", "delay": 0}]', 'application/json', status.HTTP_400_BAD_REQUEST,
+                     id="all_invalid"),
+        pytest.param('message=Test', 'text/plain', status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, id="unsupported_type"),
+    ],
+)
+def test_bulk_create_invalid_body(api_client: APIClient, body: str, content_type: str, expected_status: int) -> None:
+    """Тест массового создания с некорректным телом запроса."""
+    response = api_client.post('/api/notify/bulk/', data=body, content_type=content_type)
+
+    assert response.status_code == expected_status
+    assert Notification.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_create_delayed_notification_is_left_to_scheduler(api_client: APIClient) -> None:
+    """Тест, что отложенное уведомление не попадает в outbox, а ждет планировщика."""
+    data = {"message": "Test message", "recepient": ["test1@test.com"], "delay": 2}
+
+    response = api_client.post('/api/notify/', data=data, format='json')
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert not OutboxMessage.objects.exists()
+    notification = Notification.objects.get(id=response.data['id'])
+    assert notification.status == Notification.PENDING
+    assert (notification.scheduled_at - notification.created_at).total_seconds() == pytest.approx(86400, abs=5)
+
+
+@pytest.mark.django_db
+def test_create_notification_idempotency_key_replays_response(
+        api_client: APIClient, create_notification_data_list: Dict[str, Any]
+) -> None:
+    """Тест, что повтор запроса с тем же Idempotency-Key возвращает исходный ответ без нового уведомления."""
+    first = api_client.post('/api/notify/', data=create_notification_data_list, format='json', HTTP_IDEMPOTENCY_KEY="key-1")
+    retry = api_client.post('/api/notify/', data=create_notification_data_list, format='json', HTTP_IDEMPOTENCY_KEY="key-1")
+    other = api_client.post('/api/notify/', data=create_notification_data_list, format='json', HTTP_IDEMPOTENCY_KEY="key-2")
+
+    assert first.status_code == retry.status_code == status.HTTP_201_CREATED
+    assert retry.data == first.data
+    assert retry['Idempotent-Replayed'] == 'true'
+    assert other.data['id'] != first.data['id']
+    assert Notification.objects.count() == 2
+    assert OutboxMessage.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_create_notification_idempotency_key_from_redis(
+        api_client: APIClient, create_notification_data_list: Dict[str, Any], django_assert_num_queries: Any
+) -> None:
+    """Тест, что сохраненный в Redis ответ возвращается без обращения к БД."""
+    redis_client = MagicMock()
+    redis_client.get.return_value = json.dumps({"id": 42, "message": "Test message"}).encode()
+
+    with patch('notifications.idempotency.get_redis', return_value=redis_client), django_assert_num_queries(0):
+        response = api_client.post(
+            '/api/notify/', data=create_notification_data_list, format='json', HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert response.data == {"id": 42, "message": "Test message"}
+    redis_client.get.assert_called_once_with("notify:idempotency:key-1")
+
+
+@pytest.mark.django_db
+def test_create_notification_invalid_idempotency_key(
+        api_client: APIClient, create_notification_data_list: Dict[str, Any]
+) -> None:
+    """Тест отклонения слишком длинного Idempotency-Key."""
+    response = api_client.post(
+        '/api/notify/', data=create_notification_data_list, format='json', HTTP_IDEMPOTENCY_KEY="k" * 256
+    )
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert 'Idempotency-Key' in response.data
+    assert Notification.objects.count() == 0
+
+
+@pytest.mark.django_db
+def test_notification_status_counts_by_channel(api_client: APIClient, django_assert_num_queries: Any) -> None:
+    """Тест статуса уведомления: счетчики каналов обновляются по результатам отправки и читаются без подсчета получателей."""
+    recipients = [f"user{i}@test.com" for i in range(20)] + ["123456789"]
+    notification_id = api_client.post(
+        '/api/notify/', data={"message": "Test", "recepient": recipients}, format='json'
+    ).data['id']
+    record_delivery(notification_id, 'email', {"user0@test.com": None, "user1@test.com": SendError("bad", PERMANENT)}, 1)
+    # Повторная доставка той же задачи брокером не увеличивает счетчики.
+    record_delivery(notification_id, 'email', {"user0@test.com": None}, 1)
+
+    with django_assert_num_queries(2):
+        response = api_client.get(f'/api/notify/{notification_id}/')
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['channels'] == {
+        'email': {'total': 20, 'sent': 1, 'failed': 1, 'skipped': 0, 'pending': 18},
+        'telegram': {'total': 1, 'sent': 0, 'failed': 0, 'skipped': 0, 'pending': 1},
+    }
+    assert api_client.get('/api/notify/999999/').status_code == status.HTTP_404_NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_notification_list_filters_and_cursor(api_client: APIClient, settings: Any) -> None:
+    """Тест списка уведомлений: фильтр по статусу и переход на следующую страницу по курсору."""
+    settings.NOTIFY_LIST_PAGE_SIZE = 2
+    for index in range(3):
+        api_client.post('/api/notify/', data={"message": f"Now {index}", "recepient": "a@test.com"}, format='json')
+    api_client.post('/api/notify/', data={"message": "Later", "recepient": "a@test.com", "delay": 1}, format='json')
+
+    first = api_client.get('/api/notify/', {'status': Notification.QUEUED})
+    second = api_client.get(first.data['next'])
+
+    assert first.status_code == status.HTTP_200_OK
+    assert [item['message'] for item in first.data['results'] + second.data['results']] == ["Now 2", "Now 1", "Now 0"]
+    assert second.data['next'] is None
+    assert first.data['results'][0]['channels'] == {'email': {'total': 1, 'sent': 0, 'failed': 0, 'skipped': 0, 'pending': 1}}
+    assert api_client.get('/api/notify/', {'status': 'unknown'}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_bulk_create_creates_channel_stats(api_client: APIClient) -> None:
+    """Тест, что массовая загрузка создает счетчики каналов каждого уведомления."""
+    items = [{"message": "A", "recepient": ["a@test.com", "b@test.com"]}, {"message": "B", "recepient": "123"}]
+
+    response = api_client.post('/api/notify/bulk/', data=json.dumps(items), content_type='application/json')
+
+    assert sorted(NotificationChannelStats.objects.filter(notification_id__in=response.data['created'])
+                  .values_list('channel', 'total')) == [('email', 2), ('telegram', 1)]